@@ -0,0 +1,144 @@
+"""
+admission.py  —  Admission control and load shedding
+=====================================================
+Bounds the work a process accepts. At most `concurrency` requests run
+the model at once; up to `max_queue` more wait, each for at most
+`queue_timeout_s`. Anything beyond that is refused straight away, so
+latency under overload is capped at roughly one queue wait plus one
+request instead of growing until clients time out.
+
+Before refusing work the API sheds the expensive part: once
+`degrade_at` requests are waiting, admitted requests skip SHAP and
+return the price only.
+
+AdmissionController blocks the calling thread (Flask / gunicorn);
+AsyncAdmissionController awaits instead (asgi.py), so queued requests
+hold no thread.
+"""
+
+import asyncio
+import collections
+import threading
+import time
+
+
+class Overloaded(Exception):
+    """Raised when a request is refused — reason is "queue_full" or "queue_timeout"."""
+
+    def __init__(self, reason):
+        super().__init__("Server overloaded, retry shortly")
+        self.reason = reason
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, time-limited wait queue."""
+
+    def __init__(self, concurrency, max_queue, queue_timeout_s, degrade_at):
+        self.concurrency     = concurrency
+        self.max_queue       = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.degrade_at      = degrade_at
+        self.active  = 0
+        self.waiting = 0
+        self.admitted = self.rejected = self.timed_out = 0
+        self._cond  = threading.Condition()
+        self._queue = collections.deque()   # one [granted] flag per waiter, oldest first
+
+    @property
+    def enabled(self):
+        return self.concurrency > 0
+
+    @property
+    def under_pressure(self):
+        """True once enough requests are queued that SHAP should be dropped."""
+        return self.waiting >= self.degrade_at
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed; raises Overloaded."""
+        with self._cond:
+            if self.active < self.concurrency and not self.waiting:
+                self.active   += 1
+                self.admitted += 1
+                return
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("queue_full")
+
+            # A freed slot is handed straight to the oldest waiter, so a
+            # thread that just released cannot take it back first.
+            ticket = [False]
+            self._queue.append(ticket)
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout_s
+            try:
+                while not ticket[0]:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._queue.remove(ticket)
+                        self.timed_out += 1
+                        raise Overloaded("queue_timeout")
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.admitted += 1
+
+    def release(self):
+        with self._cond:
+            if self._queue:
+                self._queue.popleft()[0] = True   # the slot stays taken
+                self._cond.notify_all()
+            else:
+                self.active -= 1
+
+    def stats(self):
+        return {
+            "concurrency":      self.concurrency,
+            "max_queue":        self.max_queue,
+            "queue_timeout_ms": self.queue_timeout_s * 1000,
+            "degrade_at":       self.degrade_at,
+            "active":           self.active,
+            "waiting":          self.waiting,
+            "admitted":         self.admitted,
+            "rejected":         self.rejected,
+            "timed_out":        self.timed_out,
+        }
+
+
+class AsyncAdmissionController(AdmissionController):
+    """The same limits for an event loop — waiters are futures, not threads.
+
+    Only call acquire() / release() from the loop's thread.
+    """
+
+    async def acquire(self):
+        if self.active < self.concurrency and not self.waiting:
+            self.active   += 1
+            self.admitted += 1
+            return
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded("queue_full")
+
+        ticket = asyncio.get_running_loop().create_future()
+        self._queue.append(ticket)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(ticket, self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise Overloaded("queue_timeout") from None
+        except asyncio.CancelledError:
+            if ticket.done() and not ticket.cancelled():
+                self.release()   # handed a slot just as the client went away
+            raise
+        finally:
+            self.waiting -= 1
+        self.admitted += 1
+
+    def release(self):
+        while self._queue:
+            ticket = self._queue.popleft()
+            if not ticket.done():        # skip waiters that timed out or left
+                ticket.set_result(None)  # the slot stays taken
+                return
+        self.active -= 1
@@ -3,162 +3,1128 @@ app.py  —  EstateVision Flask API
 ===================================
 Serves XGBoost predictions + SHAP explanations.
 
-Run with:  python app.py
-Endpoint:  POST http://localhost:5000/predict
+Run with:  python app.py                          (development server)
+           gunicorn -c gunicorn.conf.py app:app   (production, prefork)
+           python asgi.py                         (ASGI: /, /predict, /predict/batch)
+Endpoints: POST http://localhost:5000/predict[?explain=true|false|deferred][&tier=fast]
+           POST http://localhost:5000/predict/batch
+           POST http://localhost:5000/predict/sweep
+           POST http://localhost:5000/predict/columnar   (Arrow IPC / msgpack)
+           POST http://localhost:5000/comparables
+           GET  http://localhost:5000/explain/<id>
+           GET  http://localhost:5000/healthz   (liveness)
+           GET  http://localhost:5000/readyz    (readiness)
+           GET  http://localhost:5000/metrics   (Prometheus)
+           POST http://localhost:5000/admin/reload
+
+Hot reload: write a new bundle (python bundle.py build, or train_model.py)
+and either POST /admin/reload, send SIGHUP to a worker, or send SIGHUP to
+the gunicorn master to roll every worker onto bundles/CURRENT.
+
+Request log (opt-in, EV_REQUEST_LOG=logs/requests.jsonl): prediction
+requests and responses are appended off the request thread
+(request_log.py); replay them against a new bundle with
+python replay.py logs/requests.jsonl*.
 """
 
-from flask import Flask, request, jsonify
+import time
+IMPORT_STARTED = time.perf_counter()
+
+import functools
+import os
+import random
+import signal
+import threading
+
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
-import joblib
 import numpy as np
-import pandas as pd
+
+import metrics
+from admission import AdmissionController, Overloaded
+from batcher import MicroBatcher
+from bundle import ModelBundle, BundleError, current_path
+from cache import PredictionCache
+from columnar import READERS, WRITERS, CodecUnavailable, media_format
+from comparables import ListingsFeed
+from config import CONFIG
+from deferred import ExplanationJobs, DONE, DROPPED, PENDING
+from market_cube import MarketCube, QUANTILES, DIMENSIONS, describe_filters, parse_filters
+from request_log import RequestLogger, REPLAY_HEADER
 
 app = Flask(__name__)
 CORS(app)  # allows React frontend to call this API
 
-# ── LOAD MODEL FILES ───────────────────────────────────────────
-print("Loading model files...")
-model      = joblib.load("xgb_model.pkl")
-explainer  = joblib.load("shap_explainer.pkl")
-features   = joblib.load("feature_names.pkl")
-le         = joblib.load("district_encoder.pkl")
-print(f"✅ Model loaded — {len(features)} features")
-print(f"   Known districts: {list(le.classes_)}")
-
-# ── DISTRICT MAPPINGS ──────────────────────────────────────────
-DISTRICT_TIERS = {
-    "Colombo": 1,
-    "Gampaha": 2, "Kalutara": 2, "Kandy": 2, "Galle": 2, "Matara": 2,
-    "Kurunegala": 3, "Ratnapura": 3, "Trincomalee": 3, "Puttalam": 3,
-    "Kegalle": 3, "Negombo": 3,
-    "Badulla": 4, "Anuradhapura": 4, "Polonnaruwa": 4, "Ampara": 4,
-    "Batticaloa": 4, "Jaffna": 4, "Hambantota": 4, "Monaragala": 4,
-    "Nuwara Eliya": 4, "Matale": 4, "Other": 4,
+# ── LOAD MODEL BUNDLE ──────────────────────────────────────────
+def load_active_bundle():
+    """The bundle named by bundles/CURRENT, else the legacy loose files."""
+    path = current_path(CONFIG["bundle_dir"])
+    if path is None:
+        return ModelBundle.from_loose_files(CONFIG, CONFIG["model_file"],
+                                            "feature_names.pkl", "district_encoder.pkl")
+    return ModelBundle.load(path, CONFIG)
+
+
+print("Loading model bundle...")
+load_started = time.perf_counter()
+bundle = load_active_bundle()   # swapped atomically by reload_bundle()
+print(f"✅ Bundle {bundle.version} loaded — {len(bundle.features)} features")
+print(f"   Known districts: {bundle.district_classes}")
+print(f"✅ Explainer backend: {CONFIG['explainer']}")
+if bundle.ensemble is not None:
+    print(f"✅ Array engine ready — {bundle.ensemble.n_trees} trees, depth {bundle.ensemble.max_depth}")
+
+startup = {
+    "import_to_loaded_s": round(time.perf_counter() - IMPORT_STARTED, 3),
+    "load_s":             round(time.perf_counter() - load_started, 3),
+    "warmup_s":           None,
+    "first_request_ms":   None,
+}
+
+
+# ── METRICS ────────────────────────────────────────────────────
+REQUESTS = metrics.Counter("estatevision_requests_total",
+                           "HTTP requests served.", ["endpoint", "method", "status"])
+ERRORS   = metrics.Counter("estatevision_request_errors_total",
+                           "Failed requests by error type.", ["endpoint", "type"])
+LATENCY  = metrics.Histogram("estatevision_request_duration_seconds",
+                             "Request handling time, hooks included.", ["endpoint"])
+STAGES   = metrics.Histogram("estatevision_stage_duration_seconds",
+                             "Time per inference stage (predict/shap are per model call).",
+                             ["stage"])
+IN_FLIGHT = metrics.Gauge("estatevision_requests_in_flight",
+                          "Requests currently being handled.").labels()
+metrics.Gauge("estatevision_model_info", "Active model bundle (value is always 1).",
+              ["version", "pid"], fn=lambda: {(bundle.version, os.getpid()): 1})
+metrics.Gauge("process_resident_memory_bytes", "Resident memory size in bytes.",
+              fn=lambda: {(): metrics.resident_memory_bytes()})
+
+FAST = metrics.Counter("estatevision_fast_answers_total",
+                       "/predict/fast answers by source (grid lookup or model fallback).",
+                       ["source"])
+TIER_FAST = metrics.Counter("estatevision_tier_fast_answers_total",
+                            "/predict?tier=fast answers: surrogate, or why the full model answered.",
+                            ["source"])
+metrics.Gauge("estatevision_feature_psi",
+              "Population stability index of live inputs vs training, per feature.",
+              ["feature"], fn=lambda: bundle.drift.psi_by_feature() if bundle.drift else {})
+metrics.Gauge("estatevision_unseen_values",
+              "Request values the encoder mapped to a default (unseen district / type).",
+              ["field"], fn=lambda: {(field, ): v["total"]
+                                     for field, v in bundle.encoder.unseen.snapshot().items()})
+SHED = metrics.Counter("estatevision_shed_total",
+                       "Load shed by admission control (refused requests, dropped SHAP).",
+                       ["reason"])
+
+# Series resolved once so the hot path only does perf_counter + observe
+T_PARSE     = STAGES.labels("parse")
+T_ENCODE    = STAGES.labels("encode")       # district lookup + feature row
+T_PREDICT   = STAGES.labels("predict")
+T_SHAP      = STAGES.labels("shap")
+T_TOPK      = STAGES.labels("top_k")        # sort + top-8 formatting
+T_SERIALIZE = STAGES.labels("serialize")    # response dict + JSON
+T_NEIGHBOURS = STAGES.labels("neighbours")  # comparables KD-tree query
+T_GRID      = STAGES.labels("grid_lookup")  # /predict/fast lattice read
+T_SURROGATE = STAGES.labels("surrogate")    # tier=fast distilled model
+T_ROLLUP    = STAGES.labels("rollup")       # /stats cube roll-up
+T_DRIFT     = STAGES.labels("drift")        # input-drift sketch update
+
+
+# ── REQUEST HELPERS ────────────────────────────────────────────
+MAX_BATCH_SIZE    = 5000   # properties per /predict/batch call
+MAX_SWEEP_POINTS  = 2500   # grid points per /predict/sweep call
+MAX_SWEEP_EXPLAIN = 10     # sweep points that may ask for SHAP
+MAX_COMPARABLES   = 20     # listings per /comparables call
+MAX_COLUMNAR_ROWS = 500_000   # rows per /predict/columnar call
+TOP_K             = 8      # SHAP features returned per prediction
+
+# Request keys a sweep may vary besides the single-column numeric/flag ones
+SWEEP_MULTI_FIELDS = {"district", "property_type", "location"}
+
+
+def top_explanation(b, shap_vals, k=TOP_K):
+    """Top-k features by absolute SHAP value, formatted for the frontend."""
+    started = time.perf_counter()
+    shap_pairs = sorted(
+        zip(b.features, shap_vals),
+        key=lambda x: abs(x[1]),
+        reverse=True
+    )[:k]
+
+    top = [
+        {
+            "feature":    feat,
+            "shap_value": round(float(val), 4),
+            "direction":  "positive" if val >= 0 else "negative",
+        }
+        for feat, val in shap_pairs
+    ]
+    T_TOPK.observe(time.perf_counter() - started)
+    return top
+
+
+def predict_log(b, X):
+    started = time.perf_counter()
+    log_preds = b.predict_log(X)
+    T_PREDICT.observe(time.perf_counter() - started)
+    return log_preds
+
+
+def shap_values(b, X):
+    started = time.perf_counter()
+    values = b.explainer.shap_values(X)
+    T_SHAP.observe(time.perf_counter() - started)
+    return values
+
+
+# ── EXPLAIN MODES ──────────────────────────────────────────────
+# sync     — top-8 SHAP computed in the request (default)
+# off      — price only
+# deferred — price now, explanation later from /explain/<id>
+EXPLAIN_MODES = {
+    "true": "sync", "1": "sync", "sync": "sync",
+    "false": "off", "0": "off", "off": "off",
+    "deferred": "deferred",
 }
 
-COLOMBO_PREMIUM_AREAS = [
-    "colombo 1", "colombo 2", "colombo 3", "colombo 4",
-    "colombo 5", "colombo 6", "colombo 7", "cinnamon",
-    "kollupitiya", "bambalapitiya", "havelock", "borella",
-    "rajagiriya", "battaramulla", "nawala", "nugegoda",
-    "dehiwala", "mount lavinia",
-]
+explain_jobs = ExplanationJobs(
+    workers=CONFIG["explain_workers"],
+    max_items=CONFIG["explain_store_size"],
+    ttl_s=CONFIG["explain_ttl_s"],
+    max_pending=CONFIG["explain_max_pending"],
+    on_drop=lambda n: SHED.labels("explanation_dropped").inc(n),
+)
+
+
+def resolve_explain(b, raw, under_pressure):
+    """(mode, dropped) for an explain value. Under admission pressure
+    explanations are dropped — mode "off", dropped True."""
+    if b.explainer is None:
+        return "off", False
+    mode = EXPLAIN_MODES.get(str(raw).lower())
+    if mode is None:
+        raise ValueError(f"explain must be one of true, false, deferred (got {raw!r})")
+    if mode != "off" and under_pressure:
+        SHED.labels("explanation_dropped").inc()
+        return "off", True
+    return mode, False
+
+
+def explain_mode(b, body):
+    """Read ?explain= (or an "explain" key in a JSON object body).
+
+    Sets g.explanation_dropped when admission pressure drops SHAP, so
+    the response can say so.
+    """
+    default = body.get("explain", True) if isinstance(body, dict) else True
+    mode, dropped = resolve_explain(b, request.args.get("explain", default),
+                                    admission.enabled and admission.under_pressure)
+    if dropped:
+        g.explanation_dropped = True
+    return mode
+
+
+# ── TIERS ──────────────────────────────────────────────────────
+# full — the bundle's model (+ SHAP per ?explain=)
+# fast — the distilled surrogate (surrogate.py), no explanation; inputs
+#        it can't vouch for fall back to the full model
+TIERS = ("full", "fast")
+
+
+def resolve_tier(raw):
+    tier = str(raw).lower()
+    if tier not in TIERS:
+        raise ValueError(f"tier must be one of {', '.join(TIERS)} (got {raw!r})")
+    return tier
+
+
+def request_tier(body):
+    """Read ?tier= (or a "tier" key in the JSON body)."""
+    default = body.get("tier", "full") if isinstance(body, dict) else "full"
+    return resolve_tier(request.args.get("tier", default))
+
+
+def surrogate_answer(b, X):
+    """(log_pred, fields) from the surrogate for one encoded row, or
+    (None, fields) when the full model has to answer — fields say which."""
+    if b.surrogate is None:
+        reason = "no_surrogate"
+    else:
+        started = time.perf_counter()
+        log_pred, reason = b.surrogate.answer(
+            X[0], CONFIG["surrogate_max_error"] or b.surrogate.max_error)
+        T_SURROGATE.observe(time.perf_counter() - started)
+        if reason is None:
+            TIER_FAST.labels("surrogate").inc()
+            return log_pred, {"tier": "fast", "source": "surrogate"}
+    TIER_FAST.labels(reason).inc()
+    return None, {"tier": "fast", "source": "model", "fallback": reason}
+
+
+def deferred_fields(ids):
+    return [{"explanation_id": i, "explanation_url": f"/explain/{i}"} for i in ids]
+
+
+def explain_rows(b, X, mode):
+    """Explanation fields for every row of X under the given explain mode."""
+    if mode == "off":
+        return [{} for _ in range(len(X))]
+    if mode == "deferred":
+        X = X.copy()   # the single-row buffer is reused by this thread's next request
+        ids = explain_jobs.submit(
+            len(X), lambda: [top_explanation(b, v) for v in shap_values(b, X)]
+        )
+        return deferred_fields(ids)
+    return [{"explanation": top_explanation(b, v)} for v in shap_values(b, X)]
+
+
+def format_prediction(log_pred, summary, explanation):
+    """Build the JSON payload returned for a single property."""
+    predicted_price = float(np.expm1(log_pred))
+    return {
+        "predicted_price_lkr": round(predicted_price),
+        "predicted_price_mn":  round(predicted_price / 1_000_000, 2),
+        **explanation,
+        "input_summary":       summary,
+    }
+
+
+# ── PREDICTION CACHE ───────────────────────────────────────────
+# Keyed on bundle version + encoded float32 row; values are
+# (log_pred, top-8 or None). Cleared whenever a bundle is swapped in.
+cache = PredictionCache(CONFIG["cache_size"], CONFIG["cache_ttl_s"])
+cache.clear()   # model just loaded
+
 
-PROPERTY_TYPE_MAP = {"house": 0, "houses": 0, "apartment": 1, "apartments": 1}
+def score_rows(b, X, want_explanation):
+    """One predict call (plus one SHAP call for the rows that want it)."""
+    log_preds = predict_log(b, X)
+    tops = [None] * len(X)
+    wanted = np.flatnonzero(want_explanation)
+    if len(wanted):
+        for i, vals in zip(wanted, shap_values(b, X[wanted])):
+            tops[i] = top_explanation(b, vals)
+    return list(zip(log_preds, tops))
 
 
-def encode_district(district_name):
-    """Safely encode district — use 'Other' if unseen."""
-    known = list(le.classes_)
-    if district_name in known:
-        return int(le.transform([district_name])[0])
-    # Find closest match
-    for d in known:
-        if d.lower() in district_name.lower():
-            return int(le.transform([d])[0])
-    # Default to most common (Colombo=index of Colombo)
-    return int(le.transform(["Colombo"])[0]) if "Colombo" in known else 0
+def score_batched(X, bundles, want_explanation):
+    """MicroBatcher entry point — rows queued across a reload are scored
+    by the bundle that encoded them."""
+    first = bundles[0]
+    if all(b is first for b in bundles):
+        return score_rows(first, X, want_explanation)
+    results = [None] * len(X)
+    for b in {id(b): b for b in bundles}.values():
+        idx = [i for i, other in enumerate(bundles) if other is b]
+        for i, result in zip(idx, score_rows(b, X[idx], [want_explanation[i] for i in idx])):
+            results[i] = result
+    return results
+
+
+# ── MICRO-BATCHING ─────────────────────────────────────────────
+# Concurrent /predict misses are coalesced into one score_rows() call
+batcher = None
+if CONFIG["batching"]:
+    batcher = MicroBatcher(score_batched, CONFIG["batch_max_size"],
+                           CONFIG["batch_max_wait_ms"] / 1000)
+
+
+def score_one(b, X, want_explanation):
+    """(log_pred, top-8 or None) for one encoded row."""
+    if batcher is not None:
+        return batcher.submit(X[0], b, want_explanation)
+    return score_rows(b, X, [want_explanation])[0]
+
+
+def observe_drift(b, X):
+    """Count encoded request rows into the bundle's drift sketches."""
+    if b.drift is not None:
+        started = time.perf_counter()
+        b.drift.observe(X)
+        T_DRIFT.observe(time.perf_counter() - started)
+
+
+def score_batch(b, items, mode):
+    """(per-item results, rows scored) for a list of property bodies —
+    one encode, one predict and one SHAP call."""
+    started = time.perf_counter()
+    X, summaries, ok_idx, errors = b.encoder.encode_many(items)
+    T_ENCODE.observe(time.perf_counter() - started)
+    observe_drift(b, X)
+    results = [None] * len(items)
+    for i, message in errors:
+        results[i] = {"index": i, "error": message}
+
+    if ok_idx:
+        log_preds    = predict_log(b, X)
+        explanations = explain_rows(b, X, mode)
+        for j, i in enumerate(ok_idx):
+            results[i] = {"index": i,
+                          **format_prediction(log_preds[j], summaries[j], explanations[j])}
+    return results, len(ok_idx)
+
+
+def predict_one_cached(b, X, mode):
+    """(log_pred, explanation fields) for one encoded row, via the cache."""
+    key        = b.version.encode() + X.tobytes()
+    generation = cache.generation
+    cached     = cache.get(key)
+    if cached is not None and (cached[1] is not None or mode != "sync"):
+        log_pred, top = cached
+    else:
+        log_pred, top = score_one(b, X, mode == "sync")
+        cache.put(key, (log_pred, top), generation)
+
+    if mode == "off":
+        return log_pred, {}
+    if top is not None:
+        if mode == "sync":
+            return log_pred, {"explanation": top}
+        return log_pred, deferred_fields(explain_jobs.publish([top]))[0]
+
+    X = X.copy()   # the single-row buffer is reused by this thread's next request
+
+    def compute():
+        top = top_explanation(b, shap_values(b, X)[0])
+        cache.put(key, (log_pred, top), generation)
+        return [top]
+
+    return log_pred, deferred_fields(explain_jobs.submit(1, compute))[0]
+
+
+# ── ADMISSION CONTROL ──────────────────────────────────────────
+admission = AdmissionController(
+    concurrency=CONFIG["admission_concurrency"],
+    max_queue=CONFIG["admission_queue"],
+    queue_timeout_s=CONFIG["admission_queue_timeout_ms"] / 1000,
+    degrade_at=CONFIG["admission_degrade_at"],
+)
+metrics.Gauge("estatevision_admission_requests", "Requests admitted (active) or queued.",
+              ["state"], fn=lambda: {("active",): admission.active,
+                                     ("waiting",): admission.waiting})
+
+
+def overloaded(e):
+    """503 + Retry-After for a request admission control refused."""
+    g.error_type = "overloaded"
+    SHED.labels(e.reason).inc()
+    response = jsonify({"error": str(e)})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(CONFIG["retry_after_s"])
+    return response
+
+
+def admitted(view):
+    """Run the view inside an admission slot; 503 + Retry-After if refused."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not admission.enabled:
+            return view(*args, **kwargs)
+        try:
+            admission.acquire()
+        except Overloaded as e:
+            return overloaded(e)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            admission.release()
+    return wrapper
+
+
+# ── REQUEST LOG ────────────────────────────────────────────────
+request_log = None
+if CONFIG["request_log"]:
+    request_log = RequestLogger(
+        CONFIG["request_log"],
+        max_bytes=int(CONFIG["request_log_max_mb"] * 2**20),
+        backups=CONFIG["request_log_backups"],
+        compress=CONFIG["request_log_compress"],
+        queue_size=CONFIG["request_log_queue"],
+    )
+    metrics.Gauge("estatevision_request_log_records", "Request log records by outcome.",
+                  ["state"], fn=lambda: {(k,): request_log.stats()[k]
+                                         for k in ("written", "dropped", "failed")})
+LOGGED_ENDPOINTS = set(filter(None, CONFIG["request_log_endpoints"].split(",")))
+
+
+def should_log(endpoint, headers):
+    return (request_log is not None and endpoint in LOGGED_ENDPOINTS
+            and REPLAY_HEADER not in headers
+            and random.random() < CONFIG["request_log_sample"])
+
+
+def log_request(endpoint, response, elapsed):
+    """Hand the raw request/response bytes to the log writer thread."""
+    if response.direct_passthrough or not should_log(endpoint, request.headers):
+        return
+    request_log.log(time.time(), os.getpid(), bundle.version, request.method,
+                    request.full_path.rstrip("?"), endpoint, response.status_code, elapsed,
+                    request.get_data(cache=True), response.get_data())
+
+
+# ── WORKER LIFECYCLE ───────────────────────────────────────────
+ready       = threading.Event()
+xgb_threads = None          # set per worker by configure_worker()
+reload_lock = threading.Lock()
+
+
+def warmup(b=None):
+    """Score a representative batch so the first real request pays no
+    one-time costs (explainer build, thread pools, allocator growth)."""
+    b = b or bundle
+    started = time.perf_counter()
+    bodies  = [{"district": d} for d in b.district_classes]
+    bodies  = (bodies * (CONFIG["warmup_rows"] // len(bodies) + 1))[:CONFIG["warmup_rows"]]
+    X, _, _, _ = b.encoder.encode_many(bodies)
+    explain = b.explainer is not None
+    if len(X):
+        score_rows(b, X, [explain] * len(X))
+        score_rows(b, X[:1], [explain])
+    elapsed = round(time.perf_counter() - started, 3)
+    if b is bundle:
+        startup["warmup_s"] = elapsed
+    print(f"✅ Warmup ({b.version}): {len(X)} rows in {elapsed}s")
+    if b.grid is None:
+        print(f"⚠️  Bundle {b.version} has no price grid — /predict/fast scores every call "
+              f"with the model (python price_grid.py build)")
+
+
+def reload_bundle(path=None):
+    """Load, verify and warm a bundle, then swap it in atomically.
+
+    Requests already running keep the bundle they started with; new ones
+    see the new bundle as soon as the reference is replaced.
+    """
+    global bundle
+    with reload_lock:
+        path = path or current_path(CONFIG["bundle_dir"])
+        if path is None:
+            raise BundleError(f"No {CONFIG['bundle_dir']}/CURRENT to reload from")
+        new = ModelBundle.load(path, CONFIG)
+        if xgb_threads:
+            new.set_threads(xgb_threads)
+        warmup(new)
+        old, bundle = bundle, new
+        cache.clear()
+        if market_cube is not None:
+            # Clean rows ingested from now on are encoded by the new bundle
+            market_cube.district_classes = new.district_classes
+    print(f"🔄 Bundle {old.version} → {new.version}")
+    return old, new
+
+
+def _reload_in_background(signum, frame):
+    def run():
+        try:
+            reload_bundle()
+        except Exception as e:
+            print(f"❌ Bundle reload failed: {e}")
+    threading.Thread(target=run, name="bundle-reload", daemon=True).start()
+
+
+def install_reload_signal():
+    """SIGHUP → reload bundles/CURRENT without dropping requests."""
+    signal.signal(signal.SIGHUP, _reload_in_background)
+
+
+def configure_worker(threads):
+    """Per-process setup after fork: thread caps, catch up with CURRENT,
+    warmup, then report ready."""
+    global xgb_threads
+    xgb_threads = threads
+    bundle.set_threads(threads)
+    latest = current_path(CONFIG["bundle_dir"])
+    if latest is not None and os.path.abspath(latest) != os.path.abspath(bundle.path):
+        reload_bundle(latest)    # master preloaded an older bundle
+    else:
+        warmup()
+    ready.set()
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+    IN_FLIGHT.inc()
+
+
+@app.after_request
+def _record_request(response):
+    started = g.get("request_started")
+    if started is None:
+        return response
+    elapsed  = time.perf_counter() - started
+    endpoint = request.endpoint or "unmatched"
+    status   = response.status_code
+    REQUESTS.labels(endpoint, request.method, status).inc()
+    LATENCY.labels(endpoint).observe(elapsed)
+    if status >= 400:
+        ERRORS.labels(endpoint, g.get("error_type") or f"http_{status}").inc()
+    if startup["first_request_ms"] is None and endpoint not in ("liveness", "readiness", "metrics"):
+        startup["first_request_ms"] = round(elapsed * 1000, 2)
+    log_request(endpoint, response, elapsed)
+    return response
+
+
+@app.teardown_request
+def _end_request(exc):
+    if "request_started" in g:
+        IN_FLIGHT.dec()
 
 
 # ── HEALTH CHECK ───────────────────────────────────────────────
 @app.route("/", methods=["GET"])
 def health():
-    return jsonify({
+    return jsonify(service_info())
+
+
+def service_info():
+    """Body of GET / (shared with asgi.py)."""
+    b = bundle
+    return {
         "status": "running",
         "model": "XGBoost Property Price Predictor",
-        "features": len(features),
-        "districts": list(le.classes_),
-    })
+        "bundle": b.summary(),
+        "features": len(b.features),
+        "districts": b.district_classes,
+        "cache": cache.stats(),
+        "batching": batcher.stats() if batcher is not None else None,
+        "admission": admission.stats() if admission.enabled else None,
+        "request_log": request_log.stats() if request_log is not None else None,
+        "startup": startup,
+    }
+
+
+@app.route("/healthz", methods=["GET"])
+def liveness():
+    """Process is up and its background dispatcher (if any) is alive."""
+    if batcher is not None and batcher._thread is not None and not batcher._thread.is_alive():
+        return jsonify({"status": "dead", "reason": "micro-batcher stopped"}), 500
+    return jsonify({"status": "alive", "pid": os.getpid()})
+
+
+@app.route("/readyz", methods=["GET"])
+def readiness():
+    """Model loaded and worker configured — safe to route traffic here."""
+    if not ready.is_set():
+        return jsonify({"status": "starting"}), 503
+    return jsonify({"status": "ready", "pid": os.getpid(),
+                    "bundle": bundle.version, "price_grid": bundle.grid is not None,
+                    "startup": startup})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus scrape target (this process only)."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 # ── PREDICT ENDPOINT ───────────────────────────────────────────
 @app.route("/predict", methods=["POST"])
+@admitted
 def predict():
     try:
+        started = time.perf_counter()
         body = request.get_json()
+        T_PARSE.observe(time.perf_counter() - started)
         if not body:
             return jsonify({"error": "No JSON body provided"}), 400
 
-        # ── Extract inputs ─────────────────────────────────────
-        district      = body.get("district", "Colombo")
-        property_type = body.get("property_type", "house")
-        location      = body.get("location", "").lower()
-
-        # ── Build feature row ──────────────────────────────────
-        district_enc  = encode_district(district)
-        district_tier = DISTRICT_TIERS.get(district, 4)
-        colombo_prem  = int(any(p in location or p in district.lower()
-                                for p in COLOMBO_PREMIUM_AREAS))
-        prop_type_enc = PROPERTY_TYPE_MAP.get(property_type.lower(), 0)
-
-        row = {
-            "bedrooms":         float(body.get("bedrooms", 3)),
-            "bathrooms":        float(body.get("bathrooms", 2)),
-            "land_size_p":      float(body.get("land_size_p", 10)),
-            "floor_area_sqft":  float(body.get("floor_area", 1200)),
-            "storeys":          float(body.get("storeys", 1)),
-            "district_enc":     district_enc,
-            "district_tier":    district_tier,
-            "colombo_premium":  colombo_prem,
-            "property_type_enc":prop_type_enc,
-            "negotiable":       int(body.get("negotiable", 0)),
-            "has_parking":      int(body.get("has_parking", 0)),
-            "has_pool":         int(body.get("has_pool", 0)),
-            "has_garden":       int(body.get("has_garden", 0)),
-            "has_furnished":    int(body.get("has_furnished", 0)),
-            "has_ac":           int(body.get("has_ac", 0)),
-            "has_security":     int(body.get("has_security", 0)),
-            "has_water":        int(body.get("has_water", 0)),
-            "has_highway":      int(body.get("has_highway", 0)),
-            "has_generator":    int(body.get("has_generator", 0)),
-            "has_solar":        int(body.get("has_solar", 0)),
+        b = bundle   # one bundle for the whole request, even across a reload
+        try:
+            tier = request_tier(body)
+            mode = explain_mode(b, body) if tier == "full" else "off"
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Encode straight into this thread's float32 row
+        started = time.perf_counter()
+        X, summary = b.encoder.encode_one(body)
+        T_ENCODE.observe(time.perf_counter() - started)
+        observe_drift(b, X)
+
+        # ── Surrogate (tier=fast), else predict + SHAP (cached) ─
+        log_pred, tier_fields = None, {}
+        if tier == "fast":
+            log_pred, tier_fields = surrogate_answer(b, X)
+        if log_pred is None:
+            log_pred, explanation = predict_one_cached(b, X, mode)
+        else:
+            explanation = {}
+
+        started  = time.perf_counter()
+        payload  = format_prediction(log_pred, summary, explanation)
+        payload.update(tier_fields)
+        if g.get("explanation_dropped"):
+            payload["explanation_dropped"] = True
+        response = jsonify(payload)
+        T_SERIALIZE.observe(time.perf_counter() - started)
+        return response
+
+    except Exception as e:
+        g.error_type = type(e).__name__
+        return jsonify({"error": str(e)}), 500
+
+
+# ── FAST PREDICT ENDPOINT ──────────────────────────────────────
+@app.route("/predict/fast", methods=["POST"])
+def predict_fast():
+    """Price from the bundle's precomputed lattice, for live slider updates.
+
+    Same body as /predict, no explanation. Inputs the lattice does not
+    cover (or a bundle without one) fall back to the model inside an
+    admission slot, like /predict; "source" says which answered.
+    """
+    try:
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return jsonify({"error": "Expected a JSON object"}), 400
+        b = bundle
+
+        try:
+            log_pred = None
+            if b.grid is not None:
+                started  = time.perf_counter()
+                log_pred = b.grid.lookup(body)
+                T_GRID.observe(time.perf_counter() - started)
+            source = "grid"
+            if log_pred is None:
+                source = "model"
+                X, _ = b.encoder.encode_one(body)
+        except (TypeError, ValueError, AttributeError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        if log_pred is None:
+            # Lattice lookups are microseconds; only model fallbacks queue
+            if admission.enabled:
+                try:
+                    admission.acquire()
+                except Overloaded as e:
+                    return overloaded(e)
+            try:
+                log_pred, _ = predict_one_cached(b, X, "off")
+            finally:
+                if admission.enabled:
+                    admission.release()
+        FAST.labels(source).inc()
+
+        price = float(np.expm1(np.float32(log_pred)))
+        return jsonify({
+            "predicted_price_lkr": round(price),
+            "predicted_price_mn":  round(price / 1_000_000, 2),
+            "source":              source,
+        })
+
+    except Exception as e:
+        g.error_type = type(e).__name__
+        return jsonify({"error": str(e)}), 500
+
+
+# ── BATCH PREDICT ENDPOINT ─────────────────────────────────────
+@app.route("/predict/batch", methods=["POST"])
+@admitted
+def predict_batch():
+    """Score many properties with one model call and one SHAP call.
+
+    Accepts either a JSON array of property objects or
+    {"properties": [...]}. Results come back in input order; items that
+    fail validation get an "error" entry instead of a price. ?explain=
+    works as for /predict; deferred gives every item its own ID.
+    """
+    try:
+        started = time.perf_counter()
+        body  = request.get_json(silent=True)
+        T_PARSE.observe(time.perf_counter() - started)
+        items = body.get("properties") if isinstance(body, dict) else body
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "Expected a non-empty list of properties"}), 400
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE})"}), 413
+        b = bundle
+        try:
+            mode = explain_mode(b, body)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        results, succeeded = score_batch(b, items, mode)
+
+        started = time.perf_counter()
+        response = jsonify({
+            "count":     len(items),
+            "succeeded": succeeded,
+            "failed":    len(items) - succeeded,
+            "explanation_dropped": bool(g.get("explanation_dropped")),
+            "results":   results,
+        })
+        T_SERIALIZE.observe(time.perf_counter() - started)
+        return response
+
+    except Exception as e:
+        g.error_type = type(e).__name__
+        return jsonify({"error": str(e)}), 500
+
+
+# ── WHAT-IF SWEEP ENDPOINT ─────────────────────────────────────
+def sweep_axes(b, vary):
+    """[(request key, values)] from the "vary" spec of a sweep request."""
+    if isinstance(vary, dict):
+        vary = [vary]
+    if not isinstance(vary, list) or len(vary) not in (1, 2):
+        raise ValueError("vary must give one or two features")
+    axes = []
+    for axis in vary:
+        if not isinstance(axis, dict):
+            raise ValueError("Each vary entry must be a JSON object")
+        field = axis.get("field")
+        if field not in b.encoder.column_fields and field not in SWEEP_MULTI_FIELDS:
+            raise ValueError(f"Cannot sweep {field!r}")
+        if field in (key for key, _ in axes):
+            raise ValueError(f"{field!r} is swept twice")
+        if "values" in axis:
+            values = axis["values"]
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"values for {field!r} must be a non-empty list")
+        elif field in b.encoder.column_fields and "start" in axis and "stop" in axis:
+            steps  = int(axis.get("steps", 50))
+            if not 1 <= steps <= MAX_SWEEP_POINTS:
+                raise ValueError(f"steps must be between 1 and {MAX_SWEEP_POINTS}")
+            values = np.linspace(float(axis["start"]), float(axis["stop"]), steps).tolist()
+        else:
+            raise ValueError(f"Give values, or start/stop/steps, for {field!r}")
+        axes.append((field, values))
+    if int(np.prod([len(v) for _, v in axes])) > MAX_SWEEP_POINTS:
+        raise ValueError(f"Sweep too large (max {MAX_SWEEP_POINTS} points)")
+    return axes
+
+
+def sweep_points(points, shape):
+    """Flat row indices for explain_at points (ints for 1-D, [i, j] for 2-D)."""
+    if not isinstance(points, list) or len(points) > MAX_SWEEP_EXPLAIN:
+        raise ValueError(f"explain_at must be a list of at most {MAX_SWEEP_EXPLAIN} points")
+    coords = [[p] if isinstance(p, int) else p for p in points]
+    if any(not isinstance(c, list) or len(c) != len(shape) for c in coords):
+        raise ValueError(f"explain_at points need {len(shape)} index(es) each")
+    try:
+        flat = np.ravel_multi_index(np.array(coords, dtype=np.intp).T, shape) if coords else []
+    except ValueError:
+        raise ValueError("explain_at point outside the sweep grid")
+    return coords, list(flat)
+
+
+@app.route("/predict/sweep", methods=["POST"])
+@admitted
+def predict_sweep():
+    """Price curve (one feature) or surface (two) around a base property.
+
+    Body: {"property": {...}, "vary": [{"field": "land_size_p",
+    "start": 5, "stop": 50, "steps": 50} | {"field": "district",
+    "values": [...]}], "explain_at": [3, ...]}. The whole grid is encoded
+    into one matrix and scored with one model call; SHAP is computed only
+    for the explain_at points.
+    """
+    try:
+        started = time.perf_counter()
+        body = request.get_json(silent=True)
+        T_PARSE.observe(time.perf_counter() - started)
+        if not isinstance(body, dict):
+            return jsonify({"error": "Expected a JSON object"}), 400
+
+        b = bundle
+        try:
+            axes  = sweep_axes(b, body.get("vary"))
+            shape = [len(values) for _, values in axes]
+            coords, flat = sweep_points(body.get("explain_at", []), shape)
+
+            started = time.perf_counter()
+            X, summary = b.encoder.encode_grid(body.get("property", {}), axes)
+            T_ENCODE.observe(time.perf_counter() - started)
+        except (TypeError, ValueError, AttributeError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        # ── One predict call for the whole grid ───────────────
+        prices = np.expm1(predict_log(b, X)).astype(np.float64)   # same rounding as /predict
+
+        dropped = bool(flat) and (b.explainer is None
+                                  or (admission.enabled and admission.under_pressure))
+        explanations = []
+        if flat and not dropped:
+            explanations = [{"point": c, "explanation": top_explanation(b, v)}
+                            for c, v in zip(coords, shap_values(b, X[flat]))]
+        elif dropped:
+            SHED.labels("explanation_dropped").inc()
+
+        started  = time.perf_counter()
+        surface  = prices.reshape(shape)
+        response = jsonify({
+            "axes":                [{"field": key, "values": values} for key, values in axes],
+            "shape":               shape,
+            "predicted_price_lkr": np.round(surface).astype(np.int64).tolist(),
+            "predicted_price_mn":  np.round(surface / 1_000_000, 2).tolist(),
+            "explanations":        explanations,
+            "explanation_dropped": dropped,
+            "input_summary":       summary,
+        })
+        T_SERIALIZE.observe(time.perf_counter() - started)
+        return response
+
+    except Exception as e:
+        g.error_type = type(e).__name__
+        return jsonify({"error": str(e)}), 500
+
+
+# ── COLUMNAR BULK ENDPOINT ─────────────────────────────────────
+@app.route("/predict/columnar", methods=["POST"])
+@admitted
+def predict_columnar():
+    """Bulk scoring with Arrow IPC or msgpack columns instead of JSON objects.
+
+    Request columns are named like /predict fields (district, bedrooms,
+    floor_area, has_pool, ...); missing ones take the /predict defaults.
+    The response, in the request's format, has predicted_price_lkr and
+    predicted_price_mn columns, plus one shap_<feature> column per model
+    feature with ?explain=true (expected_value is in the metadata).
+    """
+    fmt = media_format(request.content_type)
+    if fmt is None:
+        return jsonify({"error": "Send Content-Type application/vnd.apache.arrow.stream "
+                                 "or application/msgpack"}), 415
+    try:
+        b = bundle
+        started = time.perf_counter()
+        try:
+            n, columns = READERS[fmt](request.get_data(cache=False),
+                                      b.encoder.column_fields)
+        except CodecUnavailable as e:
+            return jsonify({"error": str(e)}), 415
+        T_PARSE.observe(time.perf_counter() - started)
+        if not 0 < n <= MAX_COLUMNAR_ROWS:
+            return jsonify({"error": f"Expected 1 to {MAX_COLUMNAR_ROWS} rows"}), 413 if n else 400
+        explain = str(request.args.get("explain", "false")).lower() in ("true", "1")
+
+        started = time.perf_counter()
+        X = b.encoder.encode_columns(n, columns)
+        T_ENCODE.observe(time.perf_counter() - started)
+        observe_drift(b, X)
+
+        log_preds = predict_log(b, X)
+        prices    = np.expm1(log_preds).astype(np.float64)   # same rounding as /predict
+        out = {
+            "predicted_price_lkr": np.round(prices).astype(np.int64),
+            "predicted_price_mn":  np.round(prices / 1_000_000, 2),
         }
+        metadata = {"bundle_version": b.version, "rows": n}
+        dropped  = explain and (b.explainer is None
+                                or (admission.enabled and admission.under_pressure))
+        if explain and not dropped:
+            contribs = shap_values(b, X)
+            for j, feature in enumerate(b.features):
+                out[f"shap_{feature}"] = np.ascontiguousarray(contribs[:, j], dtype=np.float32)
+            metadata["expected_value"] = float(b.explainer.expected_value)
+        elif dropped:
+            SHED.labels("explanation_dropped").inc()
+            metadata["explanation_dropped"] = True
 
-        # Build DataFrame in correct feature order
-        X = pd.DataFrame([row])[features]
+        started = time.perf_counter()
+        writer, content_type = WRITERS[fmt]
+        response = Response(writer(out, metadata), content_type=content_type)
+        T_SERIALIZE.observe(time.perf_counter() - started)
+        return response
+
+    except (TypeError, ValueError, KeyError) as e:
+        g.error_type = "bad_payload"
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        g.error_type = type(e).__name__
+        return jsonify({"error": str(e)}), 500
 
-        # ── Predict ────────────────────────────────────────────
-        log_pred        = model.predict(X)[0]
-        predicted_price = float(np.expm1(log_pred))
 
-        # ── SHAP explanation ───────────────────────────────────
-        shap_vals = explainer.shap_values(X)[0]
+# ── COMPARABLES ENDPOINT ───────────────────────────────────────
+listings_feed = ListingsFeed(CONFIG["listings_file"], CONFIG["listings_refresh_s"])
 
-        # Top 8 features by absolute SHAP value
-        shap_pairs = sorted(
-            zip(features, shap_vals),
-            key=lambda x: abs(x[1]),
-            reverse=True
-        )[:8]
 
-        explanation = [
-            {
-                "feature":    feat,
-                "shap_value": round(float(val), 4),
-                "direction":  "positive" if val >= 0 else "negative",
-            }
-            for feat, val in shap_pairs
-        ]
+@app.route("/comparables", methods=["POST"])
+def comparables():
+    """The k most similar real listings (same resolved district and property type).
+
+    Body: the same property object /predict takes, plus optional "k"
+    (default 5). Nearest first; distance is in standardised feature units.
+    """
+    try:
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return jsonify({"error": "Expected a JSON object"}), 400
+        b = bundle
+        if b.comparables is None:
+            return jsonify({"error": "No listings loaded for comparables"}), 503
+        listings_feed.poll(b.comparables)
+
+        try:
+            k = int(body.get("k", 5))
+            if not 1 <= k <= MAX_COMPARABLES:
+                raise ValueError(f"k must be between 1 and {MAX_COMPARABLES}")
+            started = time.perf_counter()
+            candidates, matches = b.comparables.query(body, k)
+            T_NEIGHBOURS.observe(time.perf_counter() - started)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
 
         return jsonify({
-            "predicted_price_lkr": round(predicted_price),
-            "predicted_price_mn":  round(predicted_price / 1_000_000, 2),
-            "explanation":         explanation,
-            "input_summary": {
-                "district":      district,
-                "property_type": property_type,
-                "bedrooms":      row["bedrooms"],
-                "bathrooms":     row["bathrooms"],
-                "land_size_p":   row["land_size_p"],
-                "floor_area":    row["floor_area_sqft"],
-            }
+            "district":      b.encoder.resolve_district(body.get("district", "Colombo")),
+            "property_type": body.get("property_type", "house"),
+            "candidates":    candidates,
+            "comparables":   matches,
         })
 
     except Exception as e:
+        g.error_type = type(e).__name__
         return jsonify({"error": str(e)}), 500
 
 
+# ── MARKET STATS ENDPOINT ──────────────────────────────────────
+def load_market_cube():
+    """The saved cube (python market_cube.py build), else one built from the clean CSV."""
+    cube = None
+    if os.path.exists(CONFIG["market_cube_file"]):
+        cube = MarketCube.load(CONFIG["market_cube_file"])
+    elif os.path.exists(CONFIG["clean_file"]):
+        cube = MarketCube()
+    if cube is not None:
+        cube.district_classes = bundle.district_classes   # for clean files without names;
+                                                          # reload_bundle keeps it current
+        if os.path.exists(CONFIG["clean_file"]):
+            cube.ingest(CONFIG["clean_file"])
+    return cube
+
+
+market_cube = load_market_cube()
+stats_feed  = ListingsFeed(CONFIG["clean_file"], CONFIG["stats_refresh_s"], label="Stats")
+
+
+@app.route("/stats", methods=["GET"])
+@admitted
+def market_stats():
+    """Price, price-per-perch and price-per-sqft statistics over cleaned listings.
+
+    Query args: any of district, property_type, district_tier, bedrooms
+    as filters (comma lists; "3-5" ranges for the numeric ones),
+    group_by=<dimension,...> and q=<quantile,...>. Dimensions neither
+    filtered nor grouped are rolled up.
+    """
+    try:
+        if market_cube is None:
+            return jsonify({"error": "No market statistics loaded"}), 503
+        stats_feed.poll(market_cube)
+
+        try:
+            filters  = parse_filters(request.args)
+            group_by = [d.strip() for d in request.args.get("group_by", "").split(",") if d.strip()]
+            unknown  = [d for d in group_by if d not in DIMENSIONS]
+            if unknown:
+                raise ValueError(f"group_by must be among {DIMENSIONS} (got {unknown})")
+            q = request.args.get("q")
+            quantiles = [float(v) for v in q.split(",")] if q else QUANTILES
+            if not all(0 <= v <= 1 for v in quantiles):
+                raise ValueError("q must be quantiles between 0 and 1")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        started = time.perf_counter()
+        groups  = market_cube.query(filters, group_by, quantiles)
+        T_ROLLUP.observe(time.perf_counter() - started)
+        return jsonify({
+            "filters":  describe_filters(filters),
+            "group_by": group_by,
+            "groups":   groups,
+            "source":   market_cube.stats(),
+        })
+
+    except Exception as e:
+        g.error_type = type(e).__name__
+        return jsonify({"error": str(e)}), 500
+
+
+# ── DRIFT ENDPOINT ─────────────────────────────────────────────
+@app.route("/drift", methods=["GET"])
+def drift():
+    """Live input distribution vs training, per feature (this process only).
+
+    PSI and binned KS over the current + previous window, out-of-range
+    counts, and values the encoder silently mapped to a default.
+    """
+    b = bundle
+    unseen = b.encoder.unseen.snapshot()
+    if b.drift is None:
+        return jsonify({"error": "Bundle has no drift reference (python drift.py build)",
+                        "unseen": unseen}), 404
+    return jsonify({"bundle": b.version, "pid": os.getpid(), **b.drift.report(unseen)})
+
+
+# ── DEFERRED EXPLANATION ENDPOINT ──────────────────────────────
+@app.route("/explain/global", methods=["GET"])
+def global_explanation():
+    """Model-wide SHAP summary packed into the bundle at training time.
+
+    Feature importance, dependence curves and per-district contributions,
+    returned as the stored JSON bytes. ETag is the bundle version.
+    """
+    b = bundle
+    if b.global_explanation is None:
+        return jsonify({"error": "Bundle has no global explanation "
+                                 "(python global_explain.py build)"}), 404
+    response = Response(b.global_explanation, content_type="application/json")
+    response.set_etag(b.version)
+    return response.make_conditional(request)
+
+
+@app.route("/explain/<explanation_id>", methods=["GET"])
+def get_explanation(explanation_id):
+    """Fetch a deferred explanation: 200 when ready, 202 while pending,
+    503 if it was dropped because the explanation queue was full."""
+    found = explain_jobs.store.get(explanation_id)
+    if found is None:
+        return jsonify({"error": "Unknown or expired explanation id"}), 404
+
+    status, payload = found
+    if status == PENDING:
+        return jsonify({"id": explanation_id, "status": status}), 202
+    if status == DROPPED:
+        return jsonify({"id": explanation_id, "status": status, "error": payload}), 503
+    if status == DONE:
+        return jsonify({"id": explanation_id, "status": status, "explanation": payload})
+    return jsonify({"id": explanation_id, "status": status, "error": payload}), 500
+
+
+# ── ADMIN: BUNDLE RELOAD ───────────────────────────────────────
+def _admin_allowed():
+    token = CONFIG["admin_token"]
+    if token:
+        return request.headers.get("X-Admin-Token") == token
+    return request.remote_addr in ("127.0.0.1", "::1")
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """Swap in bundles/CURRENT (or {"version": "..."}) in this process."""
+    if not _admin_allowed():
+        return jsonify({"error": "Forbidden"}), 403
+    body    = request.get_json(silent=True) or {}
+    version = body.get("version")
+    path    = None
+    if version is not None:
+        if not isinstance(version, str) or os.sep in version or version.startswith("."):
+            return jsonify({"error": "Invalid bundle version"}), 400
+        path = os.path.join(CONFIG["bundle_dir"], version)
+    try:
+        old, new = reload_bundle(path)
+    except (BundleError, OSError) as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"status": "reloaded", "pid": os.getpid(),
+                    "previous": old.version, "current": new.version})
+
+
 if __name__ == "__main__":
+    warmup()
+    install_reload_signal()
+    ready.set()
     print("\n🚀 EstateVision API running on http://localhost:5000")
     print("   Test it: http://localhost:5000/")
     print("   Press Ctrl+C to stop\n")
@@ -0,0 +1,301 @@
+"""
+asgi.py  —  EstateVision ASGI server (event loop + model thread pool)
+======================================================================
+The same /, /predict and /predict/batch contracts as app.py, served from
+an event loop: requests are read and parsed on the loop, model and SHAP
+calls run on a bounded pool of model_threads threads (one per core by
+default, XGBoost single-threaded in each). XGBoost releases the GIL
+while predicting, so one process keeps every core busy, and idle
+keep-alive connections cost a socket rather than a thread.
+
+Run with:  python asgi.py                    (uvicorn, EV_BIND / EV_ASGI_WORKERS)
+           uvicorn asgi:app --port 5000      (any ASGI server)
+Endpoints: GET  /            POST /predict[?explain=true|false|deferred][&tier=fast]
+           GET  /healthz     POST /predict/batch
+           GET  /readyz      GET  /explain/<id>
+           GET  /metrics
+
+Needs starlette and uvicorn (pip install starlette uvicorn). Model state,
+cache, micro-batcher, drift sketches, metrics and request log are
+app.py's — imported, not duplicated — so both servers behave alike.
+Admission control is the async variant: queued requests wait as
+futures on the loop, then run on the pool. Everything else (sweeps,
+columnar, comparables, /stats, admin reload over HTTP) stays on the
+Flask app; SIGHUP to a worker still hot-swaps bundles/CURRENT.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import app as core
+import metrics
+from admission import AsyncAdmissionController, Overloaded
+from config import CONFIG
+
+pool = ThreadPoolExecutor(max_workers=CONFIG["model_threads"], thread_name_prefix="model")
+
+# Admitted requests never outnumber pool threads, so none queue inside
+# the executor where the timeout and 503s can't reach them
+admission = AsyncAdmissionController(
+    concurrency=CONFIG["model_threads"] if CONFIG["admission_concurrency"] > 0 else 0,
+    max_queue=CONFIG["admission_queue"],
+    queue_timeout_s=CONFIG["admission_queue_timeout_ms"] / 1000,
+    degrade_at=CONFIG["admission_degrade_at"],
+)
+core.admission = admission   # what / and the admission gauge report
+
+
+def run(fn, *args):
+    """Await fn(*args) on the model pool."""
+    return asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+def error(message, status):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+class JSONBytes(Response):
+    """Body already serialised (off the loop, for large payloads)."""
+    media_type = "application/json"
+
+
+def to_json(payload):
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+# ── REQUEST HOOKS ──────────────────────────────────────────────
+def endpoint(name):
+    """Metrics, request log and the catch-all 500 around a handler —
+    app.py's before/after_request hooks."""
+    def wrap(handler):
+        async def view(request):
+            started = time.perf_counter()
+            core.IN_FLIGHT.inc()
+            error_type = None
+            try:
+                response = await handler(request)
+            except Overloaded as e:
+                core.SHED.labels(e.reason).inc()
+                error_type = "overloaded"
+                response = error(str(e), 503)
+                response.headers["Retry-After"] = str(CONFIG["retry_after_s"])
+            except Exception as e:
+                error_type = type(e).__name__
+                response = error(str(e), 500)
+            finally:
+                core.IN_FLIGHT.dec()
+            elapsed = time.perf_counter() - started
+            status  = response.status_code
+            core.REQUESTS.labels(name, request.method, status).inc()
+            core.LATENCY.labels(name).observe(elapsed)
+            if status >= 400:
+                core.ERRORS.labels(name, error_type or f"http_{status}").inc()
+            if core.startup["first_request_ms"] is None and name not in ("liveness", "readiness", "metrics"):
+                core.startup["first_request_ms"] = round(elapsed * 1000, 2)
+            if core.should_log(name, request.headers):
+                path = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+                core.request_log.log(time.time(), os.getpid(), core.bundle.version, request.method,
+                                     path, name, status, elapsed, await request.body(), response.body)
+            return response
+        return view
+    return wrap
+
+
+@contextlib.asynccontextmanager
+async def slot():
+    """An admission slot for the duration of a model call."""
+    if not admission.enabled:
+        yield
+        return
+    await admission.acquire()
+    try:
+        yield
+    finally:
+        admission.release()
+
+
+async def read_json(request):
+    """Parsed body, or None if it is empty or not JSON."""
+    started = time.perf_counter()
+    raw = await request.body()
+    try:
+        body = json.loads(raw) if raw else None
+    except ValueError:
+        body = None
+    core.T_PARSE.observe(time.perf_counter() - started)
+    return body
+
+
+def explain_mode(request, b, body):
+    """(mode, dropped) from ?explain= or the body's "explain" key."""
+    default = body.get("explain", True) if isinstance(body, dict) else True
+    return core.resolve_explain(b, request.query_params.get("explain", default),
+                                admission.enabled and admission.under_pressure)
+
+
+# ── HEALTH ─────────────────────────────────────────────────────
+@endpoint("health")
+async def health(request):
+    return JSONResponse({**core.service_info(), "server": "asgi",
+                         "model_threads": CONFIG["model_threads"]})
+
+
+@endpoint("liveness")
+async def liveness(request):
+    batcher = core.batcher
+    if batcher is not None and batcher._thread is not None and not batcher._thread.is_alive():
+        return JSONResponse({"status": "dead", "reason": "micro-batcher stopped"}, status_code=500)
+    return JSONResponse({"status": "alive", "pid": os.getpid()})
+
+
+@endpoint("readiness")
+async def readiness(request):
+    if not core.ready.is_set():
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return JSONResponse({"status": "ready", "pid": os.getpid(),
+                         "bundle": core.bundle.version,
+                         "price_grid": core.bundle.grid is not None, "startup": core.startup})
+
+
+@endpoint("metrics")
+async def metrics_endpoint(request):
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# ── PREDICT ────────────────────────────────────────────────────
+@endpoint("predict")
+async def predict(request):
+    body = await read_json(request)
+    if not body:
+        return error("No JSON body provided", 400)
+    b = core.bundle   # one bundle for the whole request, even across a reload
+    try:
+        tier = core.resolve_tier(request.query_params.get(
+            "tier", body.get("tier", "full") if isinstance(body, dict) else "full"))
+        mode, dropped = explain_mode(request, b, body) if tier == "full" else ("off", False)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    # Encoding is microseconds: done on the loop, copied out of its
+    # per-thread row before another request on the loop reuses it
+    started = time.perf_counter()
+    X, summary = b.encoder.encode_one(body)
+    X = X.copy()
+    core.T_ENCODE.observe(time.perf_counter() - started)
+    core.observe_drift(b, X)
+
+    # The surrogate is microseconds too, so tier=fast answers on the loop;
+    # only a fallback takes a pool thread (and an admission slot)
+    log_pred, tier_fields, explanation = None, {}, {}
+    if tier == "fast":
+        log_pred, tier_fields = core.surrogate_answer(b, X)
+    if log_pred is None:
+        async with slot():
+            log_pred, explanation = await run(core.predict_one_cached, b, X, mode)
+
+    started = time.perf_counter()
+    payload = core.format_prediction(log_pred, summary, explanation)
+    payload.update(tier_fields)
+    if dropped:
+        payload["explanation_dropped"] = True
+    response = JSONResponse(payload)
+    core.T_SERIALIZE.observe(time.perf_counter() - started)
+    return response
+
+
+@endpoint("predict_batch")
+async def predict_batch(request):
+    body  = await read_json(request)
+    items = body.get("properties") if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        return error("Expected a non-empty list of properties", 400)
+    if len(items) > core.MAX_BATCH_SIZE:
+        return error(f"Batch too large (max {core.MAX_BATCH_SIZE})", 413)
+    b = core.bundle
+    try:
+        mode, dropped = explain_mode(request, b, body)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    def score():
+        results, succeeded = core.score_batch(b, items, mode)
+        started = time.perf_counter()
+        data = to_json({
+            "count":     len(items),
+            "succeeded": succeeded,
+            "failed":    len(items) - succeeded,
+            "explanation_dropped": dropped,
+            "results":   results,
+        })
+        core.T_SERIALIZE.observe(time.perf_counter() - started)
+        return data
+
+    async with slot():
+        return JSONBytes(await run(score))
+
+
+# ── DEFERRED EXPLANATIONS ──────────────────────────────────────
+@endpoint("get_explanation")
+async def get_explanation(request):
+    explanation_id = request.path_params["explanation_id"]
+    found = core.explain_jobs.store.get(explanation_id)
+    if found is None:
+        return error("Unknown or expired explanation id", 404)
+    status, payload = found
+    if status == core.PENDING:
+        return JSONResponse({"id": explanation_id, "status": status}, status_code=202)
+    if status == core.DROPPED:
+        return JSONResponse({"id": explanation_id, "status": status, "error": payload},
+                            status_code=503)
+    if status == core.DONE:
+        return JSONResponse({"id": explanation_id, "status": status, "explanation": payload})
+    return JSONResponse({"id": explanation_id, "status": status, "error": payload}, status_code=500)
+
+
+# ── APP ────────────────────────────────────────────────────────
+@contextlib.asynccontextmanager
+async def lifespan(_):
+    # Pool threads each run XGBoost single-threaded unless EV_XGB_THREADS says otherwise
+    await run(core.configure_worker, CONFIG["xgb_threads"] or 1)
+    # signal.signal only works on the main thread; a lifespan run elsewhere
+    # (embedded servers, test clients) starts without the SIGHUP handler
+    if threading.current_thread() is threading.main_thread():
+        core.install_reload_signal()
+    yield
+    if core.request_log is not None:
+        core.request_log.close()
+    pool.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route("/", health, methods=["GET"]),
+        Route("/healthz", liveness, methods=["GET"]),
+        Route("/readyz", readiness, methods=["GET"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        Route("/predict", predict, methods=["POST"]),
+        Route("/predict/batch", predict_batch, methods=["POST"]),
+        Route("/explain/{explanation_id}", get_explanation, methods=["GET"]),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"],
+                           allow_headers=["*"])],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    host, port = CONFIG["bind"].rsplit(":", 1)
+    uvicorn.run("asgi:app", host=host, port=int(port), workers=CONFIG["asgi_workers"],
+                timeout_keep_alive=CONFIG["asgi_keepalive_s"], backlog=4096, access_log=False)
@@ -0,0 +1,96 @@
+"""
+batcher.py  —  Dynamic micro-batching for concurrent /predict calls
+====================================================================
+Concurrent single-property requests are queued and scored together:
+the dispatcher takes the first waiting row, keeps collecting until
+max_batch rows or max_wait_s has passed, makes one batched model call
+and hands each result back to its waiting request thread.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Upper bounds of the batch-size histogram buckets
+SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class MicroBatcher:
+    """Coalesces single-row calls into batched calls of fn(X, *columns).
+
+    fn receives the stacked rows plus one list per extra submit() argument
+    and must return one result per row. The dispatcher thread is started
+    on first use, so a batcher created before a fork works in the child.
+    """
+
+    def __init__(self, fn, max_batch, max_wait_s):
+        self.fn         = fn
+        self.max_batch  = max_batch
+        self.max_wait_s = max_wait_s
+        self.batches = self.items = 0
+        self.size_counts = {b: 0 for b in SIZE_BUCKETS + [float("inf")]}
+        self._queue  = queue.SimpleQueue()
+        self._thread = None
+        self._lock   = threading.Lock()
+
+    def submit(self, row, *args):
+        """Queue one feature row and block until its result is ready."""
+        if self._thread is None:
+            self._start()
+        future = Future()
+        self._queue.put((row, args, future))
+        return future.result()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True,
+                                                name="micro-batcher")
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_s
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    items.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run(items)
+
+    def _run(self, items):
+        X = np.stack([row for row, _, _ in items])
+        columns = [list(col) for col in zip(*(args for _, args, _ in items))]
+        try:
+            results = self.fn(X, *columns)
+        except Exception as e:
+            for _, _, future in items:
+                future.set_exception(e)
+            return
+        for (_, _, future), result in zip(items, results):
+            future.set_result(result)
+        self._record(len(items))
+
+    def _record(self, n):
+        self.batches += 1
+        self.items   += n
+        for bound in self.size_counts:
+            if n <= bound:
+                self.size_counts[bound] += 1
+                break
+
+    def stats(self):
+        return {
+            "max_batch":     self.max_batch,
+            "max_wait_ms":   self.max_wait_s * 1000,
+            "batches":       self.batches,
+            "items":         self.items,
+            "mean_size":     round(self.items / self.batches, 2) if self.batches else 0.0,
+            "size_histogram": {f"le_{b}": c for b, c in self.size_counts.items()},
+        }
@@ -0,0 +1,164 @@
+"""
+bench_asgi.py  —  Flask (gunicorn) vs ASGI (uvicorn) serving, one process each
+==============================================================================
+Run with:  python bench_asgi.py   (from the api/ folder; needs gunicorn, uvicorn, starlette)
+
+Starts one gunicorn worker (app.py) and one uvicorn worker (asgi.py), and
+against each:
+
+  1. sends the same /predict and /predict/batch bodies and compares the
+     JSON answers — fails on any difference
+  2. opens IDLE keep-alive connections that each make one request and
+     then sit idle, as browser tabs do
+  3. runs CLIENTS closed-loop clients of explain=true cache misses for
+     RUN_SECONDS with those connections still open, and reports
+     throughput and latency; then checks every idle connection still
+     gets an answer — fails if any does not on the ASGI server
+
+Throughput gains need several cores (model calls run in parallel on
+the pool); on one core expect the two to be close.
+"""
+
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+PORT           = 5098
+IDLE           = 500
+CLIENTS        = 16
+RUN_SECONDS    = 8
+CLIENT_TIMEOUT = 30
+
+SERVERS = {
+    "flask/gunicorn": ["gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{PORT}", "app:app"],
+    "asgi/uvicorn":   ["python", "asgi.py"],
+}
+ENV = {"EV_WORKERS": "1", "EV_ASGI_WORKERS": "1", "EV_BIND": f"127.0.0.1:{PORT}",
+       "EV_CACHE_SIZE": "0", "EV_REQUEST_LOG": "", "EV_ADMISSION_QUEUE": "64"}
+
+PARITY_CASES = [
+    ("/predict", {"district": "Kandy", "bedrooms": 4, "land_size_p": 12}),
+    ("/predict?explain=false", {"district": "Colombo 7", "property_type": "house"}),
+    ("/predict", {"district": "Atlantis", "floor_area": 2400}),
+    ("/predict?explain=bogus", {"district": "Kandy"}),
+    ("/predict", {}),
+    ("/predict/batch", {"properties": [{"district": "Galle"}, {"district": "Kandy", "bedrooms": "x"},
+                                       {"district": "Matara", "land_size_p": 20}]}),
+    ("/predict/batch?explain=false", [{"district": "Gampaha", "bathrooms": 3}]),
+    ("/predict/batch", {"properties": []}),
+]
+
+
+def start_server(cmd):
+    proc = subprocess.Popen(cmd, env={**os.environ, **ENV},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            conn = connect()
+            if call(conn, "GET", "/readyz")[0] == 200:
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.25)
+    proc.kill()
+    sys.exit("❌ Server did not become ready")
+
+
+def connect():
+    return http.client.HTTPConnection("127.0.0.1", PORT, timeout=CLIENT_TIMEOUT)
+
+
+def call(conn, method, path, body=None):
+    """(status, seconds, parsed JSON or None) on a kept-alive connection."""
+    started = time.perf_counter()
+    conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                 headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    data = response.read()
+    elapsed = time.perf_counter() - started
+    try:
+        return response.status, elapsed, json.loads(data)
+    except ValueError:
+        return response.status, elapsed, None
+
+
+def random_property():
+    return {"district": random.choice(["Colombo", "Kandy", "Galle", "Gampaha"]),
+            "bedrooms": random.randint(1, 6),
+            "floor_area": random.randint(600, 6000)}
+
+
+def load(seconds):
+    """Closed-loop clients on their own keep-alive connections."""
+    results, stop = [], time.monotonic() + seconds
+
+    def client():
+        conn = connect()
+        while time.monotonic() < stop:
+            try:
+                status, elapsed, _ = call(conn, "POST", "/predict?explain=true", random_property())
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn, status, elapsed = connect(), "error", None
+            results.append((status, elapsed))
+    threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def idle_still_served(conns):
+    served = 0
+    for conn in conns:
+        try:
+            served += call(conn, "GET", "/healthz")[0] == 200
+        except (OSError, http.client.HTTPException):
+            pass
+        conn.close()
+    return served
+
+
+answers, summary = {}, {}
+print(f"   {'server':<16} {'req/s':>8} {'p50':>9} {'p99':>9} {'errors':>7} {'idle kept':>10}")
+for name, cmd in SERVERS.items():
+    proc = start_server(cmd)
+    try:
+        conn = connect()
+        answers[name] = [call(conn, "POST", path, body)[::2] for path, body in PARITY_CASES]
+        conn.close()
+
+        idle = []
+        for _ in range(IDLE):
+            c = connect()
+            call(c, "GET", "/healthz")
+            idle.append(c)
+        results = load(RUN_SECONDS)
+        kept = idle_still_served(idle)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    ok  = np.array([e for s, e in results if s == 200]) * 1000
+    p50, p99 = np.percentile(ok, [50, 99]) if len(ok) else (0, 0)
+    errors = len(results) - len(ok)
+    summary[name] = kept
+    print(f"   {name:<16} {len(ok) / RUN_SECONDS:8.1f} {p50:7.1f}ms {p99:7.1f}ms {errors:7d} "
+          f"{kept:>5}/{IDLE}")
+
+flask, asgi = answers.values()
+diffs = [path for (path, _), a, b in zip(PARITY_CASES, flask, asgi) if a != b]
+if diffs:
+    sys.exit(f"❌ ASGI answers differ from Flask on {diffs}")
+if summary["asgi/uvicorn"] < IDLE:
+    sys.exit("❌ ASGI server dropped idle keep-alive connections")
+print(f"✅ ASGI server matches Flask on {len(PARITY_CASES)} requests")
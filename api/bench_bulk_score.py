@@ -0,0 +1,165 @@
+"""
+bench_bulk_score.py  —  bulk_score.py parity, throughput and memory bound
+=========================================================================
+Run with:  python bench_bulk_score.py   (from the api/ folder; Parquet
+                                          cases need pyarrow)
+
+Writes synthetic listing exports to a temp folder and:
+
+  1. scores a CSV (with empty cells and an unseen district) to CSV and
+     Parquet with --top-k 3 — fails if any price or contribution differs
+     from /predict/batch on the same rows, or the row order changes
+  2. scores N and 4 N rows CSV → CSV in fixed chunks and reports rows/s;
+     fails if the peak RSS of the CLI and its workers grows with the
+     input instead of staying bounded by the chunk size
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import FLAG_INPUTS
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+    app.warmup()
+client = app.app.test_client()
+
+PARITY_ROWS = 3000
+MEMORY_ROWS = 200_000
+CHUNK_ROWS  = 20_000
+MEMORY_SLACK = 1.25   # 4× the rows may cost at most this much more peak RSS
+
+DISTRICTS = ["Colombo", "Kandy", "Galle", "Gampaha", "Kalutara", "Matara", "Atlantis"]
+LOCATIONS = ["Colombo 7", "Nugegoda", "Peradeniya", "Unawatuna", "Wattala", "", None]
+
+
+def listings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "id":            np.arange(n),
+        "district":      rng.choice(DISTRICTS, n),
+        "location":      rng.choice(np.array(LOCATIONS, dtype=object), n),
+        "property_type": rng.choice(["house", "apartment", "Apartments"], n),
+        "bedrooms":      rng.integers(1, 7, n).astype(float),
+        "bathrooms":     rng.integers(1, 5, n).astype(float),
+        "land_size_p":   np.round(rng.uniform(3, 40, n), 1),
+        "floor_area_sqft": rng.integers(500, 6000, n).astype(float),
+        "storeys":       rng.integers(1, 4, n),
+    })
+    for flag in FLAG_INPUTS:
+        df[flag] = rng.integers(0, 2, n)
+    # Empty cells must score like an omitted /predict field
+    for column in ("bedrooms", "land_size_p", "district"):
+        df.loc[rng.random(n) < 0.05, column] = None
+    return df
+
+
+def batch_reference(df, k):
+    """/predict/batch answers for the rows of df, in order."""
+    results = []
+    renamed = df.rename(columns={"floor_area_sqft": "floor_area"}).drop(columns="id")
+    records = [{key: value for key, value in row.items() if not pd.isna(value)}
+               for row in renamed.to_dict("records")]
+    for start in range(0, len(records), app.MAX_BATCH_SIZE):
+        response = client.post("/predict/batch?explain=true",
+                               json={"properties": records[start:start + app.MAX_BATCH_SIZE]})
+        results += response.get_json()["results"]
+    prices = np.array([r["predicted_price_lkr"] for r in results])
+    top    = [[(t["feature"], t["shap_value"]) for t in r["explanation"][:k]] for r in results]
+    return prices, top
+
+
+def bulk(args):
+    """Run the CLI; returns its stdout."""
+    done = subprocess.run([sys.executable, "bulk_score.py", *args], capture_output=True, text=True)
+    if done.returncode:
+        sys.exit(f"❌ bulk_score.py {' '.join(args)} failed:\n{done.stdout}{done.stderr}")
+    return done.stdout
+
+
+def tree_rss_mb(pid):
+    """Resident memory of pid and its descendants, from /proc (0 once it exits)."""
+    total, stack = 0, [pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS"))
+            with open(f"/proc/{pid}/task/{pid}/children") as f:
+                stack += [int(c) for c in f.read().split()]
+        except (OSError, StopIteration):
+            continue
+    return total / 1024
+
+
+def bulk_peak(args):
+    """Run the CLI; returns the peak RSS of it and its workers, sampled every 20 ms.
+    (ru_maxrss won't do: an exec'd child starts from its parent's RSS.)"""
+    proc = subprocess.Popen([sys.executable, "bulk_score.py", *args],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    peak = 0.0
+    while proc.poll() is None:
+        peak = max(peak, tree_rss_mb(proc.pid))
+        time.sleep(0.02)
+    if proc.returncode:
+        sys.exit(f"❌ bulk_score.py {' '.join(args)} failed:\n{proc.stderr.read()}")
+    return peak
+
+
+def check(path, reader, prices, top, k):
+    out = reader(path)
+    if list(out["id"].astype(int)) != list(range(len(prices))):
+        sys.exit(f"❌ {path}: rows out of order or missing")
+    if not np.array_equal(out["predicted_price_lkr"].to_numpy(), prices):
+        bad = int((out["predicted_price_lkr"].to_numpy() != prices).sum())
+        sys.exit(f"❌ {path}: {bad} prices differ from /predict/batch")
+    got = [[(row[f"top{r}_feature"], row[f"top{r}_shap"]) for r in range(1, k + 1)]
+           for row in out.to_dict("records")]
+    mismatched = sum(1 for a, b in zip(got, top)
+                     if [f for f, _ in a] != [f for f, _ in b]
+                     or not np.allclose([v for _, v in a], [v for _, v in b], atol=1e-4))
+    if mismatched:
+        sys.exit(f"❌ {path}: {mismatched} rows' top-{k} contributions differ")
+    print(f"✅ {os.path.basename(path)} matches /predict/batch on {len(prices):,} rows")
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    # ── 1. Parity ─────────────────────────────────────────────
+    df = listings(PARITY_ROWS)
+    source = os.path.join(tmp, "parity.csv")
+    df.to_csv(source, index=False)
+    prices, top = batch_reference(df, 3)
+
+    common = ["--top-k", "3", "--keep", "id", "--chunk-rows", "700"]
+    bulk([source, os.path.join(tmp, "out.csv"), *common])
+    check(os.path.join(tmp, "out.csv"), pd.read_csv, prices, top, 3)
+    try:
+        import pyarrow   # noqa: F401
+        bulk([source, os.path.join(tmp, "out.parquet"), *common, "--workers", "0"])
+        check(os.path.join(tmp, "out.parquet"), pd.read_parquet, prices, top, 3)
+    except ImportError:
+        print("   pyarrow not installed — Parquet output skipped")
+
+    # ── 2. Throughput and memory ──────────────────────────────
+    print(f"\n   {'rows':>10} {'seconds':>9} {'rows/s':>10} {'peak RSS':>10}")
+    peaks = []
+    for n in (MEMORY_ROWS, 4 * MEMORY_ROWS):
+        source = os.path.join(tmp, f"in_{n}.csv")
+        listings(n, seed=n).to_csv(source, index=False)
+        started = time.perf_counter()
+        peaks.append(bulk_peak([source, os.path.join(tmp, f"out_{n}.csv"),
+                                "--chunk-rows", str(CHUNK_ROWS)]))
+        elapsed = time.perf_counter() - started
+        print(f"   {n:>10,} {elapsed:9.1f} {n / elapsed:10,.0f} {peaks[-1]:8.0f}MB")
+
+    if peaks[1] > peaks[0] * MEMORY_SLACK:
+        sys.exit(f"❌ Peak RSS grew from {peaks[0]:.0f} MB to {peaks[1]:.0f} MB with 4× the rows")
+    print(f"✅ Peak RSS bounded ({peaks[0]:.0f} → {peaks[1]:.0f} MB for 4× the rows)")
@@ -0,0 +1,55 @@
+"""
+bench_cold_start.py  —  API startup time + first-request latency
+================================================================
+Run with:  python bench_cold_start.py   (from the api/ folder)
+
+Starts a fresh interpreter per configuration, imports app.py, optionally
+runs the warmup, then times the first /predict (with explanation). Each
+configuration is given as EV_* environment overrides (see config.py).
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+RUNS = 3
+
+CONFIGS = {
+    # no bundle dir → legacy loose-file path, so EV_MODEL_FILE takes effect
+    "pickle + shap, no warmup":      {"EV_BUNDLE_DIR": "no-bundles", "EV_MODEL_FILE": "xgb_model.pkl",
+                                      "EV_EXPLAINER": "shap"},
+    "native + contribs, no warmup": {},
+    "native + contribs, warmup":    {"WARMUP": "1"},
+}
+
+CHILD = r"""
+import json, os, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+if os.environ.get("WARMUP"):
+    app.warmup()
+t2 = time.perf_counter()
+client = app.app.test_client()
+r = client.post("/predict", json={"district": "Colombo", "location": "Nugegoda"})
+t3 = time.perf_counter()
+assert r.status_code == 200, r.get_json()
+print(json.dumps({"import_s": t1 - t0, "warmup_s": t2 - t1, "first_request_ms": (t3 - t2) * 1000}))
+"""
+
+
+def run(overrides):
+    env = {**os.environ, **overrides, "PYTHONWARNINGS": "ignore"}
+    out = subprocess.run([sys.executable, "-c", CHILD], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+print(f"   {'configuration':<30} {'import+load':>12} {'warmup':>9} {'1st request':>12} {'total':>9}")
+for name, overrides in CONFIGS.items():
+    results = [run(overrides) for _ in range(RUNS)]
+    best = {k: min(r[k] for r in results) for k in results[0]}
+    total = best["import_s"] + best["warmup_s"] + best["first_request_ms"] / 1000
+    print(f"   {name:<30} {best['import_s']:>11.2f}s {best['warmup_s']:>8.2f}s "
+          f"{best['first_request_ms']:>10.1f}ms {total:>8.2f}s")
@@ -0,0 +1,134 @@
+"""
+bench_columnar.py  —  Arrow / msgpack bulk scoring vs the JSON batch path
+=========================================================================
+Run with:  python bench_columnar.py   (from the api/ folder; needs pyarrow
+                                       and msgpack)
+
+Fails if /predict/columnar prices (either format) differ from
+/predict/batch for the same properties, or if its SHAP columns differ
+from the batch explanations. Then times client encode + server + client
+decode for 10k and 100k rows: JSON in MAX_BATCH_SIZE chunks, Arrow and
+msgpack in one request each. "model only" is the booster call alone —
+the floor every protocol shares.
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import msgpack
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc
+
+from columnar import ARROW, MSGPACK, read_msgpack
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+    app.warmup()
+client = app.app.test_client()
+app.admission.concurrency = 0   # single client; measure codecs, not queueing
+
+SIZES     = [10_000, 100_000]
+DISTRICTS = ["Colombo", "Gampaha", "Kandy", "Galle", "Negombo", "Jaffna", "Nowhere"]
+LOCATIONS = ["Nugegoda", "Kadawatha", "Colombo 7", "Peradeniya", ""]
+rng       = np.random.default_rng(0)
+
+
+def make_columns(n):
+    return {
+        "district":      rng.choice(DISTRICTS, n).tolist(),
+        "location":      rng.choice(LOCATIONS, n).tolist(),
+        "property_type": rng.choice(["house", "apartment", "Apartments"], n).tolist(),
+        "bedrooms":      rng.integers(1, 7, n).astype(np.float64),
+        "bathrooms":     rng.integers(1, 5, n).astype(np.float64),
+        "land_size_p":   np.round(rng.uniform(2, 40, n), 1),
+        "floor_area":    np.round(rng.uniform(500, 6000, n)),
+        "has_pool":      rng.integers(0, 2, n).astype(np.int8),
+        "has_garden":    rng.integers(0, 2, n).astype(np.int8),
+    }
+
+
+def to_rows(columns, n):
+    keys = list(columns)
+    lists = [c if isinstance(c, list) else c.tolist() for c in columns.values()]
+    return [dict(zip(keys, values)) for values in zip(*lists)][:n]
+
+
+# ── Clients ──────────────────────────────────────────────────
+def score_json(columns, n, explain=False):
+    rows, prices, shap = to_rows(columns, n), [], []
+    for start in range(0, n, app.MAX_BATCH_SIZE):
+        r = client.post(f"/predict/batch?explain={str(explain).lower()}",
+                        json=rows[start:start + app.MAX_BATCH_SIZE])
+        results = r.get_json()["results"]
+        prices += [item["predicted_price_lkr"] for item in results]
+        shap   += [item.get("explanation") for item in results]
+    return np.array(prices), shap
+
+
+def score_arrow(columns, n, explain=False):
+    table = pa.table({k: pa.array(v) for k, v in columns.items()})
+    sink  = pa.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    r = client.post(f"/predict/columnar?explain={str(explain).lower()}",
+                    data=sink.getvalue().to_pybytes(), content_type=ARROW)
+    out = pyarrow.ipc.open_stream(r.data).read_all()
+    return out.column("predicted_price_lkr").to_numpy(), out
+
+
+def msgpack_payload(columns):
+    return msgpack.packb({k: (v if isinstance(v, list) else {"dtype": v.dtype.str, "data": v.tobytes()})
+                          for k, v in columns.items()}, use_bin_type=True)
+
+
+def score_msgpack(columns, n, explain=False):
+    r = client.post(f"/predict/columnar?explain={str(explain).lower()}",
+                    data=msgpack_payload(columns), content_type=MSGPACK)
+    out = msgpack.unpackb(r.data, raw=False)["columns"]
+    col = out["predicted_price_lkr"]
+    return np.frombuffer(col["data"], dtype=col["dtype"]), out
+
+
+# ═══════════════════════════════════════════════════════
+# 1. PARITY vs /predict/batch
+# ═══════════════════════════════════════════════════════
+columns = make_columns(2000)
+json_prices, json_shap = score_json(columns, 2000, explain=True)
+arrow_prices, arrow_out = score_arrow(columns, 2000, explain=True)
+mp_prices, _            = score_msgpack(columns, 2000)
+
+# top-8 SHAP from the columns must match the JSON explanation for each row
+bad_shap = 0
+for i in range(0, 2000, 97):
+    top = {e["feature"]: e["shap_value"] for e in json_shap[i]}
+    bad_shap += any(abs(arrow_out.column(f"shap_{f}")[i].as_py() - v) > 1e-4 for f, v in top.items())
+
+bad_arrow = int(np.sum(arrow_prices != json_prices))
+bad_mp    = int(np.sum(mp_prices != json_prices))
+print(f"   price mismatches vs JSON   arrow {bad_arrow}   msgpack {bad_mp}   (of 2000)")
+print(f"   SHAP column mismatches     {bad_shap}")
+if bad_arrow or bad_mp or bad_shap:
+    sys.exit("❌ Columnar endpoint disagrees with /predict/batch")
+
+# ═══════════════════════════════════════════════════════
+# 2. THROUGHPUT
+# ═══════════════════════════════════════════════════════
+print(f"\n   {'rows':>8} {'JSON':>10} {'Arrow':>10} {'msgpack':>10} {'model only':>11} {'Arrow speed-up':>16}")
+for n in SIZES:
+    columns = make_columns(n)
+    times = {}
+    for name, fn in (("json", score_json), ("arrow", score_arrow), ("msgpack", score_msgpack)):
+        started = time.perf_counter()
+        fn(columns, n)
+        times[name] = time.perf_counter() - started
+    X = app.bundle.encoder.encode_columns(*read_msgpack(msgpack_payload(columns),
+                                                         app.bundle.encoder.column_fields))
+    started = time.perf_counter()
+    app.bundle.predict_log(X)
+    model = time.perf_counter() - started
+    print(f"   {n:>8,} {times['json']:9.2f}s {times['arrow']:9.2f}s {times['msgpack']:9.2f}s"
+          f" {model:10.2f}s {times['json'] / times['arrow']:15.1f}×")
+print("✅ Columnar endpoint matches /predict/batch")
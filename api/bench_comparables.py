@@ -0,0 +1,106 @@
+"""
+bench_comparables.py  —  Comparables index: parity, incremental build, latency
+=============================================================================
+Run with:  python bench_comparables.py   (from the api/ folder)
+Input:     ../data/raw_properties.csv
+
+Fails if KD-tree answers differ from a brute-force scan of the same
+partition, if an index built from part of the listings and then fed
+the rest with ingest() answers differently from one built in one go, or
+if location text ("Nugegoda", "kandy") finds different listings from the
+district it resolves to. Then times single queries.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bundle import MANIFEST, current_path
+from comparables import ComparablesIndex, load_listings
+from features import FeatureEncoder, PROPERTY_TYPE_MAP
+
+LISTINGS = "../data/raw_properties.csv"
+QUERIES  = 2000
+rng      = np.random.default_rng(0)
+
+# District resolution as the current bundle's encoder does it
+with open(os.path.join(current_path("bundles"), MANIFEST)) as f:
+    tables = json.load(f)["tables"]
+resolve = FeatureEncoder(tables["features"], tables["district_classes"]).resolve_district
+
+index = ComparablesIndex.from_csv(LISTINGS, PROPERTY_TYPE_MAP, resolve)
+df    = load_listings(LISTINGS)
+
+bodies = [{
+    "district":      rng.choice(["Colombo", "Gampaha", "Negombo", "Kandy", "Galle"]),
+    "property_type": rng.choice(["house", "apartment"]),
+    "bedrooms":      int(rng.integers(1, 7)),
+    "bathrooms":     int(rng.integers(1, 5)),
+    "land_size_p":   float(rng.uniform(2, 40)),
+    "floor_area":    float(rng.uniform(500, 6000)),
+} for _ in range(QUERIES)]
+
+# ═══════════════════════════════════════════════════════
+# 1. PARITY vs BRUTE FORCE
+# ═══════════════════════════════════════════════════════
+bad = 0
+for body in bodies[:300]:
+    part = index._partitions.get(index._key(body["district"], body["property_type"]))
+    _, matches = index.query(body, k=5)
+    if part is None:
+        bad += bool(matches)
+        continue
+    point = index._point(body)
+    brute = np.sort(np.linalg.norm(part.points - point, axis=1))[:5]
+    bad  += not np.allclose(brute, [m["distance"] for m in matches], atol=1e-4)
+print(f"   KD-tree vs brute force mismatches   {bad} / 300")
+
+# ═══════════════════════════════════════════════════════
+# 2. INCREMENTAL INGEST == FULL BUILD
+# ═══════════════════════════════════════════════════════
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "raw_properties.csv")
+    df.iloc[: len(df) // 2].to_csv(path, index=False)
+    partial = ComparablesIndex.from_csv(path, PROPERTY_TYPE_MAP, resolve)
+    df.to_csv(path, index=False)
+    added = partial.ingest(path)
+    again = partial.ingest(path)
+
+# Same scaling so distances are comparable between the two indexes
+full = ComparablesIndex(df.iloc[: len(df) // 2], PROPERTY_TYPE_MAP, resolve)
+full._add(df)
+diff = sum(index_a != index_b for index_a, index_b in (
+    ([m["url"] for m in partial.query(b)[1]], [m["url"] for m in full.query(b)[1]])
+    for b in bodies[:300]))
+print(f"   ingest added {added} listings (then {again}), result mismatches {diff} / 300")
+
+if bad or diff or again or len(partial) != len(index):
+    sys.exit("❌ Comparables index disagrees")
+
+# ═══════════════════════════════════════════════════════
+# 3. RESOLVED DISTRICTS
+# ═══════════════════════════════════════════════════════
+for text, district in [("Nugegoda", "Colombo"), ("colombo 7", "Colombo"),
+                       ("kandy", "Kandy"), ("near Peradeniya", "Kandy")]:
+    got  = index.query({**bodies[0], "property_type": "house", "district": text})
+    want = index.query({**bodies[0], "property_type": "house", "district": district})
+    if resolve(text) != district or got != want or not got[0]:
+        sys.exit(f"❌ district {text!r} did not find the {district} listings")
+print("   location text finds the listings of the district it resolves to")
+
+# ═══════════════════════════════════════════════════════
+# 4. LATENCY
+# ═══════════════════════════════════════════════════════
+times = []
+for body in bodies:
+    started = time.perf_counter()
+    index.query(body, k=5)
+    times.append(time.perf_counter() - started)
+times = np.array(times) * 1e6
+print(f"   query k=5   mean {times.mean():7.1f} µs   p99 {np.percentile(times, 99):7.1f} µs"
+      f"   ({len(index)} listings, {index.stats()['partitions']} partitions)")
+print("✅ Comparables index matches brute force")
@@ -0,0 +1,149 @@
+"""
+bench_compress.py  —  compress.py correctness and guardrail checks
+==================================================================
+Run with:  python bench_compress.py   (from the api/ folder)
+
+On the bundles/CURRENT model and train_model.py's validation / test split:
+
+  1. merging with tolerance 0 on 0/1 flags is lossless — predictions on
+     random rows are bit-identical to the original booster
+  2. the compressed booster, TreeEnsemble.from_booster and the float16
+     model_arrays.npz all predict the same, bit for bit, and the packed
+     thresholds / leaves really are float16
+  3. SHAP still adds up: pred_contribs rows sum to the prediction
+  4. a bundle with the arrays file serves it under EV_ENGINE=arrays
+  5. an impossible budget is refused; the default one is reported
+"""
+
+import contextlib
+import copy
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+import compress
+from bundle import ModelBundle, current_path, write_bundle
+from config import CONFIG
+from features import FLAG_INPUTS
+from tree_engine import TreeEnsemble
+
+ROWS = 20_000
+
+bundle = ModelBundle.load(current_path(CONFIG["bundle_dir"]), CONFIG)
+booster = bundle.booster
+features = bundle.features
+df = pd.read_csv(CONFIG["clean_file"])
+val, test = compress.split(df, features)
+
+
+def random_rows(n, seed=0):
+    """Training-like rows, with every flag column 0 or 1."""
+    rng = np.random.default_rng(seed)
+    X = df[features].to_numpy(np.float32)[rng.integers(0, len(df), n)]
+    for j, f in enumerate(features):
+        if f in FLAG_INPUTS:
+            X[:, j] = rng.integers(0, 2, n)
+    return X
+
+
+def predict(b, X):
+    return b.inplace_predict(X, validate_features=False)
+
+
+X = random_rows(ROWS)
+binary = {i for i, f in enumerate(features) if f in FLAG_INPUTS}
+
+# ── 1. Lossless merge ────────────────────────────────────────
+def with_redundant_splits(b):
+    """b with the first tree that splits on a flag placed under a split on
+    that flag (same subtree both sides) and an always-right one (threshold
+    0): the flag's own splits inside are then decided by an ancestor, so
+    predictions are unchanged."""
+    model = compress._model(b)
+    trees = compress._trees(model)
+    t, flag = next((t, f) for t, tree in enumerate(trees)
+                   for f, l in zip(tree["split_indices"], tree["left_children"])
+                   if l != -1 and f in binary)
+    tree = trees[t]
+    inner = compress._merge_tree(tree, set(), -1.0, {"removed": 0, "merged": 0})
+
+    def split(threshold, left, right):
+        return {"leaf": False, "feature": flag, "threshold": threshold, "default_left": 0,
+                "base_weight": 0.0, "loss_change": 0.0, "hess": inner["hess"],
+                "left": left, "right": right}
+    root = split(0.0, copy.deepcopy(inner), split(1.0, copy.deepcopy(inner), copy.deepcopy(inner)))
+    trees[t] = compress._flatten(root, tree)
+    return compress._booster(model)
+
+
+padded = with_redundant_splits(booster)
+if not np.array_equal(predict(padded, X), predict(booster, X)):
+    sys.exit("❌ Test model with redundant splits predicts differently to begin with")
+for label, source in (("original", booster), ("padded", padded)):
+    merged, stats = compress.merge_binary_splits(source, binary, tol=0.0)
+    if not np.array_equal(predict(merged, X), predict(booster, X)):
+        sys.exit(f"❌ Merging the {label} model with tolerance 0 changed predictions")
+    if label == "padded" and stats["removed"] < 3:
+        sys.exit(f"❌ Redundant flag splits were not removed ({stats})")
+    print(f"✅ Lossless merge of the {label} model matches on {ROWS:,} rows "
+          f"({stats['removed']} splits removed, {stats['merged']} equal-leaf pairs merged)")
+
+# ── 2. Compressed booster vs packed arrays ───────────────────
+result = compress.compress(booster, features, val, test, CONFIG)
+small = result["booster"]
+with tempfile.TemporaryDirectory() as tmp:
+    model_path, arrays_path = os.path.join(tmp, "model.ubj"), os.path.join(tmp, compress.ARRAYS_FILE)
+    compress.write(result, model_path, arrays_path)
+    reloaded = xgb.Booster(model_file=model_path)
+    packed = TreeEnsemble.load(arrays_path)
+    with np.load(arrays_path) as f:
+        dtypes = {name: f[name].dtype for name in ("threshold", "value")}
+
+    want = predict(small, X)
+    for label, got in (("reloaded model.ubj", predict(reloaded, X)),
+                       ("TreeEnsemble.from_booster", TreeEnsemble.from_booster(small).predict(X)),
+                       (compress.ARRAYS_FILE, packed.predict(X))):
+        if not np.array_equal(got, want):
+            sys.exit(f"❌ {label} differs from the compressed booster "
+                     f"(max {np.abs(got - want).max():.2e})")
+    applied = {s["stage"] for s in result["stages"] if s["applied"]}
+    expected = {"threshold": np.float16 if "float16 thresholds" in applied else np.float32,
+                "value":     np.float16 if "float16 leaves" in applied else np.float32}
+    if any(dtypes[k] != expected[k] for k in expected):
+        sys.exit(f"❌ Packed arrays are {dtypes}, expected {expected}")
+    print(f"✅ Compressed booster, reloaded .ubj and {compress.ARRAYS_FILE} agree bit for bit "
+          f"(threshold {dtypes['threshold']}, value {dtypes['value']})")
+
+    # ── 3. SHAP additivity ───────────────────────────────────
+    contribs = small.predict(xgb.DMatrix(X[:2000], feature_names=features), pred_contribs=True)
+    gap = np.abs(contribs.sum(axis=1) - predict(small, X[:2000])).max()
+    if gap > 1e-3:
+        sys.exit(f"❌ SHAP contributions don't add up to the prediction (max gap {gap:.2e})")
+    print(f"✅ SHAP contributions sum to the prediction (max gap {gap:.1e})")
+
+    # ── 4. Bundle serving the arrays file ────────────────────
+    manifest = write_bundle(os.path.join(tmp, "bundles"), model_path, bundle.manifest["tables"],
+                            {"ensemble": arrays_path}, make_current=False)
+    served = ModelBundle.load(os.path.join(tmp, "bundles", manifest["version"]),
+                              {**CONFIG, "engine": "arrays", "listings_file": ""})
+    if not np.array_equal(served.predict_log(X[:8]), want[:8]):
+        sys.exit("❌ Bundle with the arrays file predicts differently under engine=arrays")
+    print("✅ engine=arrays serves the packed arrays file")
+
+# ── 5. Guardrail ─────────────────────────────────────────────
+strict = compress.compress(booster, features, val, test,
+                           {**CONFIG, "compress_max_mae_increase": -0.5})
+if strict["accepted"]:
+    sys.exit("❌ A compressed model was accepted under an impossible budget")
+print("✅ Impossible budget refused")
+
+with contextlib.redirect_stdout(io.StringIO()) as report:
+    compress.print_report(result, booster, test[0])
+print(report.getvalue().rstrip())
+print(f"{'✅' if result['accepted'] else '⚠️ '} Default budget: compressed model "
+      f"{'accepted' if result['accepted'] else 'refused'}")
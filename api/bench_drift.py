@@ -0,0 +1,67 @@
+"""
+bench_drift.py  —  /drift monitor: binning parity, drift detection, cost per row
+================================================================================
+Run with:  python bench_drift.py   (from the api/ folder)
+Input:     ../data/clean_properties.csv, bundles/CURRENT
+
+Fails if feeding the training rows back through the monitor does not
+reproduce the reference histograms bin for bin (PSI 0, nothing out of
+range), if row-at-a-time and batch observe() disagree, or if a shifted
+sample (land sizes × 3) is not flagged as drift. Then times observe().
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bundle import ModelBundle, current_path
+from config import CONFIG
+from drift import DriftMonitor, build_reference
+
+bundle = ModelBundle.load(current_path(CONFIG["bundle_dir"]), CONFIG)
+X = pd.read_csv(CONFIG["clean_file"])[bundle.features].to_numpy(np.float32)
+reference = build_reference(X, bundle.features)
+
+# ═══════════════════════════════════════════════════════
+# 1. TRAINING ROWS REPRODUCE THE REFERENCE
+# ═══════════════════════════════════════════════════════
+monitor = DriftMonitor(reference)
+monitor.observe(X)
+report = monitor.report()
+bad = 0
+for f in report["features"]:
+    bad += f["psi"] != 0 or f["out_of_range"] != {"below": 0, "above": 0}
+print(f"   training rows vs reference   {len(X)} rows, {bad} features off")
+
+single, batch = DriftMonitor(reference), DriftMonitor(reference)
+for row in X[:500]:
+    single.observe(row)
+batch.observe(X[:500])
+same = np.array_equal(single._current, batch._current)
+print(f"   row-at-a-time == batch       {same}")
+
+# ═══════════════════════════════════════════════════════
+# 2. A SHIFTED SAMPLE IS FLAGGED
+# ═══════════════════════════════════════════════════════
+shifted = X.copy()
+shifted[:, bundle.features.index("land_size_p")] *= 3
+drifted = DriftMonitor(reference)
+drifted.observe(shifted)
+land = next(f for f in drifted.report()["features"] if f["feature"] == "land_size_p")
+print(f"   land size × 3                psi {land['psi']}  ks {land['ks']}  "
+      f"above range {land['out_of_range']['above']}  → {land['status']}")
+if bad or not same or land["status"] != "drift":
+    sys.exit("❌ Drift monitor disagrees with its reference")
+
+# ═══════════════════════════════════════════════════════
+# 3. COST
+# ═══════════════════════════════════════════════════════
+for label, rows, repeat in (("single row", X[:1], 20000), ("batch of 500", X[:500], 200)):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        monitor.observe(rows)
+    us = (time.perf_counter() - started) / repeat / len(rows) * 1e6
+    print(f"   observe {label:<14} {us:6.2f} µs/row")
+print(f"✅ Drift monitor reproduces the reference ({len(bundle.features)} features)")
@@ -0,0 +1,61 @@
+"""
+bench_explainers.py  —  Native vs shap explainer timing
+=======================================================
+Run with:  python bench_explainers.py   (from the api/ folder)
+Input:     xgb_model.pkl, shap_explainer.pkl, feature_names.pkl,
+           ../data/clean_properties.csv
+
+Times a single-row and a full-dataset explanation for each backend.
+Exact native and shap run the same TreeSHAP algorithm, so expect them
+to time within noise of each other; only approx is meaningfully faster.
+That they give the same values is checked by tests/test_explain.py
+(python -m pytest -q).
+"""
+
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from explain import ContribExplainer
+
+DATA_FILE = "../data/clean_properties.csv"
+
+model     = joblib.load("xgb_model.pkl")
+features  = joblib.load("feature_names.pkl")
+reference = joblib.load("shap_explainer.pkl")
+native    = ContribExplainer(model.get_booster())
+
+X = pd.read_csv(DATA_FILE)[features].to_numpy(dtype=np.float32)
+
+
+# ═══════════════════════════════════════════════════════
+# TIMING
+# ═══════════════════════════════════════════════════════
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+# Rounds alternate between backends, so machine noise hits each alike;
+# every backend keeps its best time
+ROUNDS = 7
+row = X[:1]
+approx = ContribExplainer(model.get_booster(), approx=True)
+backends = [("shap", reference), ("native", native), ("native approx", approx)]
+one  = {name: [] for name, _ in backends}
+full = {name: [] for name, _ in backends}
+for i in range(ROUNDS):
+    for name, exp in backends:
+        one[name].append(timed(lambda: exp.shap_values(row)))
+        if i < 2:
+            full[name].append(timed(lambda: exp.shap_values(X)))
+
+print(f"\n   {'backend':<16} {'1 row':>10} {f'{len(X)} rows':>12}")
+for name, _ in backends:
+    print(f"   {name:<16} {min(one[name]) * 1e3:>8.2f}ms {min(full[name]) * 1e3:>10.0f}ms")
+ratio = min(one["shap"]) / min(one["native"])
+print(f"   exact native vs shap: {ratio:.2f}× per row — same TreeSHAP algorithm; "
+      f"native is the default for needing no shap import or pickled explainer")
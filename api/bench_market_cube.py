@@ -0,0 +1,104 @@
+"""
+bench_market_cube.py  —  /stats cube: quantile accuracy, incremental updates, latency
+=====================================================================================
+Run with:  python bench_market_cube.py   (from the api/ folder)
+Input:     ../data/clean_properties.csv, district_encoder.pkl
+
+Fails if any cell or roll-up quantile is further than α (relative) from
+the exact order statistic, if counts or means differ from pandas, or if
+a cube built from half the rows and then fed the rest with ingest()
+differs from one built in one go. Then times roll-up queries.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from market_cube import ALPHA, DIMENSIONS, METRICS, QUANTILES, MarketCube, read_clean
+
+CLEAN   = "../data/clean_properties.csv"
+classes = joblib.load("district_encoder.pkl").classes_
+
+cube = MarketCube()
+cube.ingest(CLEAN, classes)
+_, _, dims, values = read_clean(CLEAN, classes)
+frame = pd.concat([dims.reset_index(drop=True),
+                   pd.DataFrame(values, columns=METRICS)], axis=1)
+
+# ═══════════════════════════════════════════════════════
+# 1. ACCURACY vs EXACT
+# ═══════════════════════════════════════════════════════
+worst, bad = 0.0, 0
+for group_by in ([], ["district"], ["property_type", "bedrooms"], DIMENSIONS):
+    exact = frame.groupby(group_by) if group_by else [((), frame)]
+    results = {tuple(g[d] for d in group_by): g for g in cube.query(group_by=group_by)}
+    for key, rows in exact:
+        key = key if isinstance(key, tuple) else (key,)
+        got = results[key]
+        bad += got["count"] != len(rows)
+        for m in METRICS:
+            v = np.sort(rows[m].dropna().to_numpy())
+            if not len(v):
+                continue
+            bad += got[m]["count"] != len(v) or abs(got[m]["mean"] - v.mean()) > 1
+            for q in QUANTILES:
+                truth = v[int(np.floor(q * (len(v) - 1)))]
+                err = abs(got[m]["quantiles"][str(q)] - truth) / truth
+                worst = max(worst, err)
+                bad += err > ALPHA + 1e-6
+print(f"   quantiles vs exact order statistics   worst {worst * 100:.3f}% (α = {ALPHA:.0%}), "
+      f"mismatches {bad}")
+
+# ═══════════════════════════════════════════════════════
+# 2. INCREMENTAL INGEST == FULL BUILD
+# ═══════════════════════════════════════════════════════
+df = pd.read_csv(CLEAN)
+df["url"] = [f"https://example.lk/ad/{i}" for i in range(len(df))]
+df["district"] = np.asarray(classes, dtype=object)[df["district_enc"]]
+with tempfile.TemporaryDirectory() as tmp:
+    path, saved = os.path.join(tmp, "clean_properties.csv"), os.path.join(tmp, "cube.npz")
+    df.iloc[: len(df) // 2].to_csv(path, index=False)
+    partial = MarketCube()
+    partial.ingest(path)
+    partial.save(saved)
+    partial = MarketCube.load(saved)
+    df.to_csv(path, index=False)
+    added = partial.ingest(path)
+    again = partial.ingest(path)
+
+    full = MarketCube()
+    full.ingest(path)
+    switched = MarketCube.load(saved)      # url-keyed cube fed a row-keyed file → rebuild
+    switched.ingest(CLEAN, classes)
+
+
+def same(a, b):
+    qa = a.query(group_by=DIMENSIONS)
+    qb = b.query(group_by=DIMENSIONS)
+    key = lambda g: tuple(g[d] for d in DIMENSIONS)
+    return sorted(qa, key=key) == sorted(qb, key=key)
+
+
+diff = not same(partial, full)
+print(f"   ingest added {added} rows (then {again}), differs from full build: {diff}; "
+      f"key switch rebuilt to {len(switched)} rows")
+if bad or diff or again or len(partial) != len(df) or not same(switched, cube):
+    sys.exit("❌ Market cube disagrees")
+
+# ═══════════════════════════════════════════════════════
+# 3. LATENCY
+# ═══════════════════════════════════════════════════════
+queries = [({}, []), ({"district": {"gampaha"}, "property_type": {"house"}}, []),
+           ({}, ["district", "bedrooms"]), ({"bedrooms": {3, 4}}, ["district_tier"])]
+for filters, group_by in queries:
+    started = time.perf_counter()
+    for _ in range(200):
+        cube.query(filters, group_by)
+    ms = (time.perf_counter() - started) / 200 * 1000
+    print(f"   filters {str(filters):<52} group_by {str(group_by):<24} {ms:6.2f} ms")
+print(f"✅ Market cube matches exact statistics ({len(cube)} rows, {cube.stats()['cells']} cells)")
@@ -0,0 +1,63 @@
+"""
+bench_metrics.py  —  Instrumentation overhead on the /predict path
+===================================================================
+Run with:  python bench_metrics.py   (from the api/ folder)
+
+Times one histogram observation (perf_counter pair + observe) and the
+per-request hook work, then compares their total per /predict call with
+the mean /predict latency. Fails if instrumentation exceeds 5% of a
+cached explain=false request — the cheapest request the API serves
+(an explain=true miss costs several ms, so there it is far below 1%).
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import metrics
+
+N          = 200_000
+REQUESTS   = 2_000
+MAX_SHARE  = 0.05
+# parse, encode, serialize + request counter, latency histogram and
+# in-flight inc/dec — what one cache-hit explain=false /predict records
+OBS_PER_REQUEST = 7
+
+hist = metrics.Histogram("bench_seconds", "bench", ["stage"])
+series = hist.labels("x")
+
+started = time.perf_counter()
+for _ in range(N):
+    t = time.perf_counter()
+    series.observe(time.perf_counter() - t)
+per_obs = (time.perf_counter() - started) / N
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+    app.warmup()
+client = app.app.test_client()
+body   = {"district": "Galle", "bedrooms": 4}
+
+client.post("/predict?explain=false", json=body)
+started = time.perf_counter()
+for _ in range(REQUESTS):
+    client.post("/predict?explain=false", json=body)
+per_request = (time.perf_counter() - started) / REQUESTS
+
+started = time.perf_counter()
+for _ in range(100):
+    app.metrics.render()
+render_ms = (time.perf_counter() - started) / 100 * 1000
+
+overhead = per_obs * OBS_PER_REQUEST
+share    = overhead / per_request
+print(f"   observation (incl. perf_counter)  {per_obs * 1e6:8.2f} µs")
+print(f"   per /predict ({OBS_PER_REQUEST} observations)     {overhead * 1e6:8.2f} µs")
+print(f"   /predict explain=false (cached)   {per_request * 1e6:8.1f} µs")
+print(f"   overhead share                    {share:8.2%}")
+print(f"   /metrics render                   {render_ms:8.2f} ms")
+
+if share > MAX_SHARE:
+    sys.exit(f"❌ Instrumentation is {share:.2%} of request time (limit {MAX_SHARE:.0%})")
+print("✅ Instrumentation overhead within budget")
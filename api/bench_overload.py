@@ -0,0 +1,154 @@
+"""
+bench_overload.py  —  Load test: admission control under overload
+=================================================================
+Run with:  python bench_overload.py   (from the api/ folder; needs gunicorn)
+
+Starts one gunicorn worker, measures how many explain=true /predict
+calls per second it sustains, then offers OVERLOAD × that rate open-loop
+(requests keep arriving whether or not earlier ones finished) — first
+with admission control off, then on. Every request is a cache miss.
+
+Without admission control the backlog grows for the whole run and so
+does latency. With it, excess requests get an immediate 503, queued
+ones drop SHAP, and p99 latency of served requests stays bounded. Fails
+if the admission-controlled p99 exceeds P99_LIMIT_S.
+
+Admission control bounds queueing in front of the model. Offered load
+beyond what the HTTP layer itself can parse and answer (several times
+the SHAP-bound rate) backs up in the socket accept queue before the app
+sees it — that needs more workers, not a smaller app queue.
+"""
+
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+PORT           = 5099
+WARM_SECONDS   = 3
+RUN_SECONDS    = 8
+OVERLOAD       = 2.0
+CLIENT_TIMEOUT = 30
+P99_LIMIT_S    = 1.5
+
+SCENARIOS = {
+    "admission off": {"EV_ADMISSION_CONCURRENCY": "0"},
+    "503 only":      {"EV_ADMISSION_DEGRADE_AT": "1000"},   # never drop SHAP
+    "admission on":  {},
+}
+
+
+def start_server(env_overrides):
+    env = {**os.environ, "EV_WORKERS": "1", "EV_CACHE_SIZE": "0", **env_overrides}
+    proc = subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{PORT}", "app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if call("GET", "/readyz")[0] == 200:
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.25)
+    proc.kill()
+    sys.exit("❌ Server did not become ready")
+
+
+def call(method, path, body=None):
+    """(status, seconds, parsed JSON or None) for one request on a fresh connection."""
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=CLIENT_TIMEOUT)
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        data = response.read()
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+    try:
+        return response.status, elapsed, json.loads(data)
+    except ValueError:
+        return response.status, elapsed, None
+
+
+def random_property():
+    return {"district": random.choice(["Colombo", "Kandy", "Galle", "Gampaha"]),
+            "bedrooms": random.randint(1, 6),
+            "floor_area": random.randint(600, 6000)}
+
+
+def one_request():
+    try:
+        return call("POST", "/predict?explain=true", random_property())
+    except OSError as e:
+        return type(e).__name__, CLIENT_TIMEOUT, None
+
+
+def capacity():
+    """Closed-loop throughput with two clients, in requests/s."""
+    done, stop = [0], time.monotonic() + WARM_SECONDS
+
+    def client():
+        while time.monotonic() < stop:
+            one_request()
+            done[0] += 1
+    threads = [threading.Thread(target=client) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return done[0] / WARM_SECONDS
+
+
+def open_loop(rate, seconds):
+    """Fire requests at a fixed rate regardless of completions."""
+    interval, futures = 1 / rate, []
+    with ThreadPoolExecutor(max_workers=512) as pool:
+        start = time.perf_counter()
+        for i in range(int(rate * seconds)):
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(one_request))
+        return [f.result() for f in futures]
+
+
+def report(name, rate, results):
+    ok       = [r for r in results if r[0] == 200]
+    shed     = sum(1 for r in results if r[0] == 503)
+    failed   = len(results) - len(ok) - shed
+    dropped  = sum(1 for r in ok if r[2] and r[2].get("explanation_dropped"))
+    lat      = np.array([r[1] for r in ok]) if ok else np.array([0.0])
+    p50, p99 = np.percentile(lat, [50, 99])
+    print(f"   {name:<15} {rate:7.1f}/s {len(ok):7d} {dropped:9d} {shed:6d} {failed:7d}"
+          f" {p50 * 1000:8.1f}ms {p99 * 1000:8.1f}ms {lat.max() * 1000:8.1f}ms")
+    return p99
+
+
+print(f"   {'scenario':<15} {'offered':>9} {'200':>7} {'no SHAP':>9} {'503':>6} {'failed':>7}"
+      f" {'p50':>10} {'p99':>10} {'max':>10}")
+p99s = {}
+for name, overrides in SCENARIOS.items():
+    proc = start_server(overrides)
+    try:
+        rate    = capacity() * OVERLOAD
+        results = open_loop(rate, RUN_SECONDS)
+        p99s[name] = report(name, rate, results)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+for name in ("503 only", "admission on"):
+    if p99s[name] > P99_LIMIT_S:
+        sys.exit(f"❌ p99 {p99s[name]:.2f}s for {name} (limit {P99_LIMIT_S}s)")
+print("✅ Tail latency bounded under overload")
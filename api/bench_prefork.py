@@ -0,0 +1,181 @@
+"""
+bench_prefork.py  —  gunicorn prefork: throughput per worker count, shared memory
+================================================================================
+Run with:  python bench_prefork.py   (from the api/ folder; needs gunicorn, Linux /proc)
+
+Starts gunicorn (gunicorn.conf.py, preload_app) with 1, 2 and N workers
+(N = max(4, cores)) and drives each with closed-loop clients posting
+explain=false /predict cache misses for RUN_SECONDS. Reports requests/s
+and latency per worker count.
+
+After the load, reads /proc/<pid>/smaps_rollup of every worker: the
+model, encoder and tables are loaded by the master before fork, so most
+of a worker's resident memory should still be pages it shares with the
+master and its siblings (Shared_*), not private copies. Fails if any
+worker holds less than MIN_SHARED of its RSS as shared pages, or if
+each worker beyond the first adds more than MAX_EXTRA_MB to the total
+PSS of master + workers (what the extra worker really costs).
+
+Throughput only scales with workers up to the core count; on a single
+core the extra workers just take turns, which the table shows.
+"""
+
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from config import CPU_COUNT
+
+PORT           = 5097
+WARM_SECONDS   = 1
+RUN_SECONDS    = 5
+CLIENTS        = 8
+CLIENT_TIMEOUT = 30
+MIN_SHARED     = 0.5     # of each worker's RSS
+MAX_EXTRA_MB   = 50      # total PSS added per worker beyond the first
+WORKER_COUNTS  = sorted({1, 2, max(4, CPU_COUNT)})
+
+
+def start_server(workers):
+    env = {**os.environ, "EV_WORKERS": str(workers), "EV_CACHE_SIZE": "0",
+           "EV_REQUEST_LOG": "", "EV_BATCHING": "0"}
+    proc = subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{PORT}", "app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 90
+    while time.monotonic() < deadline:
+        if len(worker_pids(proc.pid)) == workers:
+            try:
+                if call("GET", "/readyz")[0] == 200:
+                    return proc
+            except OSError:
+                pass
+        time.sleep(0.25)
+    proc.kill()
+    sys.exit(f"❌ Server with {workers} workers did not become ready")
+
+
+def call(method, path, body=None):
+    """(status, seconds) for one request on a fresh connection."""
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=CLIENT_TIMEOUT)
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+    finally:
+        conn.close()
+    return response.status, time.perf_counter() - started
+
+
+def random_property():
+    return {"district": random.choice(["Colombo", "Kandy", "Galle", "Gampaha"]),
+            "bedrooms": random.randint(1, 6), "bathrooms": random.randint(1, 4),
+            "floor_area": random.randint(600, 6000), "land_size_p": random.randint(2, 40)}
+
+
+def load(seconds):
+    """Closed-loop load from CLIENTS threads → (statuses, latencies)."""
+    statuses, latencies, stop = [], [], time.monotonic() + seconds
+
+    def client():
+        while time.monotonic() < stop:
+            try:
+                status, elapsed = call("POST", "/predict?explain=false", random_property())
+            except OSError as e:
+                status, elapsed = type(e).__name__, CLIENT_TIMEOUT
+            statuses.append(status)
+            latencies.append(elapsed)
+    threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return statuses, np.array(latencies)
+
+
+# ── /proc ──────────────────────────────────────────────────────
+def worker_pids(master):
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Field 4 (after the parenthesised command name) is the parent pid
+        if int(stat.rsplit(")", 1)[1].split()[1]) == master:
+            pids.append(int(entry))
+    return pids
+
+
+def memory_kb(pid):
+    """smaps_rollup fields of one process, in kB."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        lines = f.read().splitlines()[1:]
+    return {k.rstrip(":"): int(v) for k, v, *_ in (line.split() for line in lines)}
+
+
+# ═══════════════════════════════════════════════════════
+# RUN
+# ═══════════════════════════════════════════════════════
+print(f"   {CPU_COUNT} core(s), {CLIENTS} clients, {RUN_SECONDS}s per run, explain=false cache misses\n")
+print(f"   {'workers':>7} {'req/s':>8} {'p50':>9} {'p99':>9} {'errors':>7}   "
+      f"{'RSS/worker':>11} {'shared':>7} {'PSS/worker':>11} {'PSS total':>10}")
+rates, totals, failures = {}, {}, []
+for workers in WORKER_COUNTS:
+    proc = start_server(workers)
+    try:
+        load(WARM_SECONDS)
+        statuses, lat = load(RUN_SECONDS)
+        pids = worker_pids(proc.pid)
+        mem  = [memory_kb(pid) for pid in pids]
+        master = memory_kb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    ok = sum(1 for s in statuses if s == 200)
+    rates[workers] = ok / RUN_SECONDS
+    p50, p99 = np.percentile(lat, [50, 99]) * 1000
+    rss    = np.mean([m["Rss"] for m in mem]) / 1024
+    shared = min((m["Shared_Clean"] + m["Shared_Dirty"]) / m["Rss"] for m in mem)
+    pss    = np.mean([m["Pss"] for m in mem]) / 1024
+    total  = totals[workers] = (sum(m["Pss"] for m in mem) + master["Pss"]) / 1024
+    print(f"   {workers:>7} {rates[workers]:>8.1f} {p50:>7.1f}ms {p99:>7.1f}ms "
+          f"{len(statuses) - ok:>7}   {rss:>8.1f} MB {shared:>7.0%} {pss:>8.1f} MB {total:>7.1f} MB")
+
+    if workers > 1 and shared < MIN_SHARED:
+        failures.append(f"{workers} workers: a worker shares only {shared:.0%} of its RSS "
+                        f"(need ≥ {MIN_SHARED:.0%})")
+    extra = (total - totals[1]) / (workers - 1) if workers > 1 else 0
+    if extra > MAX_EXTRA_MB:
+        failures.append(f"{workers} workers: each extra worker adds {extra:.0f} MB "
+                        f"(limit {MAX_EXTRA_MB} MB)")
+    if len(statuses) - ok:
+        failures.append(f"{workers} workers: {len(statuses) - ok} requests failed")
+
+print()
+extra = (totals[WORKER_COUNTS[-1]] - totals[1]) / (WORKER_COUNTS[-1] - 1)
+print(f"   each worker beyond the first adds {extra:.1f} MB (total PSS), "
+      f"against {rss:.0f} MB resident per worker")
+scaling = rates[2] / rates[1]
+if CPU_COUNT >= 2:
+    print(f"{'✅' if scaling >= 1.5 else '⚠️ '} 2 workers serve {scaling:.2f}× the requests of 1 "
+          f"({CPU_COUNT} cores)")
+else:
+    print(f"   single core: 2 workers serve {scaling:.2f}× the requests of 1 — no headroom to scale into")
+if failures:
+    sys.exit("❌ " + "\n❌ ".join(failures))
+print("✅ Forked workers keep the preloaded model in shared pages")
@@ -0,0 +1,112 @@
+"""
+bench_price_grid.py  —  /predict/fast lattice: exactness, accuracy, latency
+===========================================================================
+Run with:  python bench_price_grid.py   (from the api/ folder)
+Input:     bundles/CURRENT (with a grid — python price_grid.py build),
+           ../data/clean_properties.csv
+
+Fails if the grid disagrees with the model at lattice points (no flags,
+knot land/floor — where no interpolation happens). Then reports how far
+the grid is from the live model on the real listings, and times a grid
+lookup against encode + predict for one row.
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bundle import ModelBundle, current_path
+from config import CONFIG
+from features import FLAG_INPUTS
+from price_grid import PROPERTY_TYPES, ROOM_AXES
+
+CLEAN   = "../data/clean_properties.csv"
+SAMPLES = 2000
+rng     = np.random.default_rng(0)
+
+path = current_path(CONFIG["bundle_dir"])
+b    = ModelBundle.load(path, CONFIG) if path else None
+if b is None or b.grid is None:
+    sys.exit("❌ CURRENT bundle has no price grid — run python price_grid.py build first")
+grid, axes = b.grid, b.grid.axes
+
+
+def live(bodies):
+    X, _, _, _ = b.encoder.encode_many(bodies)
+    return np.expm1(b.predict_log(X).astype(np.float64))
+
+
+def error_pct(bodies):
+    """(share on grid, |grid - model| / model in % for on-grid rows)."""
+    looked  = [grid.lookup(body) for body in bodies]
+    on_grid = np.array([v is not None for v in looked])
+    approx  = np.expm1(np.array([v for v in looked if v is not None], dtype=np.float64))
+    truth   = live([body for body, v in zip(bodies, looked) if v is not None])
+    return on_grid.mean(), np.abs(approx - truth) / truth * 100
+
+
+# ═══════════════════════════════════════════════════════
+# 1. EXACT AT LATTICE POINTS
+# ═══════════════════════════════════════════════════════
+knots = [{
+    "district":      str(rng.choice(axes["district"])),
+    "property_type": str(rng.choice(PROPERTY_TYPES)),
+    "location":      str(rng.choice(["", "Colombo 7"])),
+    **{key: int(rng.choice(axes[key])) for key in ROOM_AXES},
+    "land_size_p":   float(rng.choice(axes["land_size_p"])),
+    "floor_area":    float(rng.choice(axes["floor_area"])),
+} for _ in range(SAMPLES)]
+_, err = error_pct(knots)
+print(f"   lattice points          max error {err.max():.5f}%   ({len(knots)} points)")
+if err.max() > 1e-3:
+    sys.exit("❌ Grid disagrees with the model at lattice points")
+
+# ═══════════════════════════════════════════════════════
+# 2. ACCURACY ON REAL LISTINGS
+# ═══════════════════════════════════════════════════════
+df = pd.read_csv(CLEAN)
+types = {code: name for name, code in b.encoder.property_types.items() if name in PROPERTY_TYPES}
+listings = [{
+    "district":      b.district_classes[int(row.district_enc)],
+    "property_type": types[int(row.property_type_enc)],
+    "location":      "Colombo 7" if row.colombo_premium else "",
+    "bedrooms":      row.bedrooms,
+    "bathrooms":     row.bathrooms,
+    "storeys":       row.storeys,
+    "land_size_p":   row.land_size_p,
+    "floor_area":    row.floor_area_sqft,
+    **{key: int(getattr(row, key)) for key in FLAG_INPUTS},
+} for row in df.itertuples(index=False)]
+share, err = error_pct(listings)
+print(f"   clean listings          {share:.0%} on grid   MAPE {err.mean():.2f}%"
+      f"   p50 {np.percentile(err, 50):.2f}%   p95 {np.percentile(err, 95):.2f}%   max {err.max():.1f}%")
+report = axes.get("report") or {}
+print(f"   build report (random)   {report.get('on_grid', 0):.0%} on grid   MAPE {report.get('mape_pct')}%"
+      f"   p95 {report.get('p95_pct')}%")
+
+# ═══════════════════════════════════════════════════════
+# 3. LATENCY
+# ═══════════════════════════════════════════════════════
+bodies = [listings[i] for i in rng.integers(0, len(listings), SAMPLES)]
+
+
+def timed(fn):
+    times = []
+    for body in bodies:
+        started = time.perf_counter()
+        fn(body)
+        times.append(time.perf_counter() - started)
+    return np.array(times) * 1e6
+
+
+def model(body):
+    X, _ = b.encoder.encode_one(body)
+    return b.predict_log(X)
+
+
+for name, fn in (("grid lookup", grid.lookup), ("encode + predict", model)):
+    t = timed(fn)
+    print(f"   {name:<22}  mean {t.mean():7.1f} µs   p99 {np.percentile(t, 99):7.1f} µs")
+print("✅ Price grid exact at lattice points")
@@ -0,0 +1,150 @@
+"""
+bench_surrogate.py  —  /predict?tier=fast surrogate: fallback, accuracy, latency
+===============================================================================
+Run with:  python bench_surrogate.py   (from the api/ folder)
+Input:     bundles/CURRENT (with a surrogate — python surrogate.py build),
+           ../data/clean_properties.csv
+
+  1. surrogate.npz reloads to the same answers, and the one-row path
+     (Surrogate.answer) matches the batch one (Surrogate.predict)
+  2. tier=fast fallbacks — out-of-range input, an impossible error
+     threshold — return exactly the full model's /predict price, served
+     answers return the surrogate's, bad tiers are refused
+  3. accuracy vs the full model on the real listings (fails past
+     MAX_MAPE_PCT or under MIN_SERVED of rows served)
+  4. one-row latency: surrogate vs the full model (xgboost and arrays)
+"""
+
+import contextlib
+import io
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+    app.warmup()
+from config import CONFIG
+from features import FLAG_INPUTS
+from surrogate import Surrogate
+from tree_engine import TreeEnsemble
+
+MAX_MAPE_PCT = 5.0    # served answers vs the full model
+MIN_SERVED   = 0.5
+TARGET_US    = 50
+
+client = app.app.test_client()
+b = app.bundle
+if b.surrogate is None:
+    sys.exit("❌ CURRENT bundle has no surrogate — run python surrogate.py build first")
+s = b.surrogate
+
+df = pd.read_csv(CONFIG["clean_file"])
+X  = df[b.features].to_numpy(np.float32)
+full_log = b.booster.inplace_predict(X, validate_features=False).astype(np.float64)
+
+# ═══════════════════════════════════════════════════════
+# 1. ROUND TRIP + ONE-ROW PATH
+# ═══════════════════════════════════════════════════════
+with tempfile.TemporaryDirectory() as tmp:
+    s.save(f"{tmp}/surrogate.npz")
+    again = Surrogate.load(f"{tmp}/surrogate.npz")
+log_pred, estimate = s.predict(X)
+if not np.array_equal(again.predict(X)[0], log_pred):
+    sys.exit("❌ Reloaded surrogate.npz predicts differently")
+
+served = s.in_range(X) & (estimate <= s.max_error)
+one = [s.answer(x, s.max_error) for x in X]
+if [v is not None for v, _ in one] != served.tolist():
+    sys.exit("❌ Surrogate.answer and Surrogate.predict disagree on which rows are served")
+gap = max(abs(v - p) for (v, _), p in zip(one, log_pred) if v is not None)
+if gap > 1e-6:
+    sys.exit(f"❌ Surrogate.answer differs from Surrogate.predict (max {gap:.2e})")
+print(f"✅ Reload and one-row path agree ({served.sum()} of {len(X)} listings served, "
+      f"max gap {gap:.1e})")
+
+# ═══════════════════════════════════════════════════════
+# 2. TIER=FAST THROUGH /predict
+# ═══════════════════════════════════════════════════════
+BASE = {"district": "Kandy", "bedrooms": 3, "bathrooms": 2, "floor_area": 1800,
+        "land_size_p": 12, "location": "Peradeniya", "has_garden": 1}
+
+
+def post(body, query=""):
+    r = client.post(f"/predict{query}", json=body)
+    return r.status_code, r.get_json()
+
+
+def full_price(body):
+    return post(body, "?explain=false")[1]["predicted_price_lkr"]
+
+
+cases = [("in range", BASE, None),
+         ("out of range", {**BASE, "land_size_p": 1e6}, "out_of_range"),
+         ("NaN input", {**BASE, "floor_area": float("nan")}, "out_of_range")]
+for label, body, fallback in cases:
+    _, got = post(body, "?tier=fast")
+    if got.get("fallback") != fallback or "explanation" in got:
+        sys.exit(f"❌ tier=fast {label}: unexpected response {got}")
+    if fallback and got["predicted_price_lkr"] != full_price(body):
+        sys.exit(f"❌ tier=fast {label} fallback differs from the full model")
+
+saved = CONFIG["surrogate_max_error"]
+CONFIG["surrogate_max_error"] = 1e-9
+try:
+    _, got = post({**BASE, "tier": "fast"})
+finally:
+    CONFIG["surrogate_max_error"] = saved
+if got.get("fallback") != "uncertain" or got["predicted_price_lkr"] != full_price(BASE):
+    sys.exit(f"❌ tier=fast with an impossible error threshold: {got}")
+
+status, _ = post(BASE, "?tier=turbo")
+if status != 400:
+    sys.exit(f"❌ Unknown tier answered {status}, expected 400")
+print("✅ tier=fast serves the surrogate; out-of-range, NaN and uncertain inputs "
+      "get the full model's price; unknown tiers are refused")
+
+# ═══════════════════════════════════════════════════════
+# 3. ACCURACY vs THE FULL MODEL
+# ═══════════════════════════════════════════════════════
+pct = np.abs(np.expm1(log_pred - full_log)) * 100
+print(f"   clean listings   served {served.mean():.0%}   MAPE {pct[served].mean():.2f}%"
+      f"   p95 {np.percentile(pct[served], 95):.2f}%   max {pct[served].max():.1f}%"
+      f"   (fallen back: MAPE {pct[~served].mean() if (~served).any() else 0:.2f}%)")
+r = s.meta["report"]
+print(f"   build report     served {r['served']:.0%}   MAPE {r['served_error']['mape_pct']}%"
+      f"   p95 {r['served_error']['p95_pct']}%   (held-out jittered + synthetic inputs)")
+if served.mean() < MIN_SERVED or pct[served].mean() > MAX_MAPE_PCT:
+    sys.exit(f"❌ Surrogate serves {served.mean():.0%} of listings at "
+             f"{pct[served].mean():.2f}% MAPE (need ≥ {MIN_SERVED:.0%}, ≤ {MAX_MAPE_PCT}%)")
+
+# ═══════════════════════════════════════════════════════
+# 4. ONE-ROW LATENCY
+# ═══════════════════════════════════════════════════════
+rows = X[served][:200]
+arrays = TreeEnsemble.from_booster(b.booster)
+
+
+def best_us(fn):
+    """Best of 5 mean per-row times over the sample rows."""
+    for x in rows[:20]:
+        fn(x)
+    return min(timeit.repeat(lambda: [fn(x) for x in rows], number=5, repeat=5)) / (5 * len(rows)) * 1e6
+
+
+timings = {
+    "surrogate (checks included)": best_us(lambda x: s.answer(x, s.max_error)),
+    "full model, arrays engine":   best_us(lambda x: arrays.predict(x[None, :])),
+    "full model, xgboost":         best_us(lambda x: b.booster.inplace_predict(
+        x[None, :], validate_features=False)),
+}
+for name, us in timings.items():
+    print(f"   {name:<28} {us:7.1f} µs")
+fast = timings["surrogate (checks included)"]
+if fast >= min(v for k, v in timings.items() if k.startswith("full")):
+    sys.exit("❌ Surrogate is not faster than the full model")
+print(f"{'✅' if fast < TARGET_US else '⚠️ '} Surrogate answers in {fast:.1f} µs "
+      f"(target {TARGET_US} µs; {s.n_trees} trees, depth {s.depth}, {s.n_cuts} split points)")
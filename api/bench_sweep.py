@@ -0,0 +1,83 @@
+"""
+bench_sweep.py  —  /predict/sweep parity + cost vs single predictions
+=====================================================================
+Run with:  python bench_sweep.py   (from the api/ folder)
+
+Fails if any point of a land-size curve or a district × bedrooms surface
+differs from the price /predict returns for the same property, then
+times a 50-point sweep against one /predict call and against 50 of them.
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+    app.warmup()
+client = app.app.test_client()
+
+RUNS = 200
+BASE = {"district": "Kandy", "bedrooms": 3, "bathrooms": 2, "floor_area": 1800,
+        "location": "Peradeniya", "has_garden": 1}
+
+# ═══════════════════════════════════════════════════════
+# 1. PARITY vs /predict
+# ═══════════════════════════════════════════════════════
+def single_price(**overrides):
+    r = client.post("/predict?explain=false", json={**BASE, **overrides})
+    return r.get_json()["predicted_price_lkr"]
+
+
+curve = client.post("/predict/sweep", json={
+    "property": BASE, "vary": {"field": "land_size_p", "start": 2, "stop": 60, "steps": 50},
+}).get_json()
+land  = curve["axes"][0]["values"]
+want  = [single_price(land_size_p=v) for v in land]
+bad_curve = int(np.sum(np.array(want) != np.array(curve["predicted_price_lkr"])))
+
+districts = ["Colombo", "Galle", "Jaffna", "Nowhere"]
+surface = client.post("/predict/sweep", json={
+    "property": BASE,
+    "vary": [{"field": "district", "values": districts},
+             {"field": "bedrooms", "values": [1, 2, 3, 4, 5]}],
+    "explain_at": [[0, 2], [3, 4]],
+}).get_json()
+want = [[single_price(district=d, bedrooms=n) for n in [1, 2, 3, 4, 5]] for d in districts]
+bad_surface = int(np.sum(np.array(want) != np.array(surface["predicted_price_lkr"])))
+
+reference = client.post("/predict?explain=true", json={**BASE, "district": "Colombo",
+                                                       "bedrooms": 3}).get_json()
+bad_shap = surface["explanations"][0]["explanation"] != reference["explanation"]
+
+print(f"   land-size curve mismatches          {bad_curve} / {len(land)}")
+print(f"   district × bedrooms mismatches      {bad_surface} / {len(districts) * 5}")
+print(f"   SHAP at [0, 2] matches /predict     {not bad_shap}")
+if bad_curve or bad_surface or bad_shap:
+    sys.exit("❌ Sweep disagrees with /predict")
+
+# ═══════════════════════════════════════════════════════
+# 2. COST
+# ═══════════════════════════════════════════════════════
+def timed(fn):
+    fn()
+    started = time.perf_counter()
+    for _ in range(RUNS):
+        fn()
+    return (time.perf_counter() - started) / RUNS * 1000
+
+
+app.cache.clear()
+app.cache.max_items = 0   # measure model work, not cache hits
+one   = timed(lambda: client.post("/predict?explain=false", json=BASE))
+sweep = timed(lambda: client.post("/predict/sweep", json={
+    "property": BASE, "vary": {"field": "land_size_p", "start": 2, "stop": 60, "steps": 50}}))
+fifty = timed(lambda: [client.post("/predict?explain=false", json={**BASE, "land_size_p": v})
+                       for v in land])
+print(f"   one /predict                        {one:8.2f} ms")
+print(f"   50-point /predict/sweep             {sweep:8.2f} ms   ({sweep / one:.1f}× one request)")
+print(f"   50 × /predict                       {fifty:8.2f} ms")
+print("✅ Sweep matches /predict")
@@ -0,0 +1,47 @@
+"""
+bench_tree_engine.py  —  Array engine latency benchmark
+=======================================================
+Run with:  python bench_tree_engine.py   (from the api/ folder)
+Input:     xgb_model.pkl, feature_names.pkl, ../data/clean_properties.csv
+
+Times single-row and batch scoring for model.predict,
+booster.inplace_predict and the array engine. Parity with the booster
+is checked by tests/test_tree_engine.py (python -m pytest -q).
+"""
+
+import timeit
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from tree_engine import TreeEnsemble
+
+DATA_FILE = "../data/clean_properties.csv"
+REPEATS   = 2000
+
+model    = joblib.load("xgb_model.pkl")
+features = joblib.load("feature_names.pkl")
+booster  = model.get_booster()
+ensemble = TreeEnsemble.from_booster(booster)
+print(f"✅ Flattened {ensemble.n_trees} trees, {len(ensemble.value)} nodes, depth {ensemble.max_depth}")
+
+df = pd.read_csv(DATA_FILE)
+X  = df[features]
+Xf = X.to_numpy(dtype=np.float32)
+
+
+# ═══════════════════════════════════════════════════════
+# LATENCY
+# ═══════════════════════════════════════════════════════
+def per_call_us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+print(f"\n   {'rows':>6} {'model.predict':>15} {'inplace':>12} {'arrays':>12}")
+for n in [1, 4, 16, 64, 256, len(Xf)]:
+    Xb, Xdf = Xf[:n], X.iloc[:n]
+    number  = max(REPEATS // n, 10)
+    sk  = per_call_us(lambda: model.predict(Xdf), number)
+    inp = per_call_us(lambda: booster.inplace_predict(Xb, validate_features=False), number)
+    arr = per_call_us(lambda: ensemble.predict(Xb), number)
+    print(f"   {n:>6} {sk:>13.0f}µs {inp:>10.0f}µs {arr:>10.0f}µs")
@@ -0,0 +1,271 @@
+"""
+bulk_score.py  —  Score a large CSV / Parquet export of listings
+=================================================================
+Run with:  python bulk_score.py INPUT OUTPUT [options]   (from the api/ folder)
+
+INPUT and OUTPUT are .csv or .parquet files (or say so with --input-format
+/ --output-format). Input columns are named like /predict fields
+(district, location, property_type, bedrooms, floor_area, has_pool, ...);
+the training names floor_area_sqft etc. are accepted too, so scraped
+exports score as they are. Missing columns, empty cells and unparseable
+numbers take the /predict defaults, and are counted in the summary.
+
+  --bundle DIR     bundle to score with (default bundles/CURRENT)
+  --chunk-rows N   rows read, scored and written at a time (default 50,000)
+  --workers N      scoring processes (default one per core; 0 = this process)
+  --top-k K        add top1_feature / top1_shap ... topK_* SHAP columns
+                   (exact TreeSHAP runs a few hundred rows/s per core;
+                   EV_EXPLAINER_APPROX=1 is ~100× faster)
+  --keep a,b       input columns copied to the output (CSV ones as text)
+
+The input is read one chunk at a time and chunks are fanned out to a
+process pool, each worker holding its own copy of the bundle. At most
+two chunks per worker are in flight, and results are appended to the
+output in input order as they come back, so peak memory depends on
+--chunk-rows and --workers, not on the size of the input.
+
+Encoding is FeatureEncoder.encode_columns, the /predict/columnar path,
+and prices are rounded as /predict rounds them.
+"""
+
+import argparse
+import collections
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from bundle import ModelBundle, current_path
+from columnar import STRING_COLUMNS
+from config import CONFIG
+from features import NUMERIC_INPUTS, FLAG_INPUTS
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+
+# input column name → request key; the key itself or the training column name
+ALIASES = {name: key for feature, key, _ in NUMERIC_INPUTS for name in (key, feature)}
+ALIASES.update({key: key for key in list(FLAG_INPUTS) + list(STRING_COLUMNS)})
+DEFAULTS = {key: float(default) for _, key, default in NUMERIC_INPUTS}
+DEFAULTS.update({key: 0.0 for key in FLAG_INPUTS})
+
+
+def file_format(path, override=None):
+    fmt = override or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in ("csv", "parquet"):
+        sys.exit(f"❌ Can't tell the format of {path}; pass --input-format / --output-format")
+    return fmt
+
+
+# ── Reading ───────────────────────────────────────────────────
+def read_chunks(path, fmt, chunk_rows, keep):
+    """DataFrames of up to chunk_rows rows with the feature and kept columns only."""
+    if fmt == "csv":
+        header = pd.read_csv(path, nrows=0).columns
+        wanted = [c for c in header if c in ALIASES or c in keep]
+        # Kept and string columns stay text, so chunks agree on their types
+        text = {c: str for c in wanted if c in keep or ALIASES.get(c) in STRING_COLUMNS}
+        yield from pd.read_csv(path, usecols=wanted, dtype=text, chunksize=chunk_rows)
+    else:
+        import pyarrow.parquet as pq
+        source = pq.ParquetFile(path)
+        wanted = [c for c in source.schema_arrow.names if c in ALIASES or c in keep]
+        for batch in source.iter_batches(batch_size=chunk_rows, columns=wanted):
+            yield batch.to_pandas()
+
+
+def frame_columns(df):
+    """(columns for encode_columns, count of unparseable cells) from one chunk."""
+    columns, invalid = {}, 0
+    for name in df.columns:
+        key = ALIASES.get(name)
+        if key is None or key in columns:
+            continue
+        if key in STRING_COLUMNS:
+            values = df[name].where(df[name].notna(), STRING_COLUMNS[key]).astype(str)
+            codes, uniques = pd.factorize(values)
+            columns[key] = codes.astype(np.intp, copy=False), list(uniques)
+        else:
+            values = pd.to_numeric(df[name], errors="coerce")
+            invalid += int((values.isna() & df[name].notna()).sum())
+            columns[key] = values.fillna(DEFAULTS[key]).to_numpy(np.float64)
+    return columns, invalid
+
+
+# ── Scoring (runs in the workers) ─────────────────────────────
+_bundle = None
+
+
+def load_bundle(path, threads=1):
+    """The bundle at path, or the one bundles/CURRENT names, or the loose files."""
+    global _bundle
+    path = path or current_path(CONFIG["bundle_dir"])
+    if path is None:
+        _bundle = ModelBundle.from_loose_files(CONFIG, CONFIG["model_file"],
+                                               "feature_names.pkl", "district_encoder.pkl")
+    else:
+        _bundle = ModelBundle.load(path, CONFIG)
+    _bundle.set_threads(threads)
+    return _bundle
+
+
+def score_chunk(df, keep, top_k):
+    """(output DataFrame, unparseable cells) for one input chunk."""
+    b = _bundle
+    columns, invalid = frame_columns(df)
+    X = b.encoder.encode_columns(len(df), columns)
+    prices = np.expm1(b.predict_log(X)).astype(np.float64)
+
+    out = df[[c for c in keep if c in df.columns]].reset_index(drop=True)
+    out["predicted_price_lkr"] = np.round(prices).astype(np.int64)
+    out["predicted_price_mn"]  = np.round(prices / 1_000_000, 2)
+    if top_k:
+        contribs = b.explainer.shap_values(X)
+        # Stable sort on -|SHAP|: ties keep feature order, as top_explanation does
+        order = np.argsort(-np.abs(contribs), axis=1, kind="stable")[:, :top_k]
+        names = np.array(b.features, dtype=object)
+        for r in range(order.shape[1]):
+            out[f"top{r + 1}_feature"] = names[order[:, r]]
+            out[f"top{r + 1}_shap"] = np.round(
+                np.take_along_axis(contribs, order[:, r:r + 1], axis=1)[:, 0].astype(np.float64), 4)
+    return out, invalid
+
+
+# ── Writing ───────────────────────────────────────────────────
+class CSVSink:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """One row group per chunk; the first chunk fixes the schema."""
+
+    def __init__(self, path):
+        import pyarrow.parquet   # imported up front so a missing pyarrow fails before scoring
+        self.path   = path
+        self.writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self.writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+SINKS = {"csv": CSVSink, "parquet": ParquetSink}
+
+
+# ── Driver ────────────────────────────────────────────────────
+class InlinePool:
+    """--workers 0: score in this process, same interface as the pool."""
+
+    class Done:
+        def __init__(self, value):
+            self.value = value
+
+        def result(self):
+            return self.value
+
+    def submit(self, fn, *args):
+        return self.Done(fn(*args))
+
+    def shutdown(self):
+        pass
+
+
+def run(input_path, output_path, input_format, output_format, bundle_path=None,
+        chunk_rows=50_000, workers=None, top_k=0, keep=(), progress_s=2.0):
+    """Score input_path into output_path; returns the summary dict."""
+    workers = os.cpu_count() if workers is None else workers
+    if workers > 0:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=load_bundle,
+                                   initargs=(bundle_path, CONFIG["xgb_threads"] or 1))
+    else:
+        load_bundle(bundle_path, CONFIG["xgb_threads"] or 0)
+        pool = InlinePool()
+    sink = SINKS[output_format](output_path)
+
+    rows = invalid = chunks = 0
+    pending = collections.deque()
+    started = last_report = time.perf_counter()
+
+    def drain(limit):
+        nonlocal rows, invalid, chunks, last_report
+        while len(pending) > limit:
+            out, bad = pending.popleft().result()   # oldest first keeps input order
+            sink.write(out)
+            rows, invalid, chunks = rows + len(out), invalid + bad, chunks + 1
+            now = time.perf_counter()
+            if progress_s and now - last_report >= progress_s:
+                last_report = now
+                print(f"🔄 {rows:>12,} rows   {rows / (now - started):>10,.0f} rows/s")
+
+    try:
+        for df in read_chunks(input_path, input_format, chunk_rows, keep):
+            pending.append(pool.submit(score_chunk, df, keep, top_k))
+            drain(2 * max(workers, 1) - 1)
+        drain(0)
+    finally:
+        pool.shutdown()
+        sink.close()
+
+    elapsed = time.perf_counter() - started
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return {"rows": rows, "chunks": chunks, "seconds": elapsed,
+            "rows_per_s": rows / elapsed if elapsed else 0.0,
+            "invalid_values": invalid, "peak_rss_mb": peak_kb / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV / Parquet file of listings.")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--input-format", choices=["csv", "parquet"])
+    parser.add_argument("--output-format", choices=["csv", "parquet"])
+    parser.add_argument("--bundle", help="bundle directory (default bundles/CURRENT)")
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, help="scoring processes, 0 = in-process")
+    parser.add_argument("--top-k", type=int, default=0, help="SHAP contributions per row")
+    parser.add_argument("--keep", help="comma-separated input columns to copy through")
+    args = parser.parse_args()
+
+    if args.chunk_rows < 1:
+        sys.exit("❌ --chunk-rows must be at least 1")
+    if args.top_k and CONFIG["explainer"] == "none":
+        sys.exit("❌ --top-k needs an explainer (EV_EXPLAINER is none)")
+    input_format  = file_format(args.input, args.input_format)
+    output_format = file_format(args.output, args.output_format)
+    keep = [c for c in args.keep.split(",") if c] if args.keep else []
+
+    print(f"🔄 Scoring {args.input} → {args.output} in chunks of {args.chunk_rows:,} rows, "
+          f"{'in-process' if args.workers == 0 else f'{args.workers or os.cpu_count()} workers'}")
+    summary = run(args.input, args.output, input_format, output_format, args.bundle,
+                  args.chunk_rows, args.workers, args.top_k, keep)
+    if summary["invalid_values"]:
+        print(f"   {summary['invalid_values']:,} unparseable values scored with defaults")
+    print(f"✅ {summary['rows']:,} rows in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_s']:,.0f} rows/s, peak RSS {summary['peak_rss_mb']:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
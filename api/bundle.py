@@ -0,0 +1,365 @@
+"""
+bundle.py  —  Versioned model bundle
+=====================================
+One directory per training run, holding the booster plus a manifest.json
+with the feature order, district classes and the tier / premium-area /
+property-type tables used to encode requests. A single content hash over
+all of it is the bundle version, so the API can never mix a model with
+an encoder from a different run.
+
+    bundles/
+      CURRENT                 ← name of the active bundle directory
+      <version>/
+        manifest.json
+        model.ubj
+        gazetteer.json        ← district names and aliases the encoder
+                                 resolves location text with
+        listings.csv          ← listings for /comparables, trimmed to the
+                                 columns it serves (optional)
+        global_explanation.json ← /explain/global (optional)
+        drift_reference.json  ← training histograms for /drift (optional)
+        price_grid*.npy/.json ← lattice for /predict/fast (train_model.py,
+                                 compress.py build or python price_grid.py
+                                 build; not in git — built at deploy)
+        model_arrays.npz      ← float16 tree arrays for engine=arrays
+                                 (optional, added by python compress.py build)
+        surrogate.npz         ← distilled model for /predict?tier=fast
+                                 (optional, train_model.py or
+                                  python surrogate.py build)
+
+Files are sha256-hashed when the bundle is written; python bundle.py
+verify re-hashes them (run it once at deploy). Loading — cold start,
+SIGHUP, /admin/reload — only checks every file is present at its
+recorded size, unless EV_BUNDLE_VERIFY=1 asks for the full check.
+
+Run with:  python bundle.py build     (from the api/ folder — packs
+                                        xgb_model.ubj, feature_names.pkl,
+                                        district_encoder.pkl and the
+                                        trimmed listings file)
+           python bundle.py verify [bundles/<version>]
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import xgboost as xgb
+
+from comparables import ComparablesIndex, pack_listings
+from drift import DriftMonitor
+from price_grid import PriceGrid
+from surrogate import Surrogate
+from explain import load_explainer
+from features import FeatureEncoder, DISTRICT_TIERS, PROPERTY_TYPE_MAP
+from locations import GAZETTEER_FILE, PREMIUM_AREAS, load_gazetteer, save_gazetteer
+
+MANIFEST   = "manifest.json"
+CURRENT    = "CURRENT"
+MODEL_FILE = "model.ubj"
+FORMAT     = 1
+
+
+class BundleError(Exception):
+    """A bundle is missing, incomplete or fails its hash check."""
+
+
+def load_booster(path):
+    """Booster from a native .ubj/.json model, or from a pickled XGBRegressor."""
+    if path.endswith((".ubj", ".json")):
+        return xgb.Booster(model_file=path)
+    import joblib
+    return joblib.load(path).get_booster()
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def content_hash(file_hashes, tables):
+    """One hash over every file's hash and the canonical JSON of the tables."""
+    h = hashlib.sha256()
+    for name in sorted(file_hashes):
+        h.update(f"{name}:{file_hashes[name]}\n".encode())
+    h.update(json.dumps(tables, sort_keys=True, separators=(",", ":")).encode())
+    return h.hexdigest()
+
+
+def make_tables(features, district_classes, district_tiers=DISTRICT_TIERS,
+                premium_areas=PREMIUM_AREAS, property_types=PROPERTY_TYPE_MAP):
+    """Everything besides the model that request encoding depends on."""
+    return {
+        "features":         list(features),
+        "district_classes": [str(d) for d in district_classes],
+        "district_tiers":   dict(district_tiers),
+        "premium_areas":    list(premium_areas),
+        "property_types":   dict(property_types),
+    }
+
+
+# ═══════════════════════════════════════════════════════
+# WRITING
+# ═══════════════════════════════════════════════════════
+def write_bundle(root, model_path, tables, extra_files=None, extra=None, make_current=True):
+    """Pack a model, its tables and any extra artifacts into root/<version>/.
+
+    extra_files maps manifest names to source paths (copied in and hashed);
+    extra is free-form JSON metadata stored in the manifest. The directory
+    is written under a temporary name and renamed into place, and CURRENT
+    is replaced atomically, so readers never see a half-written bundle.
+    """
+    files = {"model": model_path, **(extra_files or {})}
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=root)
+    os.chmod(staging, 0o755)
+
+    names = {}
+    for name, src in files.items():
+        filename = MODEL_FILE if name == "model" else os.path.basename(src)
+        shutil.copyfile(src, os.path.join(staging, filename))
+        names[name] = filename
+    if "gazetteer" not in names:
+        # Encoding resolves districts through the gazetteer, so every
+        # bundle carries (and hashes) the one it was packed with
+        save_gazetteer(os.path.join(staging, GAZETTEER_FILE))
+        names["gazetteer"] = GAZETTEER_FILE
+    hashes = {name: _sha256(os.path.join(staging, f)) for name, f in names.items()}
+    sizes  = {name: os.path.getsize(os.path.join(staging, f)) for name, f in names.items()}
+
+    digest   = content_hash(hashes, tables)
+    version  = digest[:12]
+    manifest = {
+        "format":       FORMAT,
+        "version":      version,
+        "content_hash": digest,
+        "created_at":   time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "files":        names,
+        "sha256":       hashes,
+        "bytes":        sizes,
+        "tables":       tables,
+        "extra":        extra or {},
+    }
+    with open(os.path.join(staging, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    target = os.path.join(root, version)
+    if os.path.exists(target):
+        shutil.rmtree(staging)           # identical content already packed
+    else:
+        os.rename(staging, target)
+    if make_current:
+        set_current(root, version)
+    return manifest
+
+
+def repack_bundle(root, bundle, extra_files, extra=None, make_current=True, model_path=None):
+    """A new bundle with the same model and tables as `bundle`, plus or
+    replacing the named extra artifacts (None drops one) and merged
+    manifest extras. model_path swaps in a different model file."""
+    read_manifest(bundle.path)   # full hash check — never re-hash a damaged file as valid
+    files = {name: bundle.file_path(name) for name in bundle.manifest["files"]
+             if name != "model" and name not in extra_files}
+    files.update({name: src for name, src in extra_files.items() if src is not None})
+    return write_bundle(root, model_path or bundle.file_path("model"), bundle.manifest["tables"],
+                        files, {**bundle.manifest.get("extra", {}), **(extra or {})}, make_current)
+
+
+def set_current(root, version):
+    tmp = os.path.join(root, f".{CURRENT}.tmp")
+    with open(tmp, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp, os.path.join(root, CURRENT))
+
+
+# ═══════════════════════════════════════════════════════
+# READING
+# ═══════════════════════════════════════════════════════
+def current_path(root):
+    """Directory of the active bundle, or None if root has no CURRENT pointer."""
+    pointer = os.path.join(root, CURRENT)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        return os.path.join(root, f.read().strip())
+
+
+def read_manifest(path, verify=True):
+    """Load a bundle's manifest and check the files beside it.
+
+    Every file must exist at its recorded size; verify=True also
+    re-hashes them against sha256 and the content hash.
+    """
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise BundleError(f"No {MANIFEST} in {path}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    hashes, sizes = {}, manifest.get("bytes", {})   # no sizes in older bundles
+    for name, filename in manifest["files"].items():
+        file_path = os.path.join(path, filename)
+        if not os.path.exists(file_path):
+            raise BundleError(f"Bundle {path} is missing {filename}")
+        if name in sizes and os.path.getsize(file_path) != sizes[name]:
+            raise BundleError(f"Size mismatch for {filename} in {path}")
+        if not verify:
+            continue
+        hashes[name] = _sha256(file_path)
+        if hashes[name] != manifest["sha256"][name]:
+            raise BundleError(f"Hash mismatch for {filename} in {path}")
+    if verify and content_hash(hashes, manifest["tables"]) != manifest["content_hash"]:
+        raise BundleError(f"Content hash mismatch in {path}")
+    return manifest
+
+
+class ModelBundle:
+    """Everything one request needs, loaded together from one bundle.
+
+    Request handlers take a single reference to the active bundle and use
+    it throughout, so a reload swapping in a new bundle never mixes two
+    models inside one request.
+    """
+
+    def __init__(self, manifest, path, booster, config):
+        tables = manifest["tables"]
+        self.manifest = manifest
+        self.path     = path
+        self.version  = manifest["version"]
+        self.booster  = booster
+        self.features = tables["features"]
+        self.district_classes = tables["district_classes"]
+        gazetteer = self.file_path("gazetteer")   # absent in older bundles
+        self.encoder  = FeatureEncoder(
+            self.features, self.district_classes,
+            district_tiers=tables["district_tiers"],
+            premium_areas=tables["premium_areas"],
+            property_types=tables["property_types"],
+            gazetteer=load_gazetteer(gazetteer) if gazetteer else None,
+        )
+        self.explainer = load_explainer(config, booster)   # built on first use
+        self.arrays_max_rows = config["arrays_max_rows"]
+        self.ensemble = None
+        if config["engine"] == "arrays":
+            from tree_engine import TreeEnsemble
+            # Packed float16 arrays (python compress.py build) skip the JSON walk
+            if self.file_path("ensemble") is not None:
+                self.ensemble = TreeEnsemble.load(self.file_path("ensemble"))
+            else:
+                self.ensemble = TreeEnsemble.from_booster(booster)
+
+        # Comparable listings — packed with the bundle, else the live file
+        listings = self.file_path("listings") or config["listings_file"]
+        self.comparables = None
+        if listings and os.path.exists(listings):
+            self.comparables = ComparablesIndex.from_csv(listings, self.encoder.property_types,
+                                                         self.encoder.resolve_district)
+
+        # Model-wide SHAP summary for /explain/global, served as stored bytes
+        self.global_explanation = None
+        if self.file_path("global_explanation") is not None:
+            with open(self.file_path("global_explanation"), "rb") as f:
+                self.global_explanation = f.read()
+
+        # Training-time histograms the live input-drift sketches are scored against
+        self.drift = None
+        if self.file_path("drift_reference") is not None:
+            with open(self.file_path("drift_reference")) as f:
+                self.drift = DriftMonitor(json.load(f), config["drift_window_s"])
+
+        # Precomputed price lattice for /predict/fast (python price_grid.py build)
+        self.grid = None
+        if self.file_path("grid") is not None:
+            self.grid = PriceGrid.load(self.file_path("grid"), self.file_path("grid_flags"),
+                                       self.file_path("grid_axes"), self.encoder)
+
+        # Distilled fast-tier model for /predict?tier=fast (surrogate.py)
+        self.surrogate = None
+        if self.file_path("surrogate") is not None:
+            self.surrogate = Surrogate.load(self.file_path("surrogate"))
+
+    @classmethod
+    def load(cls, path, config):
+        manifest = read_manifest(path, verify=config["bundle_verify"])
+        booster  = xgb.Booster(model_file=os.path.join(path, manifest["files"]["model"]))
+        return cls(manifest, path, booster, config)
+
+    @classmethod
+    def from_loose_files(cls, config, model_file, features_file, encoder_file):
+        """Legacy layout: separate model/feature/encoder files in the working dir."""
+        import joblib
+        booster = load_booster(model_file)
+        tables = make_tables(joblib.load(features_file), joblib.load(encoder_file).classes_)
+        hashes = {"model": _sha256(model_file)}
+        digest = content_hash(hashes, tables)
+        manifest = {"format": FORMAT, "version": digest[:12], "content_hash": digest,
+                    "created_at": None, "files": {"model": model_file},
+                    "sha256": hashes, "tables": tables, "extra": {}}
+        return cls(manifest, ".", booster, config)
+
+    def file_path(self, name):
+        """Path of an extra artifact packed into this bundle (None if absent)."""
+        filename = self.manifest["files"].get(name)
+        return None if filename is None else os.path.join(self.path, filename)
+
+    def set_threads(self, n):
+        self.booster.set_param({"nthread": n})
+
+    def predict_log(self, X):
+        """Log-price predictions for a float32 feature matrix (no sklearn wrapper)."""
+        if self.ensemble is not None and len(X) <= self.arrays_max_rows:
+            return self.ensemble.predict(X)
+        return self.booster.inplace_predict(X, validate_features=False)
+
+    def summary(self):
+        return {
+            "version":    self.version,
+            "created_at": self.manifest.get("created_at"),
+            "path":       self.path,
+            "features":   len(self.features),
+            "comparables": self.comparables.stats() if self.comparables is not None else None,
+            "grid":        self.grid.stats() if self.grid is not None else None,
+            "surrogate":   self.surrogate.stats() if self.surrogate is not None else None,
+            "global_explanation": self.global_explanation is not None,
+        }
+
+
+# ═══════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════
+def main(argv):
+    from config import CONFIG
+    command = argv[1] if len(argv) > 1 else "build"
+    root = CONFIG["bundle_dir"]
+
+    if command == "build":
+        import joblib
+        tables = make_tables(joblib.load("feature_names.pkl"),
+                             joblib.load("district_encoder.pkl").classes_)
+        staging = tempfile.mkdtemp()
+        model_file = os.path.join(staging, MODEL_FILE)
+        load_booster(CONFIG["model_file"]).save_model(model_file)
+        extra_files = {}
+        if os.path.exists(CONFIG["listings_file"]):
+            extra_files["listings"] = pack_listings(CONFIG["listings_file"], staging)
+        manifest = write_bundle(root, model_file, tables, extra_files)
+        print(f"✅ Bundle {manifest['version']} written to {os.path.join(root, manifest['version'])}")
+        print(f"   {CURRENT} → {manifest['version']}")
+    elif command == "verify":
+        path = argv[2] if len(argv) > 2 else current_path(root)
+        if path is None:
+            sys.exit(f"No {CURRENT} bundle under {root}")
+        manifest = read_manifest(path)
+        print(f"✅ Bundle {manifest['version']} OK ({len(manifest['files'])} files)")
+    else:
+        sys.exit(f"Unknown command: {command}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
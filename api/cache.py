@@ -0,0 +1,84 @@
+"""
+cache.py  —  In-process prediction cache
+=========================================
+/predict traffic is dominated by a few input combinations (the frontend
+defaults, popular districts). Results are cached on the fully encoded
+float32 feature row, so requests that differ only in ways the model
+cannot see (e.g. "Colombo" vs an unknown district that falls back to
+Colombo) share one entry.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Size-bounded LRU with optional TTL and hit/miss/eviction counters.
+
+    Every clear() bumps `generation`; put() calls tagged with an older
+    generation are ignored, so a result computed against a model that has
+    since been reloaded never lands in the fresh cache.
+    """
+
+    def __init__(self, max_items, ttl_s=0):
+        self.max_items  = max_items
+        self.ttl_s      = ttl_s
+        self.generation = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self._items = OrderedDict()   # key -> (stored_at, value)
+        self._lock  = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_items > 0
+
+    def get(self, key):
+        """Cached value for key, or None (counted as a miss)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttl_s and time.monotonic() - entry[0] > self.ttl_s:
+                del self._items[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, generation=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry — called whenever the model is (re)loaded."""
+        with self._lock:
+            self._items.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size":        len(self._items),
+                "capacity":    self.max_items,
+                "ttl_s":       self.ttl_s,
+                "hits":        self.hits,
+                "misses":      self.misses,
+                "evictions":   self.evictions,
+                "expirations": self.expirations,
+                "hit_rate":    round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,152 @@
+"""
+columnar.py  —  Arrow IPC / msgpack column codecs for bulk scoring
+===================================================================
+Decodes a columnar request body into what FeatureEncoder.encode_columns
+takes — NumPy arrays for numeric columns, (codes, values) pairs for
+string columns — and encodes result columns back in the same format.
+
+  Arrow    Content-Type: application/vnd.apache.arrow.stream
+           One IPC stream; a column per request field. Numeric columns
+           without nulls are viewed in place (no copy), strings are
+           dictionary-encoded in Arrow's C++ kernels.
+  msgpack  Content-Type: application/msgpack
+           A map of field name → column, where a column is either a list
+           or a typed buffer {"dtype": "<f8", "data": <bin>} that is read
+           with np.frombuffer (no copy). Responses are
+           {"columns": {name: typed buffer}, "metadata": {...}}.
+
+pyarrow and msgpack are optional; they are only imported when a request
+in that format arrives.
+"""
+
+import numpy as np
+
+ARROW   = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+FORMATS = {ARROW: "arrow", MSGPACK: "msgpack", "application/x-msgpack": "msgpack"}
+
+STRING_COLUMNS = {"district": "Colombo", "property_type": "house", "location": ""}
+
+
+class CodecUnavailable(Exception):
+    """The library for the requested format is not installed."""
+
+
+def media_format(content_type):
+    """"arrow" / "msgpack" for a Content-Type header, else None."""
+    return FORMATS.get((content_type or "").split(";")[0].strip().lower())
+
+
+def _no_nan(name, array):
+    """array, unless a float column holds NaN — both formats refuse those alike."""
+    if array.dtype.kind == "f" and np.isnan(array).any():
+        raise ValueError(f"Column {name!r} must not contain nulls")
+    return array
+
+
+def _import(name):
+    try:
+        return __import__(name)
+    except ImportError:
+        raise CodecUnavailable(f"{name} is not installed on this server")
+
+
+# ═══════════════════════════════════════════════════════
+# ARROW
+# ═══════════════════════════════════════════════════════
+def _arrow_strings(column, default):
+    import pyarrow.compute as pc
+    encoded = pc.dictionary_encode(column.combine_chunks().fill_null(default))
+    return (encoded.indices.to_numpy(zero_copy_only=False).astype(np.intp, copy=False),
+            encoded.dictionary.to_pylist())
+
+
+def _arrow_numeric(name, column):
+    column = column.combine_chunks()   # no copy for a single-batch stream
+    if column.null_count:
+        raise ValueError(f"Column {name!r} must not contain nulls")
+    return _no_nan(name, column.to_numpy(zero_copy_only=False))
+
+
+def read_arrow(data, numeric_fields):
+    """(n_rows, columns) from an Arrow IPC stream; unknown columns are ignored."""
+    pa = _import("pyarrow")
+    import pyarrow.ipc
+    table = pyarrow.ipc.open_stream(pa.py_buffer(data)).read_all()
+    columns = {}
+    for name in table.column_names:
+        column = table.column(name)
+        if name not in STRING_COLUMNS and name not in numeric_fields:
+            continue
+        if name in STRING_COLUMNS:
+            if not pa.types.is_string(column.type) and not pa.types.is_large_string(column.type):
+                raise ValueError(f"Column {name!r} must be strings")
+            columns[name] = _arrow_strings(column, STRING_COLUMNS[name])
+        else:
+            if not (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)
+                    or pa.types.is_boolean(column.type)):
+                raise ValueError(f"Column {name!r} must be numeric")
+            columns[name] = _arrow_numeric(name, column)
+    return table.num_rows, columns
+
+
+def write_arrow(columns, metadata=None):
+    pa = _import("pyarrow")
+    import pyarrow.ipc
+    table = pa.table(columns, metadata={k: str(v) for k, v in (metadata or {}).items()})
+    sink = pa.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# ═══════════════════════════════════════════════════════
+# MSGPACK
+# ═══════════════════════════════════════════════════════
+def _msgpack_column(name, value):
+    if isinstance(value, dict):
+        try:
+            array = np.frombuffer(value["data"], dtype=np.dtype(value["dtype"]))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Column {name!r}: typed columns need dtype and data ({e})")
+        if array.dtype.kind not in "iufb":
+            raise ValueError(f"Column {name!r} must be numeric")
+        return _no_nan(name, array)
+    if not isinstance(value, list):
+        raise ValueError(f"Column {name!r} must be a list or a typed buffer")
+    if name in STRING_COLUMNS:
+        import pandas as pd
+        default = STRING_COLUMNS[name]
+        codes, uniques = pd.factorize(np.array([default if v is None else v for v in value],
+                                               dtype=object))
+        if any(not isinstance(u, str) for u in uniques):
+            raise ValueError(f"Column {name!r} must be strings")
+        return codes.astype(np.intp, copy=False), list(uniques)
+    return _no_nan(name, np.asarray(value, dtype=np.float64))
+
+
+def read_msgpack(data, numeric_fields):
+    """(n_rows, columns) from a msgpack map of columns; unknown columns are ignored."""
+    msgpack = _import("msgpack")
+    payload = msgpack.unpackb(data, raw=False)
+    if not isinstance(payload, dict) or not payload:
+        raise ValueError("Expected a map of column name → column")
+    columns = {name: _msgpack_column(name, value) for name, value in payload.items()
+               if name in STRING_COLUMNS or name in numeric_fields}
+    if not columns:
+        raise ValueError("No known columns in payload")
+    lengths = {len(c[0]) if isinstance(c, tuple) else len(c) for c in columns.values()}
+    if len(lengths) != 1:
+        raise ValueError("All columns must have the same length")
+    return lengths.pop(), columns
+
+
+def write_msgpack(columns, metadata=None):
+    msgpack = _import("msgpack")
+    packed = {name: {"dtype": array.dtype.str, "data": np.ascontiguousarray(array).tobytes()}
+              for name, array in columns.items()}
+    return msgpack.packb({"columns": packed, "metadata": metadata or {}}, use_bin_type=True)
+
+
+READERS = {"arrow": read_arrow, "msgpack": read_msgpack}
+WRITERS = {"arrow": (write_arrow, ARROW), "msgpack": (write_msgpack, MSGPACK)}
@@ -0,0 +1,235 @@
+"""
+comparables.py  —  Nearest real listings for a property
+========================================================
+Listings from the scraper's raw_properties.csv (URL, title, price) are
+partitioned by (district, property type) — both hard filters — and each
+partition gets its own KD-tree over scaled numeric features:
+
+    bedrooms, bathrooms, log1p(land_size_p), log1p(floor_area_sqft)
+
+each standardised with the spread of the listings the index was first
+built from. A query is one tree lookup in one partition, never a scan.
+
+Listings and queries are both partitioned by resolved district — the
+district class FeatureEncoder.resolve_district maps the text to — so
+"Nugegoda" or "colombo 7" finds the Colombo listings the model priced
+it as, not an empty partition of its own.
+
+Bundles pack a trimmed copy of the listings (pack_listings): only the
+columns /comparables reads or returns, never the scraped description
+text with its sellers' phone numbers.
+
+New scraped rows are added with ingest(): only the partitions that
+received listings are rebuilt, and each rebuilt partition is swapped in
+with a single assignment, so queries never see a half-built tree.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from features import NUMERIC_INPUTS
+
+SPACE       = ["bedrooms", "bathrooms", "land_size_p", "floor_area_sqft"]
+LOG_SCALED  = ["land_size_p", "floor_area_sqft"]
+PRICE_RANGE = (500_000, 600_000_000)   # same outlier filter as preprocess.py
+
+LISTINGS_FILE   = "listings.csv"
+LISTING_COLUMNS = ["url", "title", "location", "district", "property_type", "price_lkr", *SPACE]
+
+# Request key for each index column (floor_area_sqft arrives as floor_area)
+REQUEST_KEYS = {feature: (key, default) for feature, key, default in NUMERIC_INPUTS}
+
+
+def load_listings(path):
+    """Listings with a URL and a plausible price, as scraped."""
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    df = df.dropna(subset=["url", "price_lkr"])
+    df = df[df["price_lkr"].between(*PRICE_RANGE)]
+    return df.drop_duplicates(subset="url", keep="last")
+
+
+def pack_listings(src, directory):
+    """Write src's listings, trimmed to LISTING_COLUMNS, into directory; returns the path."""
+    df = load_listings(src)
+    path = os.path.join(directory, LISTINGS_FILE)
+    df.reindex(columns=LISTING_COLUMNS).to_csv(path, index=False)
+    return path
+
+
+class _Partition:
+    __slots__ = ("points", "records", "tree")
+
+    def __init__(self, points, records):
+        self.points  = points
+        self.records = records
+        self.tree    = cKDTree(points)
+
+
+class ComparablesIndex:
+    """(district, property type) → KD-tree of listings."""
+
+    def __init__(self, listings, property_types, resolve_district=None):
+        self.property_types   = property_types
+        self.resolve_district = resolve_district
+        self.medians = {c: float(listings[c].median()) for c in SPACE if c != "floor_area_sqft"}
+        self.medians["floor_area_sqft"] = 0.0      # 0 = land only, as in preprocess.py
+        space = self._space(listings)
+        self.center = space.mean(axis=0)
+        self.scale  = np.where(space.std(axis=0) > 0, space.std(axis=0), 1.0)
+
+        self.source_mtime = None
+        self._urls        = set()
+        self._partitions  = {}
+        self._lock        = threading.Lock()
+        self._add(listings)
+
+    @classmethod
+    def from_csv(cls, path, property_types, resolve_district=None):
+        index = cls(load_listings(path), property_types, resolve_district)
+        index.source_mtime = os.stat(path).st_mtime
+        return index
+
+    def __len__(self):
+        return len(self._urls)
+
+    # ── Building ─────────────────────────────────────────────
+    def _key(self, district, property_type):
+        if self.resolve_district is not None:
+            district = self.resolve_district(district)
+        return (str(district).strip().lower(),
+                self.property_types.get(str(property_type).strip().lower(), 0))
+
+    def _space(self, df):
+        filled = pd.DataFrame({c: df[c].fillna(self.medians[c]) if c in df else self.medians[c]
+                               for c in SPACE}, index=df.index)
+        for c in LOG_SCALED:
+            filled[c] = np.log1p(filled[c].clip(lower=0))
+        return filled[SPACE].to_numpy(dtype=np.float64)
+
+    def _records(self, df):
+        out = []
+        for row in df.itertuples(index=False):
+            price = float(row.price_lkr)
+            out.append({
+                "url":         row.url,
+                "title":       None if pd.isna(row.title) else row.title,
+                "location":    None if pd.isna(row.location) else row.location,
+                "price_lkr":   round(price),
+                "price_mn":    round(price / 1_000_000, 2),
+                **{c: (None if pd.isna(getattr(row, c)) else float(getattr(row, c))) for c in SPACE},
+            })
+        return out
+
+    def _add(self, df):
+        df = df[~df["url"].isin(self._urls)]
+        if df.empty:
+            return 0
+        points = (self._space(df) - self.center) / self.scale
+        resolved, keys = {}, []   # one resolution per distinct (district, type)
+        for pair in zip(df["district"], df["property_type"]):
+            if pair not in resolved:
+                resolved[pair] = self._key(*pair)
+            keys.append(resolved[pair])
+        records = self._records(df)
+
+        groups = {}
+        for i, key in enumerate(keys):
+            groups.setdefault(key, []).append(i)
+        for key, idx in groups.items():
+            old = self._partitions.get(key)
+            new_points  = points[idx]
+            new_records = [records[i] for i in idx]
+            if old is not None:
+                new_points  = np.vstack([old.points, new_points])
+                new_records = old.records + new_records
+            self._partitions[key] = _Partition(new_points, new_records)   # atomic swap
+        self._urls.update(df["url"])
+        return len(df)
+
+    def ingest(self, path):
+        """Add listings from a (re)written scraper CSV that aren't indexed yet."""
+        with self._lock:
+            mtime = os.stat(path).st_mtime
+            added = self._add(load_listings(path))
+            self.source_mtime = mtime
+            return added
+
+    # ── Querying ─────────────────────────────────────────────
+    def query(self, body, k=5):
+        """The k listings nearest to a property JSON object, nearest first.
+
+        Returns (partition size, matches); (0, []) when no listing shares
+        the property's district and type.
+        """
+        part = self._partitions.get(self._key(body.get("district", "Colombo"),
+                                              body.get("property_type", "house")))
+        if part is None:
+            return 0, []
+        k = min(k, len(part.records))
+        dist, idx = part.tree.query(self._point(body), k=k)
+        dist, idx = np.atleast_1d(dist), np.atleast_1d(idx)
+        return len(part.records), [{**part.records[i], "distance": round(float(d), 4)}
+                                   for d, i in zip(dist, idx)]
+
+    def _point(self, body):
+        """A property JSON object in the index's scaled feature space."""
+        point = np.empty(len(SPACE), dtype=np.float64)
+        for i, c in enumerate(SPACE):
+            key, default = REQUEST_KEYS[c]
+            value = float(body.get(key, default))
+            point[i] = np.log1p(max(value, 0.0)) if c in LOG_SCALED else value
+        return (point - self.center) / self.scale
+
+    def stats(self):
+        sizes = [len(p.records) for p in self._partitions.values()]
+        return {
+            "listings":     len(self),
+            "partitions":   len(sizes),
+            "largest":      max(sizes, default=0),
+            "source_mtime": self.source_mtime,
+        }
+
+
+class ListingsFeed:
+    """Picks up new rows of a CSV for whichever index is live.
+
+    Anything with ingest(path) and source_mtime works (the comparables
+    index, the /stats market cube). poll() is called from the request
+    path but costs at most one stat() per interval; ingesting happens on
+    a background thread.
+    """
+
+    def __init__(self, path, interval_s, label="Comparables"):
+        self.path       = path
+        self.interval_s = interval_s
+        self.label      = label
+        self._checked   = 0.0
+        self._busy      = threading.Lock()
+
+    def poll(self, index):
+        now = time.monotonic()
+        if index is None or now - self._checked < self.interval_s:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime != index.source_mtime and self._busy.acquire(blocking=False):
+            threading.Thread(target=self._ingest, args=(index,), daemon=True,
+                             name=f"{self.label.lower()}-feed").start()
+
+    def _ingest(self, index):
+        try:
+            added = index.ingest(self.path)
+            if added:
+                print(f"✅ {self.label}: +{added} rows from {self.path}")
+        except Exception as e:
+            print(f"❌ {self.label} refresh failed: {e}")
+        finally:
+            self._busy.release()
@@ -0,0 +1,459 @@
+"""
+compress.py  —  Post-training model compression with an accuracy budget
+========================================================================
+Shrinks a trained booster in four passes:
+
+  truncate            keep the first n trees — the smallest n from which
+                      every longer prefix stays inside half the budget on
+                      the validation split
+  merge binary splits on the 0/1 flag features (has_*, negotiable):
+                      splits an ancestor already decided, or whose
+                      threshold sends 0 and 1 the same way, are removed
+                      (lossless); splits whose two children are leaves
+                      within compress_merge_tol log-price of each other
+                      become one leaf (cover-weighted mean)
+  float16 leaves      leaf values rounded to float16
+  float16 thresholds  split thresholds rounded to float16
+
+The budget (CONFIG compress_max_mae_increase, compress_max_r2_drop) is
+always measured against the original model, never per pass. Truncation
+may spend at most half of it, leaving the rest for the lossy passes;
+each later pass is kept only if the model so far, with that pass
+applied, stays inside the full budget on the validation split. The
+combined result is only emitted if it is inside the full budget on both
+the validation and the test split. The booster stays a normal
+XGBoost model (SHAP, the xgboost engine and large batches work as
+before); model_arrays.npz holds the same trees as float16 arrays for
+the arrays engine, which loads it without parsing the model.
+
+Run with:  python compress.py report [clean_properties.csv]   (from the api/ folder)
+           python compress.py build  [clean_properties.csv]
+
+Both compress the uncompressed bundles/CURRENT model on train_model.py's
+validation / test split and print the report; build also writes a new
+bundle with the compressed model as CURRENT (global explanation, drift
+reference, surrogate and price grid rebuilt against the compressed model).
+train_model.py runs the same passes before packing its bundle.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from features import FLAG_INPUTS
+from tree_engine import TreeEnsemble
+
+ARRAYS_FILE  = "model_arrays.npz"
+TRUNCATE_STEP = 5          # tree counts tried: 5, 10, 15, ...
+ROOT_PARENT  = 2147483647  # parents[] entry XGBoost writes for a root
+FLOAT16_MAX  = float(np.finfo(np.float16).max)
+
+
+class BoosterModel:
+    """A booster with the XGBRegressor.predict signature train_model's evaluate() calls."""
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict(self, X):
+        return self.booster.inplace_predict(np.asarray(X, dtype=np.float32),
+                                            validate_features=False)
+
+
+def scores(booster, X, y_log, y_real):
+    """MAE / RMSE on prices and R² on log-price — train_model.evaluate()'s metrics."""
+    pred_log  = BoosterModel(booster).predict(X)
+    pred_real = np.expm1(pred_log)
+    return {
+        "mae":  float(mean_absolute_error(y_real, pred_real)),
+        "rmse": float(np.sqrt(mean_squared_error(y_real, pred_real))),
+        "r2":   float(r2_score(y_log, pred_log)),
+    }
+
+
+def within(s, base, max_mae_increase, max_r2_drop, share=1.0):
+    return (s["mae"] <= base["mae"] * (1 + share * max_mae_increase)
+            and s["r2"] >= base["r2"] - share * max_r2_drop)
+
+
+# ═══════════════════════════════════════════════════════
+# PASSES
+# ═══════════════════════════════════════════════════════
+def choose_trees(booster, val, base, max_mae_increase, max_r2_drop):
+    """Fewest leading trees whose every longer prefix stays inside half the budget."""
+    total = booster.num_boosted_rounds()
+    X = np.asarray(val[0], dtype=np.float32)
+    best = total
+    for n in range(total - TRUNCATE_STEP, 0, -TRUNCATE_STEP):
+        pred_log = booster.inplace_predict(X, iteration_range=(0, n), validate_features=False)
+        s = {"mae": float(mean_absolute_error(val[2], np.expm1(pred_log))),
+             "r2":  float(r2_score(val[1], pred_log))}
+        if not within(s, base, max_mae_increase, max_r2_drop, share=0.5):
+            break
+        best = n
+    return best
+
+
+def _model(booster):
+    return json.loads(booster.save_raw("json"))
+
+
+def _booster(model):
+    return xgb.Booster(model_file=bytearray(json.dumps(model).encode()))
+
+
+def _trees(model):
+    return model["learner"]["gradient_booster"]["model"]["trees"]
+
+
+def _decided(threshold, known):
+    """True / False if a split on a 0/1 feature always goes left / right, else None."""
+    if threshold <= 0:
+        return False          # x < t is false for 0 and 1
+    if threshold > 1:
+        return True
+    return None if known is None else known < threshold
+
+
+def _merge_tree(tree, binary, tol, stats):
+    """Nested form of one tree with redundant / near-equal binary splits merged."""
+    L, R = tree["left_children"], tree["right_children"]
+    S, C = tree["split_indices"], tree["split_conditions"]
+    H    = tree["sum_hessian"]
+
+    def build(n, known):
+        while L[n] != -1 and S[n] in binary:
+            side = _decided(C[n], known.get(S[n]))
+            if side is None:
+                break
+            n = L[n] if side else R[n]
+            stats["removed"] += 1
+        if L[n] == -1:
+            return {"leaf": True, "value": C[n], "hess": H[n]}
+
+        f = S[n]
+        if f in binary:
+            left, right = build(L[n], {**known, f: 0}), build(R[n], {**known, f: 1})
+            if left["leaf"] and right["leaf"] and abs(left["value"] - right["value"]) <= tol:
+                stats["merged"] += 1
+                cover = left["hess"] + right["hess"]
+                value = ((left["value"] * left["hess"] + right["value"] * right["hess"]) / cover
+                         if cover > 0 else (left["value"] + right["value"]) / 2)
+                return {"leaf": True, "value": float(np.float32(value)), "hess": H[n]}
+        else:
+            left, right = build(L[n], known), build(R[n], known)
+        return {"leaf": False, "feature": f, "threshold": C[n], "default_left": tree["default_left"][n],
+                "base_weight": tree["base_weights"][n], "loss_change": tree["loss_changes"][n],
+                "hess": H[n], "left": left, "right": right}
+
+    return build(0, {})
+
+
+def _flatten(root, tree):
+    """tree's JSON with its node arrays rebuilt from the nested form (BFS order)."""
+    order, i = [root], 0
+    while i < len(order):
+        if not order[i]["leaf"]:
+            order += [order[i]["left"], order[i]["right"]]
+        i += 1
+    ids = {id(node): k for k, node in enumerate(order)}
+    n = len(order)
+    arrays = {"left_children": [-1] * n, "right_children": [-1] * n, "parents": [ROOT_PARENT] * n,
+              "split_indices": [0] * n, "split_conditions": [0.0] * n, "default_left": [0] * n,
+              "base_weights": [0.0] * n, "loss_changes": [0.0] * n, "sum_hessian": [0.0] * n,
+              "split_type": [0] * n}
+    for k, node in enumerate(order):
+        arrays["sum_hessian"][k] = node["hess"]
+        if node["leaf"]:
+            arrays["split_conditions"][k] = arrays["base_weights"][k] = node["value"]
+            continue
+        l, r = ids[id(node["left"])], ids[id(node["right"])]
+        arrays["left_children"][k], arrays["right_children"][k] = l, r
+        arrays["parents"][l] = arrays["parents"][r] = k
+        arrays["split_indices"][k]    = node["feature"]
+        arrays["split_conditions"][k] = node["threshold"]
+        arrays["default_left"][k]     = node["default_left"]
+        arrays["base_weights"][k]     = node["base_weight"]
+        arrays["loss_changes"][k]     = node["loss_change"]
+    return {**tree, **arrays, "tree_param": {**tree["tree_param"], "num_nodes": str(n)}}
+
+
+def merge_binary_splits(booster, binary, tol):
+    """(booster, stats) with splits on the binary feature indices merged."""
+    model = _model(booster)
+    stats = {"removed": 0, "merged": 0}
+    trees = _trees(model)
+    for t, tree in enumerate(trees):
+        if tree.get("categories_nodes"):
+            raise ValueError("Categorical splits are not supported")
+        trees[t] = _flatten(_merge_tree(tree, binary, tol, stats), tree)
+    return _booster(model), stats
+
+
+def quantize(booster, leaves=False, thresholds=False):
+    """(booster, values changed) with leaf values and / or thresholds rounded to float16."""
+    model = _model(booster)
+    changed = 0
+    for tree in _trees(model):
+        is_leaf = np.asarray(tree["left_children"]) == -1
+        cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+        half = cond.astype(np.float16).astype(np.float32)
+        # Thresholds past float16 range would become ±inf; those stay float32
+        pick = np.where(is_leaf, leaves, thresholds) & (np.abs(cond) <= FLOAT16_MAX)
+        new = np.where(pick, half, cond)
+        changed += int((new != cond).sum())
+        tree["split_conditions"] = new.tolist()
+        if leaves:
+            weights = np.asarray(tree["base_weights"], dtype=np.float32)
+            tree["base_weights"] = np.where(is_leaf, new, weights).tolist()
+    return _booster(model), changed
+
+
+# ═══════════════════════════════════════════════════════
+# MEASUREMENT
+# ═══════════════════════════════════════════════════════
+def n_nodes(booster):
+    return sum(int(t["tree_param"]["num_nodes"]) for t in _trees(_model(booster)))
+
+
+def _median_s(fn, repeats):
+    for _ in range(min(repeats, 20)):   # warm caches first
+        fn()
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return float(np.median(times))
+
+
+def measure(boosters, X, rounds=5, repeats=200):
+    """Artifact sizes, load times and per-row latency of each booster and its
+    arrays file. Timings alternate between the boosters for `rounds` rounds
+    and keep each one's best, so a noisy neighbour can't favour either."""
+    row = np.ascontiguousarray(np.asarray(X, dtype=np.float32)[:1])
+    with tempfile.TemporaryDirectory() as tmp:
+        timers, results = [], []
+        for i, booster in enumerate(boosters):
+            booster.set_param({"nthread": 1})
+            model_path  = os.path.join(tmp, f"model{i}.ubj")
+            arrays_path = os.path.join(tmp, f"arrays{i}.npz")
+            booster.save_model(model_path)
+            ensemble = TreeEnsemble.from_booster(booster)
+            ensemble.save(arrays_path)
+            results.append({"model_bytes": os.path.getsize(model_path),
+                            "arrays_bytes": os.path.getsize(arrays_path)})
+            timers.append({
+                "model_load_ms":  (lambda p=model_path: xgb.Booster(model_file=p), 5, 1e3),
+                "arrays_load_ms": (lambda p=arrays_path: TreeEnsemble.load(p), 5, 1e3),
+                "json_walk_ms":   (lambda b=booster: TreeEnsemble.from_booster(b), 3, 1e3),
+                "predict_us":     (lambda b=booster: b.inplace_predict(row, validate_features=False),
+                                   repeats, 1e6),
+                "arrays_us":      (lambda e=ensemble: e.predict(row), repeats, 1e6),
+            })
+        for _ in range(rounds):
+            for timer, result in zip(timers, results):
+                for key, (fn, n, scale) in timer.items():
+                    result[key] = min(result.get(key, np.inf), _median_s(fn, n) * scale)
+    return results
+
+
+# ═══════════════════════════════════════════════════════
+# DRIVER
+# ═══════════════════════════════════════════════════════
+def compress(booster, features, val, test, config=None):
+    """Run every pass; val / test are (X, log_price, price) triples.
+
+    Returns {"booster", "accepted", "stages", "before", "after"} — booster
+    is the compressed model, accepted says whether all passes together
+    stayed inside the full budget on both the validation and test splits.
+    """
+    if config is None:
+        from config import CONFIG as config
+    max_mae, max_r2 = config["compress_max_mae_increase"], config["compress_max_r2_drop"]
+    binary = {i for i, f in enumerate(features) if f in FLAG_INPUTS}
+    base_val, base_test = scores(booster, *val), scores(booster, *test)
+
+    def stage(name, candidate, note, applied=True):
+        return {"stage": name, "applied": applied, "note": note,
+                "trees": candidate.num_boosted_rounds(), "nodes": n_nodes(candidate),
+                "val": scores(candidate, *val), "test": scores(candidate, *test)}
+
+    stages  = [stage("original", booster, "")]
+    total   = booster.num_boosted_rounds()
+    n       = choose_trees(booster, val, base_val, max_mae, max_r2)
+    current = booster[:n] if n < total else booster
+    stages.append(stage("truncate", current, f"{n} of {total} trees"))
+
+    passes = [
+        ("merge binary splits",
+         lambda b: merge_binary_splits(b, binary, config["compress_merge_tol"]),
+         lambda st: f"{st['removed']} removed, {st['merged']} merged"),
+        ("float16 leaves", lambda b: quantize(b, leaves=True), lambda c: f"{c} values rounded"),
+        ("float16 thresholds", lambda b: quantize(b, thresholds=True), lambda c: f"{c} values rounded"),
+    ]
+    for name, apply, describe in passes:
+        candidate, info = apply(current)
+        row = stage(name, candidate, describe(info))
+        row["applied"] = within(row["val"], base_val, max_mae, max_r2)
+        if row["applied"]:
+            current = candidate
+        stages.append(row)
+
+    after = scores(current, *test)
+    return {
+        "booster":  current,
+        "accepted": (within(scores(current, *val), base_val, max_mae, max_r2)
+                     and within(after, base_test, max_mae, max_r2)),
+        "stages":   stages,
+        "before":   base_test,
+        "after":    after,
+        "budget":   {"max_mae_increase": max_mae, "max_r2_drop": max_r2,
+                     "merge_tol": config["compress_merge_tol"]},
+    }
+
+
+def summary(result):
+    """Manifest-sized record of a compression run."""
+    first = result["stages"][0]
+    applied = [s for s in result["stages"] if s["applied"]]
+    return {
+        "stages":      [f"{s['stage']} ({s['note']})" for s in applied[1:]],
+        "trees":       [first["trees"], applied[-1]["trees"]],
+        "nodes":       [first["nodes"], applied[-1]["nodes"]],
+        "test_mae":    [round(result["before"]["mae"]), round(result["after"]["mae"])],
+        "test_r2":     [round(result["before"]["r2"], 4), round(result["after"]["r2"], 4)],
+        "accepted":    result["accepted"],
+        "budget":      result["budget"],
+    }
+
+
+def print_report(result, original, X):
+    """Stage table, then size / load / latency before and after."""
+    print(f"\n   {'stage':<20} {'kept':>4} {'trees':>6} {'nodes':>7} {'val MAE':>13} "
+          f"{'test MAE':>13} {'test R²':>8}  note")
+    for s in result["stages"]:
+        print(f"   {s['stage']:<20} {'yes' if s['applied'] else 'no':>4} {s['trees']:>6} "
+              f"{s['nodes']:>7,} {s['val']['mae']:>13,.0f} {s['test']['mae']:>13,.0f} "
+              f"{s['test']['r2']:>8.4f}  {s['note']}")
+
+    before, after = measure([original, result["booster"]], X)
+    rows = [
+        ("model.ubj",             "model_bytes",    1 / 1024, "KB"),
+        (ARRAYS_FILE,             "arrays_bytes",   1 / 1024, "KB"),
+        ("booster load",          "model_load_ms",  1, "ms"),
+        ("arrays load (npz)",     "arrays_load_ms", 1, "ms"),
+        ("arrays build (JSON)",   "json_walk_ms",   1, "ms"),
+        ("1-row predict xgboost", "predict_us",     1, "µs"),
+        ("1-row predict arrays",  "arrays_us",      1, "µs"),
+    ]
+    print(f"\n   {'':<22} {'original':>12} {'compressed':>12} {'change':>8}")
+    for label, key, scale, unit in rows:
+        a, b = before[key] * scale, after[key] * scale
+        print(f"   {label:<22} {a:>9,.1f} {unit:<2} {b:>9,.1f} {unit:<2} {(b - a) / a:>+8.0%}")
+    mae_change = result["after"]["mae"] / result["before"]["mae"] - 1
+    r2_change  = result["after"]["r2"] - result["before"]["r2"]
+    print(f"   {'test MAE':<22} {result['before']['mae']:>12,.0f} {result['after']['mae']:>12,.0f} "
+          f"{mae_change:>+8.2%}   (budget +{result['budget']['max_mae_increase']:.2%})")
+    print(f"   {'test R²':<22} {result['before']['r2']:>12.4f} {result['after']['r2']:>12.4f} "
+          f"{r2_change:>+8.4f}   (budget -{result['budget']['max_r2_drop']:.4f})")
+    return {"original": before, "compressed": after}
+
+
+def write(result, model_path, arrays_path):
+    """Save the compressed booster and its float16 arrays file."""
+    result["booster"].save_model(model_path)
+    TreeEnsemble.from_booster(result["booster"]).save(arrays_path)
+
+
+# ═══════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════
+def split(df, features):
+    """train_model.py's validation and test splits (70 / 15 / 15, seed 42)."""
+    from sklearn.model_selection import train_test_split
+    X, y, y_actual = df[features], df["log_price"], df["price_lkr"]
+    _, X_temp, _, y_temp, _, ya_temp = train_test_split(X, y, y_actual, test_size=0.30,
+                                                        random_state=42)
+    X_val, X_test, y_val, y_test, ya_val, ya_test = train_test_split(
+        X_temp, y_temp, ya_temp, test_size=0.50, random_state=42)
+    return (X_val, y_val, ya_val), (X_test, y_test, ya_test)
+
+
+def main(argv):
+    import pandas as pd
+    from bundle import ModelBundle, current_path, repack_bundle
+    from config import CONFIG
+    import drift
+    import global_explain
+    import price_grid
+    import surrogate
+
+    command = argv[1]
+    root = CONFIG["bundle_dir"]
+    path = current_path(root)
+    if path is None:
+        sys.exit(f"No CURRENT bundle under {root} — run python bundle.py build first")
+    bundle = ModelBundle.load(path, CONFIG)
+    if bundle.manifest.get("extra", {}).get("compression"):
+        sys.exit(f"Bundle {bundle.version} is already compressed — point CURRENT at the "
+                 f"uncompressed bundle (python bundle.py / train_model.py) and rerun")
+
+    df = pd.read_csv(argv[2] if len(argv) > 2 else CONFIG["clean_file"])
+    val, test = split(df, bundle.features)
+    print(f"🔄 Compressing bundle {bundle.version} ({bundle.booster.num_boosted_rounds()} trees)...")
+    result = compress(bundle.booster, bundle.features, val, test, CONFIG)
+    measured = print_report(result, bundle.booster, test[0])
+
+    if not result["accepted"]:
+        sys.exit("❌ Compressed model is outside the accuracy budget — not written")
+    if command == "report":
+        print("✅ Inside the accuracy budget (report only, nothing written)")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path, arrays_path = os.path.join(tmp, "model.ubj"), os.path.join(tmp, ARRAYS_FILE)
+        write(result, model_path, arrays_path)
+        extra_files = {"ensemble": arrays_path}
+        if bundle.file_path("global_explanation") is not None:
+            doc = global_explain.compute(result["booster"], df[bundle.features], bundle.features,
+                                         bundle.district_classes)
+            global_explain.write(doc, os.path.join(tmp, global_explain.GLOBAL_FILE))
+            extra_files["global_explanation"] = os.path.join(tmp, global_explain.GLOBAL_FILE)
+        extra = {}
+        if bundle.file_path("drift_reference") is not None:
+            reference = drift.build_reference(df[bundle.features], bundle.features)
+            with open(os.path.join(tmp, drift.REFERENCE_FILE), "w") as f:
+                json.dump(reference, f, indent=1)
+            extra_files["drift_reference"] = os.path.join(tmp, drift.REFERENCE_FILE)
+        if bundle.surrogate is not None:
+            # Distilled from the old model's answers — redo it against the new one
+            print("🔄 Re-distilling the surrogate from the compressed model...")
+            fast, _ = surrogate.distill(result["booster"], df[bundle.features].to_numpy(np.float32),
+                                        bundle.features, bundle.encoder, bundle.district_classes)
+            fast.save(os.path.join(tmp, surrogate.SURROGATE_FILE))
+            extra_files["surrogate"] = os.path.join(tmp, surrogate.SURROGATE_FILE)
+            extra["surrogate"] = fast.meta
+        # Scored by the old model — rescore the lattice for /predict/fast
+        print("🔄 Scoring the price grid for the compressed model...")
+        grid_files, extra["grid_report"] = price_grid.write(
+            bundle.encoder, lambda X: result["booster"].inplace_predict(X, validate_features=False), tmp)
+        extra_files.update(grid_files)
+        info = summary(result)
+        info["model_bytes"] = [measured["original"]["model_bytes"], measured["compressed"]["model_bytes"]]
+        manifest = repack_bundle(root, bundle, extra_files, model_path=model_path,
+                                 extra={"compression": info, "compressed_from": bundle.version,
+                                        **extra})
+    print(f"✅ Bundle {manifest['version']} written (CURRENT) — reload with SIGHUP or POST /admin/reload")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("build", "report"):
+        sys.exit("Usage: python compress.py build|report [clean_properties.csv]")
+    main(sys.argv)
@@ -0,0 +1,153 @@
+"""
+config.py  —  EstateVision API settings
+========================================
+Every setting can be overridden with an environment variable named
+EV_<SETTING> (e.g. EV_ENGINE=arrays).
+"""
+
+import os
+
+CPU_COUNT = os.cpu_count() or 1
+
+
+def _env(name, default, cast=str):
+    raw = os.environ.get(f"EV_{name.upper()}")
+    return default if raw is None else cast(raw)
+
+
+CONFIG = {
+    # "xgboost" — booster.inplace_predict for every call
+    # "arrays"  — tree_engine.TreeEnsemble for inputs of up to
+    #             arrays_max_rows rows, booster for anything larger.
+    #             bench_tree_engine.py: arrays 120 µs vs inplace 500 µs at
+    #             1 row, 211 vs 595 µs at 4, 559 vs 494 µs at 16 — the
+    #             crossover sits between 8 and 16 rows, so 8 stays under it
+    "engine":          _env("engine", "xgboost"),
+    "arrays_max_rows": _env("arrays_max_rows", 8, int),
+
+    # Versioned bundles (bundle.py); bundle_dir/CURRENT names the active one
+    "bundle_dir":  _env("bundle_dir", "bundles"),
+    "admin_token": _env("admin_token", ""),   # empty → /admin/* from localhost only
+    # Re-hash every bundle file on load / reload. Off: files are hashed
+    # when written and by python bundle.py verify at deploy, so loads only
+    # check presence and sizes
+    "bundle_verify": _env("bundle_verify", "0") == "1",
+
+    # Legacy loose files, used when bundle_dir has no CURRENT bundle.
+    # .ubj / .json load the booster natively; .pkl unpickles the
+    # XGBRegressor written by older train_model.py runs
+    "model_file": _env("model_file", "xgb_model.ubj"),
+
+    # Scraper output used for /comparables. Packed into new bundles by
+    # bundle.py / train_model.py, and polled for new rows while serving
+    "listings_file":      _env("listings_file", "../data/raw_properties.csv"),
+    "listings_refresh_s": _env("listings_refresh_s", 60, float),
+
+    # Market statistics cube for /stats (python market_cube.py build).
+    # New rows in clean_file are ingested while serving, at most once per
+    # stats_refresh_s
+    "market_cube_file": _env("market_cube_file", "market_cube.npz"),
+    "clean_file":       _env("clean_file", "../data/clean_properties.csv"),
+    "stats_refresh_s":  _env("stats_refresh_s", 60, float),
+
+    # Post-training compression (compress.py, train_model.py). The
+    # compressed model is only emitted if, on both the validation and the
+    # test split, MAE rises by at most compress_max_mae_increase (a
+    # fraction) and R² drops by at most compress_max_r2_drop; tree
+    # truncation may spend only half of that budget. Leaf pairs under a
+    # has_* split closer than compress_merge_tol (log-price) are merged
+    "compress_max_mae_increase": _env("compress_max_mae_increase", 0.01, float),
+    "compress_max_r2_drop":      _env("compress_max_r2_drop", 0.002, float),
+    "compress_merge_tol":        _env("compress_merge_tol", 1e-3, float),
+
+    # /predict?tier=fast (surrogate.py): the distilled model answers inputs
+    # inside its fitted range whose estimated error vs the full model is
+    # below a threshold set at build time so that surrogate_fallback_share
+    # of held-out inputs go to the full model. surrogate_max_error (log-price,
+    # ~ relative error) overrides that threshold; 0 = use the bundled one
+    "surrogate_fallback_share": _env("surrogate_fallback_share", 0.1, float),
+    "surrogate_max_error":      _env("surrogate_max_error", 0.0, float),
+
+    # "native" — booster pred_contribs (one model in memory)
+    # "shap"   — shap.TreeExplainer built from the loaded booster
+    # "none"   — no explanations (explain is forced to false)
+    "explainer":        _env("explainer", "native"),
+    "explainer_approx": _env("explainer_approx", "0") == "1",
+
+    # Rows scored (and explained) before a process reports ready
+    "warmup_rows": _env("warmup_rows", 32, int),
+
+    # explain=deferred — background SHAP workers and result store
+    # explain_max_pending caps jobs waiting for the workers; past it new
+    # deferred explanations are marked dropped instead of queueing unbounded
+    "explain_workers":     _env("explain_workers", 2, int),
+    "explain_store_size":  _env("explain_store_size", 10_000, int),
+    "explain_ttl_s":       _env("explain_ttl_s", 300, float),
+    "explain_max_pending": _env("explain_max_pending", 256, int),
+
+    # /predict result cache — cache_size 0 disables, cache_ttl_s 0 = no expiry
+    "cache_size":  _env("cache_size", 4096, int),
+    "cache_ttl_s": _env("cache_ttl_s", 0, float),
+
+    # /drift: live input histograms are kept for two tumbling windows
+    "drift_window_s": _env("drift_window_s", 3600, float),
+
+    # Request/response log for replay.py (request_log.py); off by default,
+    # EV_REQUEST_LOG=logs/requests.jsonl to record. Only the listed
+    # endpoints are logged — predict_fast (one call per keystroke) has to
+    # be added explicitly; sample < 1 logs a random share
+    "request_log":           _env("request_log", ""),
+    "request_log_endpoints": _env("request_log_endpoints",
+                                  "predict,predict_batch,predict_sweep,comparables"),
+    "request_log_sample":    _env("request_log_sample", 1.0, float),
+    "request_log_max_mb":    _env("request_log_max_mb", 64, float),
+    "request_log_backups":   _env("request_log_backups", 5, int),
+    "request_log_compress":  _env("request_log_compress", "1") == "1",
+    "request_log_queue":     _env("request_log_queue", 10_000, int),
+
+    # Micro-batching of concurrent /predict calls (EV_BATCHING=1 to enable)
+    "batching":          _env("batching", "0") == "1",
+    "batch_max_size":    _env("batch_max_size", 64, int),
+    "batch_max_wait_ms": _env("batch_max_wait_ms", 2.0, float),
+
+    # Admission control for /predict and /predict/batch, per process.
+    # concurrency 0 disables. Past degrade_at queued requests SHAP is
+    # dropped; past max queue (or queue timeout) requests get 503. The
+    # queue timeout is what bounds latency, so the queue itself is sized
+    # to absorb bursts rather than to shed them. With batching on, the
+    # concurrency is raised to batch_max_size (see below).
+    "admission_concurrency":      _env("admission_concurrency", 4, int),
+    "admission_queue":            _env("admission_queue", 32, int),
+    "admission_queue_timeout_ms": _env("admission_queue_timeout_ms", 500, float),
+    "admission_degrade_at":       _env("admission_degrade_at", 2, int),
+    "retry_after_s":              _env("retry_after_s", 1, int),
+    # Extra gunicorn threads per worker that only answer 503s, so excess
+    # requests are refused at once instead of waiting for a thread
+    "admission_reject_threads":   _env("admission_reject_threads", 4, int),
+
+    # Production prefork serving (gunicorn -c gunicorn.conf.py app:app)
+    "bind":           _env("bind", "0.0.0.0:5000"),
+    "workers":        _env("workers", CPU_COUNT, int),
+    "worker_threads": _env("worker_threads", 4, int),
+    # Ceiling on gunicorn threads per worker. Admission concurrency and
+    # queue are shrunk to fit under it (gunicorn.conf.py) rather than the
+    # pool growing with them — workers × this is the process thread count
+    "worker_max_threads": _env("worker_max_threads", 64, int),
+    # XGBoost threads per worker; 0 = share the cores evenly between workers
+    "xgb_threads":    _env("xgb_threads", 0, int),
+
+    # ASGI serving (python asgi.py, or uvicorn asgi:app). Model and SHAP
+    # calls run on model_threads pool threads per process, each with
+    # XGBoost on one thread; the admission queue sits in front of the pool
+    "model_threads":     _env("model_threads", CPU_COUNT, int),
+    "asgi_workers":      _env("asgi_workers", 1, int),
+    "asgi_keepalive_s":  _env("asgi_keepalive_s", 75, float),
+}
+
+# Admitted /predict calls are what feed the micro-batcher: a concurrency
+# limit below the batch size caps every batch at that limit and refuses
+# the rest. The batcher already runs one model call at a time, so give
+# each batch slot an admission slot.
+if CONFIG["batching"] and CONFIG["admission_concurrency"]:
+    CONFIG["admission_concurrency"] = max(CONFIG["admission_concurrency"],
+                                          CONFIG["batch_max_size"])
@@ -0,0 +1,133 @@
+"""
+deferred.py  —  Background SHAP explanations for explain=deferred
+==================================================================
+/predict returns the price straight away with an explanation ID; the
+SHAP breakdown is computed on a small worker pool and parked in a
+bounded, expiring store until the client fetches it from /explain/<id>.
+
+At most max_pending jobs wait for the pool; past that, new IDs are
+stored as "dropped" straight away (the deferred counterpart of the sync
+path dropping SHAP under admission pressure), and queued jobs whose IDs
+have all expired are skipped rather than computed for nobody.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = "pending"
+DONE    = "done"
+FAILED  = "failed"
+DROPPED = "dropped"
+
+
+class ExplanationStore:
+    """Size-bounded, TTL-expiring map of explanation ID → result.
+
+    Entries are kept in insertion order; with a single TTL that is also
+    expiry order, so expired and overflow entries are always at the front.
+    """
+
+    def __init__(self, max_items, ttl_s):
+        self.max_items = max_items
+        self.ttl_s     = ttl_s
+        self._items    = OrderedDict()   # id -> [expires_at, status, payload]
+        self._lock     = threading.Lock()
+
+    def reserve(self, ids):
+        """Register new IDs as pending."""
+        expires = time.monotonic() + self.ttl_s
+        with self._lock:
+            for i in ids:
+                self._items[i] = [expires, PENDING, None]
+            self._purge()
+
+    def complete(self, key, status, payload):
+        """Record a result; silently dropped if the entry was already evicted."""
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                entry[1], entry[2] = status, payload
+
+    def get(self, key):
+        """(status, payload) for a live entry, or None if unknown or expired."""
+        with self._lock:
+            self._purge()
+            entry = self._items.get(key)
+            return None if entry is None else (entry[1], entry[2])
+
+    def alive(self, ids):
+        """True if any of the IDs is still held (not expired or evicted)."""
+        with self._lock:
+            self._purge()
+            return any(i in self._items for i in ids)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _purge(self):
+        now = time.monotonic()
+        while self._items:
+            key, entry = next(iter(self._items.items()))
+            if entry[0] > now and len(self._items) <= self.max_items:
+                break
+            self._items.popitem(last=False)
+
+
+class ExplanationJobs:
+    """Runs explanation work off the request thread."""
+
+    def __init__(self, workers, max_items, ttl_s, max_pending=256, on_drop=None):
+        self.store       = ExplanationStore(max_items, ttl_s)
+        self.max_pending = max_pending
+        self.on_drop     = on_drop        # called with the number of IDs dropped
+        self.pending     = 0
+        self._lock       = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix="explain")
+
+    def submit(self, n, compute):
+        """Queue compute() — which must return n payloads — and return their n IDs.
+
+        With max_pending jobs already waiting the IDs come back marked
+        dropped instead, and compute() never runs.
+        """
+        ids = [uuid.uuid4().hex for _ in range(n)]
+        self.store.reserve(ids)
+        with self._lock:
+            full = self.pending >= self.max_pending
+            if not full:
+                self.pending += 1
+        if full:
+            for key in ids:
+                self.store.complete(key, DROPPED, "Explanation dropped: server overloaded")
+            if self.on_drop is not None:
+                self.on_drop(n)
+            return ids
+        self._pool.submit(self._run, ids, compute)
+        return ids
+
+    def publish(self, payloads):
+        """Store already-computed payloads (e.g. from the cache) and return their IDs."""
+        ids = [uuid.uuid4().hex for _ in payloads]
+        self.store.reserve(ids)
+        for key, payload in zip(ids, payloads):
+            self.store.complete(key, DONE, payload)
+        return ids
+
+    def _run(self, ids, compute):
+        try:
+            if not self.store.alive(ids):
+                return                     # expired while queued — nobody can fetch it
+            payloads = compute()
+        except Exception as e:
+            for key in ids:
+                self.store.complete(key, FAILED, str(e))
+            return
+        finally:
+            with self._lock:
+                self.pending -= 1
+        for key, payload in zip(ids, payloads):
+            self.store.complete(key, DONE, payload)
@@ -0,0 +1,205 @@
+"""
+drift.py  —  Streaming input-drift monitor for /drift
+======================================================
+At training time every feature gets a reference histogram over the
+training rows, packed into the bundle as drift_reference.json:
+
+  categorical  features with few distinct values (district, type, tier,
+               rooms, flags) — one bin per training value
+  numeric      land size, floor area — decile bins
+
+While serving, each encoded row is counted into the same bins, plus
+"below" / "above" bins for values outside the training range (e.g. land
+sizes past preprocess.py's 99th-percentile cap). Counts live in fixed
+(features × bins) arrays — two tumbling windows of window_s, so memory
+never grows and old traffic ages out. One row costs a compare-and-sum over a
+(features × edges) matrix plus one scattered increment, ~10 µs.
+
+/drift compares the current plus previous window against the reference
+per feature with PSI (Σ (q - p) · ln(q / p)) and a binned KS distance
+(max |CDF_live - CDF_ref|), alongside the encoder's count of unseen
+districts / property types that were silently mapped to a default.
+
+Run with:  python drift.py build [clean_properties.csv]   (from the api/ folder)
+
+Recomputes the reference for bundles/CURRENT and writes a new bundle
+(same model, plus the reference) as CURRENT.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+REFERENCE_FILE   = "drift_reference.json"
+MAX_CATEGORIES   = 16       # more distinct training values → numeric (decile bins)
+NUMERIC_BINS     = 10
+PSI_EPSILON      = 1e-4     # floor for empty bins in the PSI log ratio
+PSI_WATCH, PSI_DRIFT = 0.1, 0.25   # the usual PSI rule of thumb
+MIN_ROWS         = 100      # below this a window is too small to score
+
+
+# ═══════════════════════════════════════════════════════
+# REFERENCE (training time)
+# ═══════════════════════════════════════════════════════
+def build_reference(X, features):
+    """Reference histograms for a training feature matrix (rows × features)."""
+    X = np.asarray(X, dtype=np.float64)
+    out = []
+    for j, name in enumerate(features):
+        x = X[:, j]
+        values = np.unique(x)
+        if len(values) <= MAX_CATEGORIES and np.all(values == np.round(values)):
+            kind, edges = "categorical", (values[:-1] + values[1:]) / 2
+            labels = [float(v) for v in values]
+        else:
+            kind, edges = "numeric", np.unique(np.quantile(x, np.linspace(0, 1, NUMERIC_BINS + 1))[1:-1])
+            labels = None
+        counts = np.bincount(np.searchsorted(edges, x, side="right"), minlength=len(edges) + 1)
+        out.append({
+            "feature": name,
+            "kind":    kind,
+            "min":     float(x.min()),
+            "max":     float(x.max()),
+            "edges":   [float(e) for e in edges],
+            "labels":  labels,
+            "counts":  [int(c) for c in counts],
+        })
+    return {"rows": int(len(X)), "features": out}
+
+
+# ═══════════════════════════════════════════════════════
+# MONITOR (serving time)
+# ═══════════════════════════════════════════════════════
+class DriftMonitor:
+    """Fixed-size live histograms of encoded rows, scored against a reference."""
+
+    def __init__(self, reference, window_s=3600):
+        feats = reference["features"]
+        self.reference = reference
+        self.names     = [f["feature"] for f in feats]
+        self.window_s  = window_s
+        n, width = len(feats), max(len(f["edges"]) for f in feats) + 2
+
+        # Edges [min, bin edges…, just past max], padded with +inf, so one
+        # (row ≥ edges) sum bins every feature at once: column 0 is "below
+        # the training range", 1..k the reference bins, k + 1 "above".
+        self.edges = np.full((n, width), np.inf)
+        for j, f in enumerate(feats):
+            e = [f["min"]] + f["edges"] + [np.nextafter(f["max"], np.inf)]
+            self.edges[j, :len(e)] = e
+        self.n_bins = [len(f["edges"]) + 1 for f in feats]
+        self.ref = [np.array(f["counts"], dtype=np.float64) for f in feats]
+
+        self._row_offsets = np.arange(n) * (width + 1)
+        self._shape   = (n, width + 1)
+        self._lock    = threading.Lock()
+        self._current = np.zeros(self._shape, dtype=np.int64)
+        self._previous = np.zeros(self._shape, dtype=np.int64)
+        self._started = time.monotonic()
+
+    def _rotate(self, now):
+        if now - self._started >= self.window_s:
+            # A gap longer than two windows leaves nothing worth keeping
+            self._previous = self._current if now - self._started < 2 * self.window_s \
+                else np.zeros(self._shape, dtype=np.int64)
+            self._current = np.zeros(self._shape, dtype=np.int64)
+            self._started = now
+
+    def observe(self, X):
+        """Count encoded rows (n × features float32) into the current window."""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        if len(X) == 1:   # the /predict path: one scattered increment
+            bins = (X[0][:, None] >= self.edges).sum(axis=1) + self._row_offsets
+            with self._lock:
+                self._rotate(time.monotonic())
+                np.add.at(self._current.reshape(-1), bins, 1)
+            return
+        bins = (X[:, :, None] >= self.edges).sum(axis=2) + self._row_offsets
+        flat = np.bincount(bins.ravel(), minlength=self._current.size)
+        with self._lock:
+            self._rotate(time.monotonic())
+            self._current += flat.reshape(self._shape)
+
+    def report(self, unseen=None):
+        with self._lock:
+            self._rotate(time.monotonic())
+            counts = self._current + self._previous
+            window_started = self._started
+        rows = int(counts[0].sum())
+        features = []
+        for j, name in enumerate(self.names):
+            features.append(self._score(j, counts[j], rows))
+        features.sort(key=lambda f: -(f["psi"] or 0))
+        return {
+            "rows":          rows,
+            "window_s":      self.window_s,
+            "window_age_s":  round(time.monotonic() - window_started, 1),
+            "reference_rows": self.reference["rows"],
+            "drifting":      [f["feature"] for f in features if f["status"] == "drift"],
+            "features":      features,
+            "unseen":        unseen or {},
+        }
+
+    def _score(self, j, live, rows):
+        k = self.n_bins[j]
+        below, above = int(live[0]), int(live[k + 1])
+        out = {"feature": self.names[j], "out_of_range": {"below": below, "above": above},
+               "psi": None, "ks": None, "status": "insufficient"}
+        if rows < MIN_ROWS:
+            return out
+
+        # Out-of-range rows count towards the end bins they sit beyond
+        q = live[1:k + 1].astype(np.float64)
+        q[0] += below
+        q[-1] += above
+        q /= rows
+        p = self.ref[j] / self.ref[j].sum()
+        pe, qe = np.maximum(p, PSI_EPSILON), np.maximum(q, PSI_EPSILON)
+        psi = float(np.sum((qe - pe) * np.log(qe / pe)))
+        ks  = float(np.max(np.abs(np.cumsum(q) - np.cumsum(p))))
+        out.update(psi=round(psi, 4), ks=round(ks, 4),
+                   status="drift" if psi >= PSI_DRIFT else "watch" if psi >= PSI_WATCH else "ok")
+        return out
+
+    def psi_by_feature(self):
+        """{(feature,): psi} for scored features — the Prometheus gauge callback."""
+        return {(f["feature"],): f["psi"] for f in self.report()["features"] if f["psi"] is not None}
+
+
+# ═══════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════
+def main(argv):
+    from bundle import ModelBundle, current_path, repack_bundle
+    from config import CONFIG
+
+    root = CONFIG["bundle_dir"]
+    path = current_path(root)
+    if path is None:
+        sys.exit(f"No CURRENT bundle under {root} — run python bundle.py build first")
+    bundle = ModelBundle.load(path, CONFIG)
+    source = argv[2] if len(argv) > 2 else CONFIG["clean_file"]
+    reference = build_reference(pd.read_csv(source)[bundle.features], bundle.features)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, REFERENCE_FILE), "w") as f:
+            json.dump(reference, f, indent=1)
+        manifest = repack_bundle(root, bundle, {"drift_reference": os.path.join(tmp, REFERENCE_FILE)})
+    kinds = [f["kind"] for f in reference["features"]]
+    print(f"✅ Drift reference over {reference['rows']} rows — "
+          f"{kinds.count('categorical')} categorical, {kinds.count('numeric')} numeric features")
+    print(f"✅ Bundle {manifest['version']} written (CURRENT) — reload with SIGHUP or POST /admin/reload")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        sys.exit("Usage: python drift.py build [clean_properties.csv]")
+    main(sys.argv)
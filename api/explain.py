@@ -0,0 +1,94 @@
+"""
+explain.py  —  Per-prediction explanation backends
+===================================================
+Interchangeable explainers, picked with CONFIG["explainer"]:
+
+  "native"  ContribExplainer — XGBoost's built-in C++ TreeSHAP
+            (booster.predict(..., pred_contribs=True)). Uses the booster
+            already loaded for prediction, so only one model sits in memory.
+  "shap"    shap.TreeExplainer built from the same booster, kept as the
+            reference implementation. shap is only imported here.
+  "none"    no explanations; every request behaves as explain=false.
+
+Both real backends expose shap_values(X) -> (n_rows, n_features) and
+expected_value, and are built lazily on first use so startup never pays
+for them.
+
+Exact "native" and "shap" run the same TreeSHAP algorithm and cost the
+same per row: bench_explainers.py measures 2.7–4.7 ms for one row with
+either, within run-to-run noise. "native" is the default because it needs
+neither the shap package nor the pickled explainer (no second model in
+memory, no shap import on cold start), not for speed. The only faster
+path is EXPLAINER_APPROX (~0.5 ms a row), which is not exact SHAP.
+"""
+
+import threading
+
+import numpy as np
+import xgboost as xgb
+
+
+class ContribExplainer:
+    """SHAP values straight from the booster's contribution prediction.
+
+    With approx=True XGBoost uses the faster Saabas approximation instead
+    of exact TreeSHAP; values then no longer match the shap package.
+    """
+
+    def __init__(self, booster, approx=False):
+        self.booster = booster
+        self.approx  = approx
+        n_features = booster.num_features()
+        bias = self._predict(np.zeros((1, n_features), dtype=np.float32), pred_contribs=True)
+        self.expected_value = float(bias[0, -1])
+
+    def _predict(self, X, **kwargs):
+        return self.booster.predict(
+            xgb.DMatrix(X), approx_contribs=self.approx,
+            validate_features=False, **kwargs,
+        )
+
+    def shap_values(self, X):
+        """Per-feature contributions; the bias column is dropped."""
+        return self._predict(X, pred_contribs=True)[:, :-1]
+
+    def shap_interaction_values(self, X):
+        """Pairwise interaction contributions, shape (n_rows, n_features, n_features)."""
+        return self._predict(X, pred_interactions=True)[:, :-1, :-1]
+
+
+class LazyExplainer:
+    """Builds the real explainer on first attribute access."""
+
+    def __init__(self, factory):
+        self._factory   = factory
+        self._explainer = None
+        self._lock      = threading.Lock()
+
+    @property
+    def built(self):
+        return self._explainer is not None
+
+    def __getattr__(self, name):
+        if self._explainer is None:
+            with self._lock:
+                if self._explainer is None:
+                    self._explainer = self._factory()
+        return getattr(self._explainer, name)
+
+
+def _shap_explainer(booster):
+    import shap
+    return shap.TreeExplainer(booster)
+
+
+def load_explainer(config, booster):
+    """Explanation backend selected in config (None when disabled)."""
+    backend = config["explainer"]
+    if backend == "none":
+        return None
+    if backend == "native":
+        return LazyExplainer(lambda: ContribExplainer(booster, approx=config["explainer_approx"]))
+    if backend == "shap":
+        return LazyExplainer(lambda: _shap_explainer(booster))
+    raise ValueError(f"Unknown explainer backend: {backend}")
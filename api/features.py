@@ -0,0 +1,264 @@
+"""
+features.py  —  Request JSON → model feature matrix
+=====================================================
+Precompiled encoder used by the API hot path. Writes each property
+straight into a float32 NumPy row in the order stored in
+feature_names.pkl, so no per-request DataFrame is built or reindexed.
+"""
+
+import threading
+
+import numpy as np
+
+from locations import LocationResolver, PREMIUM_AREAS
+
+# ── DISTRICT MAPPINGS ──────────────────────────────────────────
+DISTRICT_TIERS = {
+    "Colombo": 1,
+    "Gampaha": 2, "Kalutara": 2, "Kandy": 2, "Galle": 2, "Matara": 2,
+    "Kurunegala": 3, "Ratnapura": 3, "Trincomalee": 3, "Puttalam": 3,
+    "Kegalle": 3, "Negombo": 3,
+    "Badulla": 4, "Anuradhapura": 4, "Polonnaruwa": 4, "Ampara": 4,
+    "Batticaloa": 4, "Jaffna": 4, "Hambantota": 4, "Monaragala": 4,
+    "Nuwara Eliya": 4, "Matale": 4, "Other": 4,
+}
+
+PROPERTY_TYPE_MAP = {"house": 0, "houses": 0, "apartment": 1, "apartments": 1}
+
+# ── REQUEST FIELDS ─────────────────────────────────────────────
+# (model feature, request key, default)
+NUMERIC_INPUTS = [
+    ("bedrooms",        "bedrooms",    3),
+    ("bathrooms",       "bathrooms",   2),
+    ("land_size_p",     "land_size_p", 10),
+    ("floor_area_sqft", "floor_area",  1200),
+    ("storeys",         "storeys",     1),
+]
+
+FLAG_INPUTS = [
+    "negotiable", "has_parking", "has_pool", "has_garden", "has_furnished",
+    "has_ac", "has_security", "has_water", "has_highway", "has_generator",
+    "has_solar",
+]
+
+
+class UnseenValues:
+    """Counts of request values the encoder had to fall back on.
+
+    At most max_values distinct values are kept per field; the rest are
+    counted under "<other>", so memory stays fixed whatever clients send.
+    Only touched on a miss, never on the normal path.
+    """
+
+    OTHER = "<other>"
+
+    def __init__(self, max_values=50):
+        self.max_values = max_values
+        self.counts     = {}
+        self._lock      = threading.Lock()
+
+    def add(self, field, value, n=1):
+        with self._lock:
+            values = self.counts.setdefault(field, {})
+            key = value if value in values or len(values) < self.max_values else self.OTHER
+            values[key] = values.get(key, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return {field: {"total": sum(values.values()),
+                            "values": dict(sorted(values.items(), key=lambda kv: -kv[1]))}
+                    for field, values in self.counts.items()}
+
+
+class FeatureEncoder:
+    """Maps property JSON objects into float32 rows in training feature order.
+
+    Column positions, district codes and defaults are resolved once at
+    construction; encode() then only does dict lookups and array stores.
+    """
+
+    def __init__(self, features, district_classes, district_tiers=DISTRICT_TIERS,
+                 premium_areas=PREMIUM_AREAS, property_types=PROPERTY_TYPE_MAP, gazetteer=None):
+        self.features   = list(features)
+        self.n_features = len(self.features)
+        index = {f: i for i, f in enumerate(self.features)}
+
+        # LabelEncoder codes are positions in its sorted classes_
+        self.district_classes = list(district_classes)
+        self.district_codes   = {d: i for i, d in enumerate(self.district_classes)}
+        self.default_district = self.district_codes.get("Colombo", 0)
+        self.district_tiers   = district_tiers
+        self.premium_areas    = premium_areas
+        self.locations        = LocationResolver(**(gazetteer or {}), premium_areas=premium_areas)
+        self.property_types   = property_types
+        self.unseen           = UnseenValues()
+
+        self._numeric  = [(index[f], key, float(default)) for f, key, default in NUMERIC_INPUTS]
+        self._flags    = [(index[f], f) for f in FLAG_INPUTS]
+        self._district = index["district_enc"]
+        self._tier     = index["district_tier"]
+        self._premium  = index["colombo_premium"]
+        self._type     = index["property_type_enc"]
+        self._local    = threading.local()
+
+        # Request keys that set exactly one column (what-if sweeps vary
+        # these by column assignment; anything else is re-encoded)
+        self.column_fields = {key: (i, float) for i, key, _ in self._numeric}
+        self.column_fields.update({key: (i, int) for i, key in self._flags})
+
+    def resolve_district(self, district_name):
+        """The district class a district value encodes as — itself if known,
+        else resolved as location text ("Colombo 7", "Nugegoda", "near Kandy"),
+        else Colombo."""
+        if district_name in self.district_codes:
+            return district_name
+        resolved = self.locations.district(district_name, default=None)
+        if resolved in self.district_codes:
+            return resolved
+        return self.district_classes[self.default_district]
+
+    def encode_district(self, district_name, count=1):
+        """Safely encode district — use Colombo if unseen."""
+        code = self.district_codes.get(district_name)
+        if code is not None:
+            return code
+        self.unseen.add("district", district_name, count)
+        return self.district_codes[self.resolve_district(district_name)]
+
+    def encode(self, body, out):
+        """Fill the 1-D float32 array `out` from one property and return its input summary."""
+        if not isinstance(body, dict):
+            raise ValueError("Property must be a JSON object")
+
+        district      = body.get("district", "Colombo")
+        property_type = body.get("property_type", "house")
+        location      = body.get("location", "")
+        if not isinstance(district, str) or not isinstance(location, str):
+            raise ValueError("district and location must be strings")
+
+        values = {}
+        for i, key, default in self._numeric:
+            out[i] = values[key] = float(body.get(key, default))
+        for i, key in self._flags:
+            out[i] = int(body.get(key, 0))
+
+        out[self._district] = self.encode_district(district)
+        out[self._tier]     = self.district_tiers.get(district, 4)
+        out[self._premium]  = self.locations.is_premium(location, district)
+        out[self._type]     = self.encode_type(property_type)
+
+        return {
+            "district":      district,
+            "property_type": property_type,
+            "bedrooms":      values["bedrooms"],
+            "bathrooms":     values["bathrooms"],
+            "land_size_p":   values["land_size_p"],
+            "floor_area":    values["floor_area"],
+        }
+
+    def encode_type(self, property_type, count=1):
+        code = self.property_types.get(property_type.lower())
+        if code is None:
+            self.unseen.add("property_type", property_type, count)
+            return 0
+        return code
+
+    def encode_one(self, body):
+        """Encode a single property into this thread's preallocated (1, n) row."""
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._local.row = np.zeros((1, self.n_features), dtype=np.float32)
+        summary = self.encode(body, row[0])
+        return row, summary
+
+    def encode_grid(self, base, axes):
+        """Encode every combination of axis values applied to one base property.
+
+        axes is a list of (request key, values). Returns (X, summary) where
+        X has one row per grid point in row-major axis order and summary
+        describes the base property. Single-column fields are written by
+        column assignment; fields such as district that drive several
+        columns are encoded once per distinct value.
+        """
+        shape = [len(values) for _, values in axes]
+        cat_axes = [a for a, (key, _) in enumerate(axes) if key not in self.column_fields]
+
+        # One encoded row per combination of the multi-column axes
+        cat_shape = [shape[a] for a in cat_axes]
+        cat_rows  = np.empty((int(np.prod(cat_shape)), self.n_features), dtype=np.float32)
+        summary   = self.encode(base, cat_rows[0])
+        for k, combo in enumerate(np.ndindex(*cat_shape)):
+            body = dict(base)
+            for a, j in zip(cat_axes, combo):
+                key, values = axes[a]
+                body[key] = values[j]
+            self.encode(body, cat_rows[k])
+
+        grid = np.indices(shape).reshape(len(axes), -1)   # axis value index per point
+        cat_index = (np.ravel_multi_index(grid[cat_axes], cat_shape)
+                     if cat_axes else np.zeros(grid.shape[1], dtype=np.intp))
+        X = cat_rows[cat_index]
+        for a, (key, values) in enumerate(axes):
+            if key in self.column_fields:
+                col, cast = self.column_fields[key]
+                X[:, col] = np.array([cast(v) for v in values], dtype=np.float32)[grid[a]]
+        return X, summary
+
+    def encode_columns(self, n, columns):
+        """Encode n properties given column-wise into one float32 matrix.
+
+        columns maps request keys to either a numeric NumPy array or, for
+        district / property_type / location, a (codes, values) pair of
+        dictionary-encoded strings. Missing columns take the same defaults
+        as encode(). Each distinct string is resolved once, so no
+        per-row Python work is done.
+        """
+        X = np.empty((n, self.n_features), dtype=np.float32)
+        for i, key, default in self._numeric:
+            X[:, i] = columns[key] if key in columns else default
+        for i, key in self._flags:
+            X[:, i] = np.trunc(columns[key]) if key in columns else 0
+
+        def strings(key, default):
+            if key in columns:
+                return columns[key]
+            return np.zeros(n, dtype=np.intp), [default]
+
+        d_codes, districts = strings("district", "Colombo")
+        t_codes, types     = strings("property_type", "house")
+        l_codes, locations = strings("location", "")
+
+        d_counts = np.bincount(d_codes, minlength=len(districts))
+        t_counts = np.bincount(t_codes, minlength=len(types))
+        X[:, self._district] = np.array([self.encode_district(d, int(c)) for d, c in zip(districts, d_counts)],
+                                        dtype=np.float32)[d_codes]
+        X[:, self._tier]     = np.array([self.district_tiers.get(d, 4) for d in districts],
+                                        dtype=np.float32)[d_codes]
+        X[:, self._type]     = np.array([self.encode_type(t, int(c)) for t, c in zip(types, t_counts)],
+                                        dtype=np.float32)[t_codes]
+
+        # colombo_premium looks at location and district together
+        pairs, inverse = np.unique(np.asarray(l_codes, dtype=np.int64) * len(districts) + d_codes,
+                                   return_inverse=True)
+        premium = [self.locations.is_premium(locations[pair // len(districts)],
+                                             districts[pair % len(districts)]) for pair in pairs]
+        X[:, self._premium] = np.array(premium, dtype=np.float32)[inverse.ravel()]
+        return X
+
+    def encode_many(self, bodies):
+        """Encode a list of properties into one matrix.
+
+        Returns (X, summaries, ok_idx, errors) where X holds only the rows
+        that validated, ok_idx maps them back to input positions and errors
+        is a list of (index, message) for the rest.
+        """
+        X = np.empty((len(bodies), self.n_features), dtype=np.float32)
+        summaries, ok_idx, errors = [], [], []
+        for i, body in enumerate(bodies):
+            try:
+                summaries.append(self.encode(body, X[len(ok_idx)]))
+            except (TypeError, ValueError, AttributeError) as e:
+                errors.append((i, str(e)))
+                continue
+            ok_idx.append(i)
+        return X[:len(ok_idx)], summaries, ok_idx, errors
@@ -0,0 +1,119 @@
+"""
+global_explain.py  —  Model-wide SHAP summaries for /explain/global
+====================================================================
+Computed once at training time (train_model.py) over the cleaned
+dataset and packed into the bundle as global_explanation.json, so the
+API serves it as stored bytes with no model work per request:
+
+  importance   mean |SHAP| per feature, largest first
+  dependence   per feature, mean SHAP by value (distinct values for
+               counts and flags, quantile bins for continuous ones) plus
+               a capped sample of (value, SHAP) points for scatter plots
+  districts    per district: rows, mean predicted price and the mean
+               contribution of every feature
+
+SHAP values are in log-price units, as in per-prediction explanations.
+
+Run with:  python global_explain.py build [clean_properties.csv]   (from the api/ folder)
+
+Recomputes it for bundles/CURRENT and writes a new bundle (same model,
+plus the summary) as CURRENT.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+GLOBAL_FILE   = "global_explanation.json"
+CURVE_BINS    = 20     # quantile bins for continuous features
+SAMPLE_POINTS = 300    # scatter points per feature
+
+
+def _dependence(x, shap, rng):
+    values = np.unique(x)
+    if len(values) <= CURVE_BINS:
+        centers, groups = values, [x == v for v in values]
+    else:
+        edges  = np.unique(np.quantile(x, np.linspace(0, 1, CURVE_BINS + 1)))
+        bins   = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, len(edges) - 2)
+        groups = [bins == i for i in range(len(edges) - 1)]
+        centers = [float(np.median(x[g])) if g.any() else None for g in groups]
+    curve = [{"x": round(float(c), 4), "mean_shap": round(float(shap[g].mean()), 5),
+              "count": int(g.sum())}
+             for c, g in zip(centers, groups) if g.any()]
+
+    idx = rng.choice(len(x), size=min(SAMPLE_POINTS, len(x)), replace=False)
+    idx.sort()
+    return {"curve": curve,
+            "points": [[round(float(x[i]), 4), round(float(shap[i]), 5)] for i in idx]}
+
+
+def compute(booster, X, features, district_classes, seed=0):
+    """Global explanation document for a booster over a feature frame."""
+    X = np.asarray(X, dtype=np.float32)
+    contribs = booster.predict(xgb.DMatrix(X, feature_names=list(features)), pred_contribs=True)
+    shap, base = contribs[:, :-1], float(contribs[0, -1])
+    log_pred = contribs.sum(axis=1)
+
+    mean_abs = np.abs(shap).mean(axis=0)
+    order = np.argsort(-mean_abs)
+    rng = np.random.default_rng(seed)
+
+    districts = []
+    codes = X[:, list(features).index("district_enc")].astype(int)
+    for code in np.unique(codes):
+        rows = codes == code
+        name = district_classes[code] if code < len(district_classes) else str(code)
+        districts.append({
+            "district":        name,
+            "count":           int(rows.sum()),
+            "mean_price_lkr":  round(float(np.expm1(log_pred[rows]).mean())),
+            "contributions":   {f: round(float(v), 5) for f, v in zip(features, shap[rows].mean(axis=0))},
+        })
+    districts.sort(key=lambda d: -d["count"])
+
+    return {
+        "rows":       int(len(X)),
+        "base_value": round(base, 5),
+        "importance": [{"feature": features[i], "mean_abs_shap": round(float(mean_abs[i]), 5)}
+                       for i in order],
+        "dependence": {features[i]: _dependence(X[:, i], shap[:, i], rng) for i in order},
+        "districts":  districts,
+    }
+
+
+def write(doc, path):
+    with open(path, "w") as f:
+        json.dump(doc, f, separators=(",", ":"))
+
+
+def main(argv):
+    from bundle import ModelBundle, current_path, repack_bundle
+    from config import CONFIG
+
+    root = CONFIG["bundle_dir"]
+    path = current_path(root)
+    if path is None:
+        sys.exit(f"No CURRENT bundle under {root} — run python bundle.py build first")
+    bundle = ModelBundle.load(path, CONFIG)
+    source = argv[2] if len(argv) > 2 else CONFIG["clean_file"]
+    X = pd.read_csv(source)[bundle.features]
+
+    doc = compute(bundle.booster, X, bundle.features, bundle.district_classes)
+    with tempfile.TemporaryDirectory() as tmp:
+        write(doc, os.path.join(tmp, GLOBAL_FILE))
+        manifest = repack_bundle(root, bundle, {"global_explanation": os.path.join(tmp, GLOBAL_FILE)})
+    top = ", ".join(f"{d['feature']} {d['mean_abs_shap']:.3f}" for d in doc["importance"][:3])
+    print(f"✅ Global explanation over {doc['rows']} rows — top: {top}")
+    print(f"✅ Bundle {manifest['version']} written (CURRENT) — reload with SIGHUP or POST /admin/reload")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        sys.exit("Usage: python global_explain.py build [clean_properties.csv]")
+    main(sys.argv)
@@ -0,0 +1,74 @@
+"""
+gunicorn.conf.py  —  Production prefork serving for the EstateVision API
+=========================================================================
+Run with:  gunicorn -c gunicorn.conf.py app:app   (from the api/ folder)
+
+The master imports app.py once (preload_app), so the model, explainer and
+encoder are loaded a single time and the forked workers share those pages
+copy-on-write. Each worker then caps XGBoost's thread pool so N workers
+don't oversubscribe the cores. Tune with EV_WORKERS, EV_WORKER_THREADS and
+EV_XGB_THREADS (see config.py). bench_prefork.py measures requests/s at
+1, 2 and N workers and checks the sharing: on one core each worker holds
+~157 MB resident, ~90% of it shared, and adds ~14 MB of PSS.
+
+With admission control on, every worker gets a thread for each request
+it may admit or queue plus a few spare threads that answer 503s, so
+excess load is refused by the app straight away instead of waiting
+unseen for a gunicorn thread. All of that fits in EV_WORKER_MAX_THREADS
+per worker: a larger configured queue (or batch-sized concurrency) is
+cut down to fit, never the other way round.
+"""
+
+import gc
+
+from config import CONFIG, CPU_COUNT
+
+bind         = CONFIG["bind"]
+workers      = CONFIG["workers"]
+worker_class = "gthread"
+threads      = CONFIG["worker_threads"]
+if CONFIG["admission_concurrency"]:
+    # Same CONFIG dict app.py builds its AdmissionController from (preloaded
+    # in this process), so the app admits and queues what the pool can hold
+    cap    = max(CONFIG["worker_max_threads"], threads)
+    reject = min(CONFIG["admission_reject_threads"], cap // 8)
+    CONFIG["admission_concurrency"] = min(CONFIG["admission_concurrency"], (cap - reject) // 2)
+    CONFIG["admission_queue"]       = min(CONFIG["admission_queue"],
+                                          cap - reject - CONFIG["admission_concurrency"])
+    threads = max(threads, CONFIG["admission_concurrency"] + CONFIG["admission_queue"] + reject)
+preload_app  = True
+timeout      = 30
+keepalive    = 5
+
+
+def xgb_threads(cfg):
+    """XGBoost threads per worker — explicit setting, else cores / workers."""
+    return CONFIG["xgb_threads"] or max(1, CPU_COUNT // cfg.workers)
+
+
+def when_ready(server):
+    # Move everything loaded so far into the permanent GC generation so
+    # collections in the workers don't write to (and un-share) those pages.
+    gc.freeze()
+    server.log.info(f"Model preloaded — forking {server.cfg.workers} workers × "
+                    f"{server.cfg.threads} threads, {xgb_threads(server.cfg)} XGBoost threads each")
+
+
+def post_fork(server, worker):
+    from app import configure_worker
+    configure_worker(xgb_threads(server.cfg))
+
+
+def post_worker_init(worker):
+    # Installed after gunicorn resets worker signal handlers: SIGHUP to a
+    # worker hot-swaps it onto bundles/CURRENT. SIGHUP to the master instead
+    # replaces workers gracefully; each new one picks up CURRENT in post_fork.
+    from app import install_reload_signal
+    install_reload_signal()
+
+
+def worker_exit(server, worker):
+    # Append whatever the request log writer still has queued
+    from app import request_log
+    if request_log is not None:
+        request_log.close()
@@ -0,0 +1,234 @@
+"""
+locations.py  —  Location text → district and Colombo-premium flag
+===================================================================
+One gazetteer and one resolver shared by the scrapers, preprocess.py
+and the API encoder, so a listing and a request with the same location
+text always get the same district and colombo_premium value.
+
+Text is normalised (lower case, runs of whitespace → one space) and
+matched against regexes built as tries over the gazetteer: common
+prefixes are factored out, so at each text position at most one branch
+advances and resolution is linear in the text, whatever the number of
+names. A district is resolved in this order:
+
+  1. the location starts with a district name    "Kandy, Peradeniya" → Kandy
+  2. the leftmost (then longest) sub-area or district name anywhere
+                                                 "Piliyandala"       → Colombo
+  3. the last district in the listing URL slug   ".../…-for-sale-gampaha-6" → Gampaha
+  4. "Other"
+
+colombo_premium is 1 if any premium-area name occurs anywhere in the
+text — the substring rule the model was trained with.
+
+An alias may repeat a district name only for that same district; one
+that would redirect a district name elsewhere is rejected. Bundles pack
+the district names and aliases as gazetteer.json, so a model keeps
+resolving locations the way it was built with.
+
+Scalar:     resolver.district("Nugegoda")  resolver.is_premium("Colombo 7")
+Vectorised: resolver.districts(series_or_array, urls)  resolver.premium_flags(...)
+            (each distinct string is resolved once; accepts pandas Series
+            without importing pandas itself)
+"""
+
+import json
+import re
+import sys
+
+import numpy as np
+
+DISTRICTS = [
+    "Colombo", "Gampaha", "Kalutara", "Kandy", "Matale",
+    "Nuwara Eliya", "Galle", "Matara", "Hambantota",
+    "Jaffna", "Kilinochchi", "Mannar", "Vavuniya", "Mullaitivu",
+    "Batticaloa", "Ampara", "Trincomalee", "Kurunegala",
+    "Puttalam", "Anuradhapura", "Polonnaruwa", "Badulla",
+    "Monaragala", "Ratnapura", "Kegalle", "Negombo",
+]
+
+# Sub-areas → their parent district
+AREA_TO_DISTRICT = {
+    # Colombo district
+    "piliyandala": "Colombo", "kalubowila": "Colombo", "dematagoda": "Colombo",
+    "dehiwala": "Colombo", "maharagama": "Colombo", "nugegoda": "Colombo",
+    "boralesgamuwa": "Colombo", "kesbewa": "Colombo", "athurugiriya": "Colombo",
+    "malabe": "Colombo", "kottawa": "Colombo", "battaramulla": "Colombo",
+    "rajagiriya": "Colombo", "nawala": "Colombo", "kohuwala": "Colombo",
+    "mount lavinia": "Colombo", "moratuwa": "Colombo", "kaduwela": "Colombo",
+    "mulleriyawa": "Colombo", "thalawathugoda": "Colombo", "hokandara": "Colombo",
+    "padukka": "Colombo", "homagama": "Colombo", "hanwella": "Colombo",
+    "colombo 1": "Colombo", "colombo 2": "Colombo", "colombo 3": "Colombo",
+    "colombo 4": "Colombo", "colombo 5": "Colombo", "colombo 6": "Colombo",
+    "colombo 7": "Colombo", "colombo 8": "Colombo", "colombo 9": "Colombo",
+    "colombo 10": "Colombo", "colombo 11": "Colombo", "colombo 12": "Colombo",
+    "colombo 13": "Colombo", "colombo 14": "Colombo", "colombo 15": "Colombo",
+    # Gampaha district
+    "wattala": "Gampaha", "ja-ela": "Gampaha",
+    "seeduwa": "Gampaha", "kandana": "Gampaha", "ragama": "Gampaha",
+    "gampaha": "Gampaha", "veyangoda": "Gampaha", "nittambuwa": "Gampaha",
+    "minuwangoda": "Gampaha", "mirigama": "Gampaha", "divulapitiya": "Gampaha",
+    "katana": "Gampaha", "kelaniya": "Gampaha", "peliyagoda": "Gampaha",
+    # Kalutara district
+    "kalutara": "Kalutara", "panadura": "Kalutara", "beruwala": "Kalutara",
+    "aluthgama": "Kalutara", "bandaragama": "Kalutara", "horana": "Kalutara",
+    "ingiriya": "Kalutara", "matugama": "Kalutara",
+    # Kandy district
+    "kandy": "Kandy", "peradeniya": "Kandy", "katugastota": "Kandy",
+    "kundasale": "Kandy", "ampitiya": "Kandy", "digana": "Kandy",
+    # Galle district
+    "galle": "Galle", "hikkaduwa": "Galle", "unawatuna": "Galle",
+    "ambalangoda": "Galle", "elpitiya": "Galle", "bentota": "Galle",
+    # Matara district
+    "matara": "Matara", "weligama": "Matara", "mirissa": "Matara",
+    "dickwella": "Matara", "tangalle": "Matara",
+    # Elsewhere
+    "kurunegala": "Kurunegala", "kuliyapitiya": "Kurunegala",
+    "anuradhapura": "Anuradhapura", "trincomalee": "Trincomalee",
+    "jaffna": "Jaffna", "batticaloa": "Batticaloa",
+    "ratnapura": "Ratnapura", "badulla": "Badulla",
+}
+
+# Colombo 1–7 and the neighbourhoods priced like them
+PREMIUM_AREAS = [
+    "colombo 1", "colombo 2", "colombo 3", "colombo 4",
+    "colombo 5", "colombo 6", "colombo 7", "cinnamon",
+    "kollupitiya", "bambalapitiya", "havelock", "borella",
+    "rajagiriya", "battaramulla", "nawala", "nugegoda",
+    "dehiwala", "mount lavinia",
+]
+
+OTHER = "Other"
+
+GAZETTEER_FILE = "gazetteer.json"
+
+def normalize(text):
+    """Lower case, whitespace runs collapsed, ends stripped; None / NaN → ""."""
+    if not isinstance(text, str):
+        if text is None or text != text:
+            return ""
+        text = str(text)
+    return " ".join(text.lower().split())
+
+
+def trie_pattern(words):
+    """Regex source matching any of words, built as a trie so each
+    character position follows at most one branch. Where one word is a
+    prefix of another the longer one is tried first."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+class LocationResolver:
+    """Compiled gazetteer: district and premium-area lookups for location text."""
+
+    def __init__(self, districts=DISTRICTS, aliases=AREA_TO_DISTRICT, premium_areas=PREMIUM_AREAS):
+        self.names   = {normalize(d): d for d in districts}
+        self.aliases = dict(self.names)
+        for alias, district in aliases.items():
+            key = normalize(alias)
+            if self.names.get(key, district) != district:
+                raise ValueError(f"Alias {alias!r} → {district} conflicts with "
+                                 f"district name {self.names[key]!r}")
+            self.aliases[key] = district
+        self._name    = re.compile(trie_pattern(self.names))
+        self._alias   = re.compile(trie_pattern(self.aliases))
+        self._slug    = re.compile(f"[-/]({trie_pattern(self.names)})")
+        self._premium = re.compile(trie_pattern({normalize(p) for p in premium_areas}))
+
+    # ── Scalar ────────────────────────────────────────────────
+    def district(self, location, url="", default=OTHER):
+        """District for one location string (and optionally its listing URL)."""
+        text = normalize(location)
+        m = self._name.match(text)
+        if m:
+            return self.names[m.group()]
+        m = self._alias.search(text)
+        if m:
+            return self.aliases[m.group()]
+        if url:
+            last = None
+            for last in self._slug.finditer(str(url).lower()):
+                pass
+            if last is not None:
+                return self.names[last.group(1)]
+        return default
+
+    def is_premium(self, *texts):
+        """True if any premium-area name occurs in any of the texts."""
+        # No name contains a newline, so no match can span two texts
+        return self._premium.search("\n".join(map(normalize, texts))) is not None
+
+    # ── Vectorised ────────────────────────────────────────────
+    def districts(self, locations, urls=None, default=OTHER):
+        """district() over a Series / array (with optional URLs); returns the same kind."""
+        if urls is None:
+            resolved = _map_unique(_values(locations), lambda loc: self.district(loc, "", default))
+        else:
+            pairs = list(zip(_values(locations), _values(urls)))
+            resolved = _map_unique(pairs, lambda pair: self.district(*pair, default))
+        return _like(locations, resolved)
+
+    def premium_flags(self, *columns):
+        """is_premium() row-wise over equal-length Series / arrays → 0 / 1 ints."""
+        flags = np.zeros(len(columns[0]), dtype=bool)
+        for column in columns:
+            flags |= _map_unique(_values(column), self.is_premium).astype(bool)
+        return _like(columns[0], flags.astype(np.int64))
+
+
+def save_gazetteer(path, districts=DISTRICTS, aliases=AREA_TO_DISTRICT):
+    """Write district names and aliases as JSON (bundle.py packs this file)."""
+    with open(path, "w") as f:
+        json.dump({"districts": list(districts), "aliases": dict(aliases)}, f,
+                  indent=2, sort_keys=True)
+
+
+def load_gazetteer(path):
+    """LocationResolver keyword arguments from a saved gazetteer."""
+    with open(path) as f:
+        data = json.load(f)
+    return {"districts": data["districts"], "aliases": data["aliases"]}
+
+
+def _map_unique(values, fn):
+    """fn applied once per distinct value, broadcast back to every row."""
+    done = {}
+    out = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        try:
+            out[i] = done[value]
+        except KeyError:
+            out[i] = done[value] = fn(value)
+    return out
+
+
+def _is_series(column):
+    # Callers that pass a Series have imported pandas already
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(column, pd.Series)
+
+
+def _values(column):
+    return column.to_numpy() if _is_series(column) else np.asarray(column, dtype=object)
+
+
+def _like(template, values):
+    if _is_series(template):
+        return sys.modules["pandas"].Series(values, index=template.index)
+    return values
+
+
+RESOLVER = LocationResolver()   # the default gazetteer, compiled once per process
@@ -0,0 +1,344 @@
+"""
+market_cube.py  —  Pre-aggregated market statistics for /stats
+================================================================
+Cleaned listings are aggregated into cells of
+
+    district × property_type × district_tier × bedrooms
+
+and each cell keeps, per metric (price, price per perch, price per
+sqft), a count, a sum and a log-bucket quantile sketch: bucket i holds
+values in (γ^(i-1), γ^i] with γ = (1 + α) / (1 - α), so any quantile
+read back from it is within α relative error of the exact one. Sketches
+merge by adding counts, which gives roll-ups over any subset of the
+dimensions, and adding rows only touches their own cells — the cube is
+never recomputed from scratch when preprocessing adds listings.
+
+Rows already counted are remembered by a 64-bit hash of their url (or,
+for clean files written before preprocess.py kept the url, of the whole
+row and its occurrence number), so ingesting a rewritten clean_properties.csv only adds new rows.
+Sketches are insert-only: a listing that later disappears stays counted
+until the next build.
+
+Run with:  python market_cube.py build  [clean_properties.csv]   (from the api/ folder)
+           python market_cube.py update [clean_properties.csv]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ["district", "property_type", "district_tier", "bedrooms"]
+METRICS    = ["price", "price_per_perch", "price_per_sqft"]
+QUANTILES  = [0.1, 0.25, 0.5, 0.75, 0.9]
+ALPHA      = 0.01                # relative accuracy of quantiles
+MAX_VALUE  = 1e12                # values are clipped to [1, MAX_VALUE]
+
+TYPE_NAMES = {0: "house", 1: "apartment", 2: "land"}   # preprocess.py TYPE_MAP codes
+
+
+def _row_hashes(keys):
+    return np.array([int.from_bytes(hashlib.blake2b(k.encode(), digest_size=8).digest(), "little")
+                     for k in keys], dtype=np.uint64)
+
+
+def read_clean(path, district_classes=None):
+    """(key kind, row hashes, dimension frame, metric matrix) for a clean_properties.csv.
+
+    Files without a district name column are decoded with district_classes
+    (the LabelEncoder classes the file was encoded with).
+    """
+    df = pd.read_csv(path)
+    if "district" in df:
+        district = df["district"].fillna("Other").astype(str)
+    elif district_classes is not None:
+        district = pd.Series(np.asarray(district_classes, dtype=object)[df["district_enc"]],
+                             index=df.index)
+    else:
+        raise ValueError(f"{path} has no district column — pass the district classes")
+
+    if "url" in df:
+        keyed_by, keys = "url", df["url"].astype(str)
+    else:   # identical rows are separate listings: key on (row hash, occurrence)
+        row  = pd.util.hash_pandas_object(df, index=False).astype(str)
+        keyed_by, keys = "row", row + "#" + row.groupby(row).cumcount().astype(str)
+    dims = pd.DataFrame({
+        "district":      district,
+        "property_type": df["property_type_enc"].map(TYPE_NAMES).fillna("house"),
+        "district_tier": df["district_tier"].astype(int),
+        "bedrooms":      df["bedrooms"].round().astype(int),
+    })
+    price = df["price_lkr"].to_numpy(dtype=np.float64)
+    land  = df["land_size_p"].to_numpy(dtype=np.float64)
+    floor = df["floor_area_sqft"].to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.column_stack([price,
+                                  np.where(land > 0, price / land, np.nan),
+                                  np.where(floor > 0, price / floor, np.nan)])
+    return keyed_by, _row_hashes(keys), dims, values
+
+
+class _State:
+    """One immutable snapshot of the cube; ingest() swaps in a new one."""
+    __slots__ = ("cells", "index", "counts", "sums")
+
+    def __init__(self, cells, counts, sums):
+        self.cells  = cells                                 # list of dimension tuples
+        self.index  = {c: i for i, c in enumerate(cells)}
+        self.counts = counts                                # (cells, metrics, buckets) int32
+        self.sums   = sums                                  # (cells, metrics) float64
+
+
+class MarketCube:
+    """district × type × tier × bedrooms cells of mergeable quantile sketches."""
+
+    def __init__(self, alpha=ALPHA):
+        self.alpha     = alpha
+        self.gamma     = (1 + alpha) / (1 - alpha)
+        self.log_gamma = np.log(self.gamma)
+        self.n_buckets = int(np.ceil(np.log(MAX_VALUE) / self.log_gamma)) + 1
+        self.district_classes = None   # decodes clean files without a district column
+        self._lock     = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.seen         = set()
+        self.keyed_by     = None       # "url" or "row" — what the seen hashes are of
+        self.source_mtime = None
+        self._state = _State([], np.zeros((0, len(METRICS), self.n_buckets), np.int32),
+                             np.zeros((0, len(METRICS))))
+
+    def __len__(self):
+        return len(self.seen)
+
+    # ── Building ─────────────────────────────────────────────
+    def _bucket(self, values):
+        v = np.clip(values, 1.0, MAX_VALUE)
+        return np.ceil(np.log(v) / self.log_gamma).astype(np.intp)
+
+    def _value(self, buckets):
+        """Representative value of a bucket (relative error ≤ α for anything in it)."""
+        return 2 * self.gamma ** buckets / (self.gamma + 1)
+
+    def add(self, hashes, dims, values):
+        """Count rows whose hash hasn't been seen; returns how many were added."""
+        new = np.array([h not in self.seen for h in hashes.tolist()], dtype=bool)
+        new &= ~pd.Series(hashes).duplicated().to_numpy()
+        if not new.any():
+            return 0
+        dims, values = dims[new], values[new]
+
+        old   = self._state
+        cells = list(old.cells)
+        index = dict(old.index)
+        rows  = np.empty(len(dims), dtype=np.intp)
+        for i, cell in enumerate(dims.itertuples(index=False, name=None)):
+            cell = tuple(_plain(v) for v in cell)
+            j = index.get(cell)
+            if j is None:
+                j = index[cell] = len(cells)
+                cells.append(cell)
+            rows[i] = j
+
+        counts = np.zeros((len(cells), len(METRICS), self.n_buckets), np.int32)
+        counts[:len(old.cells)] = old.counts
+        sums = np.zeros((len(cells), len(METRICS)))
+        sums[:len(old.cells)] = old.sums
+        for m in range(len(METRICS)):
+            ok = ~np.isnan(values[:, m])
+            np.add.at(counts, (rows[ok], m, self._bucket(values[ok, m])), 1)
+            np.add.at(sums, (rows[ok], m), values[ok, m])
+
+        self._state = _State(cells, counts, sums)   # atomic swap
+        self.seen.update(hashes[new].tolist())
+        return int(new.sum())
+
+    def ingest(self, path, district_classes=None):
+        """Add rows of a (re)written clean_properties.csv that aren't counted yet.
+
+        If the file's rows are keyed differently from what the cube has
+        seen (the first clean file with urls), seen rows can't be matched
+        and the cube is rebuilt from this file instead.
+        """
+        with self._lock:
+            mtime = os.stat(path).st_mtime
+            if district_classes is None:
+                district_classes = self.district_classes
+            keyed_by, hashes, dims, values = read_clean(path, district_classes)
+            if self.keyed_by not in (None, keyed_by):
+                print(f"🔄 Market cube: {path} is keyed by {keyed_by}, not {self.keyed_by} — rebuilding")
+                self._reset()
+            added = self.add(hashes, dims, values)
+            self.keyed_by     = keyed_by
+            self.source_mtime = mtime
+            return added
+
+    # ── Persistence ──────────────────────────────────────────
+    def save(self, path):
+        """Sparse .npz: only non-empty buckets are written."""
+        s = self._state
+        cell, metric, bucket = np.nonzero(s.counts)
+        meta = {"alpha": self.alpha, "dimensions": DIMENSIONS, "metrics": METRICS,
+                "cells": [list(c) for c in s.cells], "keyed_by": self.keyed_by,
+                "source_mtime": self.source_mtime}
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, meta=np.frombuffer(json.dumps(meta).encode(), np.uint8),
+                            cell=cell.astype(np.uint32), metric=metric.astype(np.uint8),
+                            bucket=bucket.astype(np.uint16),
+                            count=s.counts[cell, metric, bucket], sums=s.sums,
+                            seen=np.array(sorted(self.seen), dtype=np.uint64))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            meta = json.loads(f["meta"].tobytes())
+            cube = cls(meta["alpha"])
+            cells = [tuple(c) for c in meta["cells"]]
+            counts = np.zeros((len(cells), len(METRICS), cube.n_buckets), np.int32)
+            counts[f["cell"], f["metric"], f["bucket"]] = f["count"]
+            cube._state = _State(cells, counts, f["sums"].copy())
+            cube.seen = set(f["seen"].tolist())
+        cube.keyed_by     = meta["keyed_by"]
+        cube.source_mtime = meta["source_mtime"]
+        return cube
+
+    # ── Querying ─────────────────────────────────────────────
+    def query(self, filters=None, group_by=(), quantiles=QUANTILES):
+        """Roll up every cell matching filters, one result per group_by combination.
+
+        filters maps a dimension to a list of allowed values (districts and
+        types compared case-insensitively). Groups are ordered by row count.
+        """
+        s = self._state
+        groups = {}
+        for i, cell in enumerate(s.cells):
+            if filters and not all(_matches(cell[DIMENSIONS.index(d)], allowed)
+                                   for d, allowed in filters.items()):
+                continue
+            key = tuple(cell[DIMENSIONS.index(d)] for d in group_by)
+            groups.setdefault(key, []).append(i)
+
+        out = []
+        for key, rows in groups.items():
+            counts = s.counts[rows].sum(axis=0)
+            sums   = s.sums[rows].sum(axis=0)
+            group = {d: _plain(v) for d, v in zip(group_by, key)}
+            group["count"] = int(counts[0].sum())
+            for m, name in enumerate(METRICS):
+                group[name] = self._summary(counts[m], sums[m], quantiles)
+            out.append(group)
+        out.sort(key=lambda g: -g["count"])
+        return out
+
+    def _summary(self, counts, total, quantiles):
+        n = int(counts.sum())
+        if n == 0:
+            return {"count": 0}
+        cum = np.cumsum(counts)
+        ranks = np.floor(np.asarray(quantiles) * (n - 1)).astype(np.int64)
+        values = self._value(np.searchsorted(cum, ranks, side="right"))
+        return {
+            "count":     n,
+            "mean":      round(float(total / n)),
+            "median":    round(float(self._value(np.searchsorted(cum, (n - 1) // 2, side="right")))),
+            "quantiles": {str(q): round(float(v)) for q, v in zip(quantiles, values)},
+        }
+
+    def stats(self):
+        s = self._state
+        return {"rows": len(self), "cells": len(s.cells), "alpha": self.alpha,
+                "source_mtime": self.source_mtime}
+
+
+class _Ranges:
+    """Inclusive (lo, hi) integer ranges, matched by comparison so a wide
+    range like bedrooms=0-1000000000 costs no more than 3-5."""
+
+    def __init__(self, spans):
+        self.spans = spans
+
+    def __contains__(self, value):
+        return any(lo <= value <= hi for lo, hi in self.spans)
+
+    def __eq__(self, other):
+        return isinstance(other, _Ranges) and self.spans == other.spans
+
+    def __repr__(self):
+        return f"_Ranges({self.spans})"
+
+
+def _matches(value, allowed):
+    if isinstance(value, str):
+        return value.lower() in allowed
+    return value in allowed
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def parse_filters(args):
+    """Filters from query-string args: comma lists, "a-b" ranges for numeric dimensions."""
+    filters = {}
+    for d in DIMENSIONS:
+        raw = args.get(d)
+        if raw is None or raw == "":
+            continue
+        if d in ("district", "property_type"):
+            filters[d] = {v.strip().lower() for v in raw.split(",")}
+            continue
+        spans = []
+        for part in raw.split(","):
+            lo, _, hi = part.partition("-")
+            try:
+                lo, hi = int(lo), int(hi or lo)
+            except ValueError:
+                raise ValueError(f"{d} must be integers or ranges like 3-5 (got {raw!r})")
+            spans.append((lo, hi))
+        filters[d] = _Ranges(spans)
+    return filters
+
+
+def describe_filters(filters):
+    """JSON-ready echo of parse_filters output; ranges stay as "lo-hi"."""
+    out = {}
+    for d, allowed in filters.items():
+        if isinstance(allowed, _Ranges):
+            out[d] = [lo if lo == hi else f"{lo}-{hi}" for lo, hi in allowed.spans]
+        else:
+            out[d] = sorted(allowed)
+    return out
+
+
+# ═══════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════
+def main(argv):
+    from config import CONFIG
+    command = argv[1] if len(argv) > 1 else "build"
+    source  = argv[2] if len(argv) > 2 else CONFIG["clean_file"]
+    target  = CONFIG["market_cube_file"]
+
+    # District names for clean files that only carry district_enc
+    import joblib
+    classes = joblib.load("district_encoder.pkl").classes_ if os.path.exists("district_encoder.pkl") else None
+
+    if command == "build":
+        cube = MarketCube()
+    elif command == "update":
+        cube = MarketCube.load(target) if os.path.exists(target) else MarketCube()
+    else:
+        sys.exit(f"Unknown command: {command}")
+    added = cube.ingest(source, classes)
+    cube.save(target)
+    print(f"✅ Market cube: +{added} rows → {len(cube)} rows in {cube.stats()['cells']} cells "
+          f"({os.path.getsize(target) / 1024:.1f} KB) → {target}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,201 @@
+"""
+metrics.py  —  Prometheus-format metrics for the API
+=====================================================
+Minimal counters, gauges and histograms rendered in the Prometheus text
+exposition format (version 0.0.4) by GET /metrics. Kept dependency-free
+and cheap enough to leave on permanently: one observation is a bisect
+plus two increments under a per-series lock (about 1µs).
+
+Metrics are per process. Under gunicorn every worker keeps its own
+series, each tagged with its pid in estatevision_model_info, so scrape
+each worker (or sum across pids) rather than one load-balanced URL.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+
+# Seconds; fine resolution at the bottom for the sub-millisecond stages
+LATENCY_BUCKETS = [0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0]
+
+REGISTRY = []
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name       = name
+        self.help       = help
+        self.labelnames = tuple(labelnames)
+        self._children  = {}
+        self._lock      = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        """The series for one label combination (created on first use).
+
+        Look children up once and keep them — the hot path then skips the
+        dict lookup entirely.
+        """
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items(), key=lambda kv: tuple(map(str, kv[0]))):
+            lines.extend(self._render_child(_format_labels(self.labelnames, values), values, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0
+        self.lock  = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests served."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, *labels, amount=1):
+        self.labels(*labels).inc(amount)
+
+    def _render_child(self, label_str, values, child):
+        return [f"{self.name}{label_str} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down; `fn` makes it computed at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+
+    def _new_child(self):
+        return _Value()
+
+    def render(self):
+        if self.fn is not None:
+            # fn returns {label values tuple: value}
+            self._children = {k: _Const(v) for k, v in self.fn().items()}
+        return super().render()
+
+    def _render_child(self, label_str, values, child):
+        return [f"{self.name}{label_str} {_format_value(child.value)}"]
+
+
+class _Const:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class _HistogramSeries:
+    __slots__ = ("buckets", "counts", "sum", "lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts  = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum     = 0.0
+        self.lock    = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum       += value
+
+
+class Histogram(_Metric):
+    """Bucketed distribution (cumulative `le` buckets, _sum and _count)."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramSeries(self.buckets)
+
+    def observe(self, value, *labels):
+        self.labels(*labels).observe(value)
+
+    def _render_child(self, label_str, values, child):
+        with child.lock:
+            counts, total = list(child.counts), child.sum
+        lines, running = [], 0
+        for bound, count in zip(self.buckets + [float("inf")], counts):
+            running += count
+            le = _format_labels(self.labelnames + ("le",), values + (_format_value(bound),))
+            lines.append(f"{self.name}_bucket{le} {running}")
+        lines.append(f"{self.name}_sum{label_str} {total!r}")
+        lines.append(f"{self.name}_count{label_str} {running}")
+        return lines
+
+
+# ── PROCESS ────────────────────────────────────────────────────
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def resident_memory_bytes():
+    """Current RSS from /proc (Linux); peak RSS from getrusage elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def render():
+    """Every registered metric in Prometheus text format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,272 @@
+"""
+price_grid.py  —  Precomputed prediction lattice for /predict/fast
+===================================================================
+An offline step scores the model over a lattice of frontend inputs and
+packs the result into a new bundle; /predict/fast then answers from it
+with a handful of array reads instead of a model call.
+
+  base   log-price over [premium, district, property type, bedrooms,
+         bathrooms, storeys, land knot, floor knot] with every flag off
+  flags  per-flag log-price delta over [flag, district, property type,
+         <flag_rooms>, land knot, floor knot], averaged over a sub-lattice
+         of the other room axes
+
+Land size and floor area are bilinearly interpolated between knots in
+log space; flags are added on top. Deltas are small, so they are stored
+as float16 (base log-prices need float32). Both tensors are .npy files loaded
+with mmap_mode="r", so forked workers share one copy of the pages.
+Inputs outside the lattice (off-grid room counts, unknown districts,
+land or floor outside the knots) are not in the grid — the caller falls
+back to the model.
+
+Run with:  python price_grid.py build [lattice.json]   (from the api/ folder)
+
+Builds from bundles/CURRENT, prints an error report against the live
+model and writes a new bundle (same model, plus the grid) as CURRENT.
+lattice.json may override any key of LATTICE. train_model.py and
+compress.py build score the grid for their own model before packing.
+
+The tensors (~20 MB) are build output, not source: they are kept out of
+git, so a checkout's bundle has no grid until this is run at deploy —
+the API warns at load while /predict/fast has none to answer from.
+"""
+
+import bisect
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from features import FLAG_INPUTS, NUMERIC_INPUTS
+
+GRID_FILE  = "price_grid.npy"
+FLAGS_FILE = "price_grid_flags.npy"
+AXES_FILE  = "price_grid.json"
+
+LATTICE = {
+    "bedrooms":    list(range(1, 11)),
+    "bathrooms":   list(range(1, 11)),
+    "storeys":     [1, 2, 3, 4],
+    "land_size_p": [1, 3, 5, 7, 10, 15, 20, 30, 50, 100, 200],
+    "floor_area":  [0, 500, 800, 1200, 1600, 2000, 2500, 3000, 4000, 5500, 8000, 12000],
+    # Room axes the flag deltas keep; the rest are averaged over flag_<axis>
+    "flag_rooms":     ["bedrooms", "bathrooms"],
+    "flag_bedrooms":  [2, 3, 4, 5],
+    "flag_bathrooms": [1, 2, 3, 4],
+    "flag_storeys":   [1, 2],
+}
+PROPERTY_TYPES = ["house", "apartment"]
+ROOM_AXES      = ["bedrooms", "bathrooms", "storeys"]
+REPORT_ROWS    = 20_000
+
+
+# ═══════════════════════════════════════════════════════
+# SERVING
+# ═══════════════════════════════════════════════════════
+class PriceGrid:
+    """O(1) log-price lookups from a lattice packed in a bundle."""
+
+    def __init__(self, base, flags, axes, encoder):
+        self.base    = base
+        self.flags   = flags
+        self.axes    = axes
+        self.encoder = encoder
+        self.district_index = {d: i for i, d in enumerate(axes["district"])}
+        self.type_index     = {t: encoder.property_types.get(t, 0) for t in encoder.property_types}
+        self.room_index     = {k: {float(v): i for i, v in enumerate(axes[k])} for k in ROOM_AXES}
+        self.land  = [float(v) for v in axes["land_size_p"]]
+        self.floor = [float(v) for v in axes["floor_area"]]
+        self.flag_keys = axes["flags"]
+        self.flag_rooms = [ROOM_AXES.index(k) for k in axes["flag_rooms"]]
+        self.defaults  = axes["defaults"]
+
+    @classmethod
+    def load(cls, grid_path, flags_path, axes_path, encoder):
+        with open(axes_path) as f:
+            axes = json.load(f)
+        return cls(np.load(grid_path, mmap_mode="r"), np.load(flags_path, mmap_mode="r"),
+                   axes, encoder)
+
+    @staticmethod
+    def _bracket(knots, value):
+        """(lower knot index, weight of the upper knot), or None off the lattice."""
+        if not knots[0] <= value <= knots[-1]:
+            return None
+        i = min(bisect.bisect_right(knots, value) - 1, len(knots) - 2)
+        return i, (value - knots[i]) / (knots[i + 1] - knots[i])
+
+    def lookup(self, body):
+        """Interpolated log-price for a property JSON object, or None if off-grid."""
+        district = body.get("district", "Colombo")
+        d = self.district_index.get(district)
+        t = self.type_index.get(str(body.get("property_type", "house")).lower())
+        if d is None or t is None:
+            return None
+
+        premium = int(self.encoder.locations.is_premium(body.get("location", ""), district))
+
+        rooms = []
+        for key in ROOM_AXES:
+            i = self.room_index[key].get(float(body.get(key, self.defaults[key])))
+            if i is None:
+                return None
+            rooms.append(i)
+
+        land  = self._bracket(self.land, float(body.get("land_size_p", self.defaults["land_size_p"])))
+        floor = self._bracket(self.floor, float(body.get("floor_area", self.defaults["floor_area"])))
+        if land is None or floor is None:
+            return None
+        (li, lw), (fi, fw) = land, floor
+
+        cell = self.base[(premium, d, t, *rooms, slice(li, li + 2), slice(fi, fi + 2))]
+        log_price = _bilinear(cell, lw, fw)
+        kept = tuple(rooms[i] for i in self.flag_rooms)
+        for f, key in enumerate(self.flag_keys):
+            if int(body.get(key, 0)):
+                cell = self.flags[(f, d, t, *kept, slice(li, li + 2), slice(fi, fi + 2))]
+                log_price += _bilinear(cell, lw, fw)
+        return log_price
+
+    def stats(self):
+        return {"cells": int(self.base.size), "bytes": int(self.base.nbytes + self.flags.nbytes),
+                "report": self.axes.get("report")}
+
+
+def _bilinear(cell, lw, fw):
+    """Interpolate a 2 × 2 (land, floor) block."""
+    top    = cell[0, 0] * (1 - fw) + cell[0, 1] * fw
+    bottom = cell[1, 0] * (1 - fw) + cell[1, 1] * fw
+    return float(top * (1 - lw) + bottom * lw)
+
+
+# ═══════════════════════════════════════════════════════
+# BUILDING
+# ═══════════════════════════════════════════════════════
+def _score(encoder, predict_log, axes, premium):
+    """Log-prices over the product of axes (row-major), premium column forced."""
+    X, _ = encoder.encode_grid({}, axes)
+    X[:, encoder._premium] = premium
+    return predict_log(X)
+
+
+def build(encoder, predict_log, lattice):
+    """(base, flags, axes) tensors for one model — predict_log maps an
+    encoded float32 matrix to log-prices (ModelBundle.predict_log)."""
+    districts = encoder.district_classes
+    knots = [("land_size_p", lattice["land_size_p"]), ("floor_area", lattice["floor_area"])]
+    head  = [("district", districts), ("property_type", PROPERTY_TYPES)]
+    rooms = [(key, lattice[key]) for key in ROOM_AXES]
+    shape = [len(districts), len(PROPERTY_TYPES)] + [len(lattice[k]) for k in ROOM_AXES] \
+        + [len(lattice["land_size_p"]), len(lattice["floor_area"])]
+
+    base = np.stack([_score(encoder, predict_log, head + rooms + knots, p).reshape(shape) for p in (0, 1)])
+
+    # Flag deltas keep the room axes in lattice["flag_rooms"] and average
+    # over the flag_<axis> sub-lattice of the others
+    kept   = [(key, lattice[key]) for key in lattice["flag_rooms"]]
+    sub    = [(key, lattice[f"flag_{key}"]) for key in ROOM_AXES if key not in lattice["flag_rooms"]]
+    n_sub  = int(np.prod([len(v) for _, v in sub]))
+    flag_shape = shape[:2] + [len(v) for _, v in kept] + [n_sub] + shape[-2:]
+    without = _score(encoder, predict_log, head + kept + sub + knots, 0)
+    flags = []
+    for key in FLAG_INPUTS:
+        with_flag = _score(encoder, predict_log, head + kept + sub + knots + [(key, [1])], 0)
+        flags.append((with_flag - without).reshape(flag_shape).mean(axis=2 + len(kept)))
+
+    axes = {
+        "district":      list(districts),
+        "property_type": PROPERTY_TYPES,
+        **{k: lattice[k] for k in ROOM_AXES + ["land_size_p", "floor_area"]},
+        "flags":         list(FLAG_INPUTS),
+        "flag_rooms":    list(lattice["flag_rooms"]),
+        "defaults":      {key: default for _, key, default in NUMERIC_INPUTS},
+    }
+    return base.astype(np.float32), np.stack(flags).astype(np.float16), axes
+
+
+def error_report(encoder, predict_log, grid, rows=REPORT_ROWS, seed=0):
+    """Grid vs live model on random frontend-like inputs (on-lattice rooms,
+    log-normal land and floor area, a quarter of flags set, 10% premium)."""
+    rng = np.random.default_rng(seed)
+    axes = grid.axes
+    bodies = [{
+        "district":      str(rng.choice(axes["district"])),
+        "property_type": str(rng.choice(PROPERTY_TYPES)),
+        "bedrooms":      int(rng.choice(axes["bedrooms"][:6])),
+        "bathrooms":     int(rng.choice(axes["bathrooms"][:5])),
+        "storeys":       int(rng.choice(axes["storeys"][:3])),
+        "land_size_p":   float(np.round(rng.lognormal(np.log(10), 0.7), 1)),
+        "floor_area":    float(np.round(rng.lognormal(np.log(1800), 0.5))),
+        "location":      "Colombo 7" if rng.random() < 0.1 else "",
+        **{key: int(rng.random() < 0.25) for key in FLAG_INPUTS},
+    } for _ in range(rows)]
+
+    X, _, _, _ = encoder.encode_many(bodies)
+    live = np.expm1(predict_log(X).astype(np.float64))
+    looked = [grid.lookup(b) for b in bodies]
+    on_grid = np.array([v is not None for v in looked])
+    approx = np.expm1(np.array([v for v in looked if v is not None], dtype=np.float64))
+    err = np.abs(approx - live[on_grid]) / live[on_grid] * 100
+
+    no_flags = np.array([not any(b[k] for k in FLAG_INPUTS) for b in bodies])[on_grid]
+    return {
+        "rows":           rows,
+        "on_grid":        round(float(on_grid.mean()), 4),
+        "mape_pct":       round(float(err.mean()), 3),
+        "p50_pct":        round(float(np.percentile(err, 50)), 3),
+        "p95_pct":        round(float(np.percentile(err, 95)), 3),
+        "max_pct":        round(float(err.max()), 3),
+        "mape_no_flags_pct": round(float(err[no_flags].mean()), 3) if no_flags.any() else None,
+    }
+
+
+def write(encoder, predict_log, directory, lattice=LATTICE):
+    """Score the lattice, print the error report and save the three grid
+    files into directory → ({manifest name: path}, report)."""
+    base, flags, axes = build(encoder, predict_log, lattice)
+    report = error_report(encoder, predict_log, PriceGrid(base, flags, axes, encoder))
+    axes["report"] = report
+    print(f"✅ {base.size:,} base cells + {flags.size:,} flag cells "
+          f"({(base.nbytes + flags.nbytes) / 1e6:.1f} MB)")
+    print(f"   Error vs live model on {report['rows']:,} inputs ({report['on_grid']:.0%} on grid):")
+    print(f"   MAPE {report['mape_pct']}%  p50 {report['p50_pct']}%  p95 {report['p95_pct']}%"
+          f"  max {report['max_pct']}%  (no flags: MAPE {report['mape_no_flags_pct']}%)")
+
+    files = {"grid":       os.path.join(directory, GRID_FILE),
+             "grid_flags": os.path.join(directory, FLAGS_FILE),
+             "grid_axes":  os.path.join(directory, AXES_FILE)}
+    np.save(files["grid"], base)
+    np.save(files["grid_flags"], flags)
+    with open(files["grid_axes"], "w") as f:
+        json.dump(axes, f, indent=1)
+    return files, report
+
+
+def main(argv):
+    from bundle import ModelBundle, current_path, repack_bundle
+    from config import CONFIG
+
+    lattice = dict(LATTICE)
+    if len(argv) > 2:
+        with open(argv[2]) as f:
+            lattice.update(json.load(f))
+
+    root = CONFIG["bundle_dir"]
+    path = current_path(root)
+    if path is None:
+        sys.exit(f"No CURRENT bundle under {root} — run python bundle.py build first")
+    bundle = ModelBundle.load(path, CONFIG)
+
+    print(f"Scoring lattice for bundle {bundle.version}...")
+    with tempfile.TemporaryDirectory() as tmp:
+        files, report = write(bundle.encoder, bundle.predict_log, tmp, lattice)
+        manifest = repack_bundle(root, bundle, files, extra={"grid_report": report})
+    print(f"✅ Bundle {manifest['version']} written (CURRENT) — reload with SIGHUP or POST /admin/reload")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        sys.exit("Usage: python price_grid.py build [lattice.json]")
+    main(sys.argv)
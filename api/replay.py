@@ -0,0 +1,263 @@
+"""
+replay.py  —  Replay a recorded request log and diff the predictions
+=====================================================================
+Run with:  python replay.py LOG [LOG ...] [options]   (from the api/ folder)
+
+LOG files are request_log.py output (plain or .gz, e.g. logs/requests.jsonl*),
+merged by timestamp. Each record is sent again, either to a running server
+(--url) or to app.py loaded in this process — optionally on another bundle
+(--bundle bundles/<version>), to check a retrained model before making it
+CURRENT. Requests carry the X-EstateVision-Replay header, so the server
+does not log them again.
+
+  --speed S        1 = original pacing, 10 = ten times faster, 0 = as fast as possible
+  --concurrency N  requests in flight at once (default 8)
+  --limit N        stop after N records
+  --endpoints a,b  only replay these endpoints (default: all in the log)
+  --fail-over P    exit non-zero if any price moved more than P %, or any
+                   status or response shape changed
+
+Reports achieved rate, latency (recorded vs replayed), status changes and,
+for every predicted_price_lkr in a response, the relative change between
+the recorded and the replayed answer — worst cases listed with their input.
+"""
+
+import argparse
+import gzip
+import heapq
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from request_log import REPLAY_HEADER
+
+PRICE_KEY = "predicted_price_lkr"
+
+
+# ── Reading ───────────────────────────────────────────────────
+def read_log(path):
+    """Records of one log file, in file order (bad lines skipped)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def read_logs(paths, endpoints=None, limit=None):
+    """All records of several files merged by timestamp."""
+    merged = heapq.merge(*(read_log(p) for p in paths), key=lambda r: r["ts"])
+    count = 0
+    for record in merged:
+        if endpoints and record.get("endpoint") not in endpoints:
+            continue
+        if record.get("request") is None:
+            continue
+        yield record
+        count += 1
+        if limit and count >= limit:
+            return
+
+
+def prices(payload):
+    """Every predicted_price_lkr in a response, flattened in document order."""
+    out = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == PRICE_KEY:
+                    out.extend(np.ravel(value).tolist() if isinstance(value, list) else [value])
+                else:
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+    walk(payload)
+    return out
+
+
+# ── Targets ───────────────────────────────────────────────────
+class HTTPTarget:
+    """A running server; one connection per worker thread."""
+
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.local   = threading.local()
+        self.version = None
+        status, _, health = self.send("GET", "/", None)
+        if status == 200 and health:
+            self.version = health.get("bundle", {}).get("version")
+
+    def send(self, method, path, body):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port,
+                                                                timeout=self.timeout)
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                         headers={"Content-Type": "application/json", REPLAY_HEADER: "1"})
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self.local.conn = None
+            raise
+        elapsed = time.perf_counter() - started
+        try:
+            return response.status, elapsed, json.loads(data)
+        except ValueError:
+            return response.status, elapsed, None
+
+
+class InProcessTarget:
+    """app.py imported here, optionally switched onto another bundle."""
+
+    def __init__(self, bundle_path=None):
+        os.environ["EV_REQUEST_LOG"] = ""   # don't record the replay itself
+        import app
+        if bundle_path:
+            app.reload_bundle(bundle_path)
+        else:
+            app.warmup()
+        app.ready.set()
+        self.app     = app
+        self.client  = app.app.test_client()
+        self.version = app.bundle.version
+
+    def send(self, method, path, body):
+        started  = time.perf_counter()
+        response = self.client.open(path, method=method, json=body,
+                                    headers={REPLAY_HEADER: "1"})
+        elapsed  = time.perf_counter() - started
+        return response.status_code, elapsed, response.get_json(silent=True)
+
+
+# ── Replay ────────────────────────────────────────────────────
+def compare(record, payload):
+    """[(recorded, replayed, relative change)] per price, None if the shapes differ."""
+    old, new = prices(record.get("response")), prices(payload)
+    if len(old) != len(new):
+        return None
+    return [(a, b, (b - a) / a if a else 0.0)
+            for a, b in zip(old, new) if a is not None and b is not None]
+
+
+def replay(records, target, speed=1.0, concurrency=8):
+    """Send every record, paced like the original traffic; per-record results."""
+    results, lock = [], threading.Lock()
+
+    def one(record):
+        try:
+            status, elapsed, payload = target.send(record["method"], record["path"],
+                                                   record["request"])
+        except (OSError, http.client.HTTPException) as e:
+            status, elapsed, payload = type(e).__name__, None, None
+        diffs = compare(record, payload) if status == record["status"] else []
+        with lock:
+            results.append({"record": record, "status": status, "latency_s": elapsed,
+                            "status_changed": status != record["status"],
+                            "shape_changed": diffs is None, "diffs": diffs or []})
+
+    started = time.perf_counter()
+    first_ts = None
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for record in records:
+            if first_ts is None:
+                first_ts = record["ts"]
+            if speed > 0:
+                delay = started + (record["ts"] - first_ts) / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(one, record)
+    return results, time.perf_counter() - started
+
+
+def report(results, wall_s, recorded_versions, target_version, top=10):
+    """Print the summary; returns the largest absolute price change (fraction)."""
+    if not results:
+        print("   Nothing to replay")
+        return 0.0
+    recorded = np.array([r["record"]["latency_ms"] for r in results])
+    replayed = np.array([r["latency_s"] * 1000 for r in results if r["latency_s"] is not None])
+    print(f"   replayed {len(results)} requests in {wall_s:.1f}s "
+          f"({len(results) / max(wall_s, 1e-9):.1f} req/s)")
+    print(f"   bundle   recorded {', '.join(sorted(recorded_versions))}  →  replayed {target_version}")
+    for label, ms in (("recorded", recorded), ("replayed", replayed)):
+        if len(ms):
+            print(f"   latency  {label}   p50 {np.percentile(ms, 50):8.2f} ms   "
+                  f"p95 {np.percentile(ms, 95):8.2f} ms   p99 {np.percentile(ms, 99):8.2f} ms")
+
+    status_changes = [r for r in results if r["status_changed"]]
+    print(f"   status changed on {len(status_changes)} requests")
+    for r in status_changes[:top]:
+        print(f"      {r['record']['path']:<32} {r['record']['status']} → {r['status']}")
+    shape_changes = sum(r["shape_changed"] for r in results)
+    if shape_changes:
+        print(f"   {shape_changes} responses have a different number of prices")
+
+    diffs = [(abs(d[2]), d, r["record"]) for r in results for d in r["diffs"]]
+    if not diffs:
+        print("   no prices to compare")
+        return 0.0
+    rel = np.array([d[0] for d in diffs]) * 100
+    moved = int((rel > 0).sum())
+    print(f"   prices   {len(rel)} compared, {moved} changed   "
+          f"mean |Δ| {rel.mean():.3f}%   p95 {np.percentile(rel, 95):.3f}%   max {rel.max():.3f}%")
+    for _, (old, new, change), record in heapq.nlargest(top, diffs, key=lambda d: d[0]):
+        if change == 0:
+            break
+        body = json.dumps(record["request"], separators=(",", ":"))
+        print(f"      {change * 100:+8.3f}%   {old:>14,.0f} → {new:>14,.0f}   "
+              f"{record['path']}  {body[:100]}")
+    return float(rel.max()) / 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded EstateVision request log.")
+    parser.add_argument("logs", nargs="+", help="request log files (.jsonl or .jsonl.gz)")
+    parser.add_argument("--url", help="replay against a running server instead of in-process")
+    parser.add_argument("--bundle", help="in-process: bundle directory to score with")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--endpoints", help="comma-separated endpoint names")
+    parser.add_argument("--fail-over", type=float, help="max allowed price change, %%")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.url and args.bundle:
+        sys.exit("--bundle only applies in-process; point --url at a server running that bundle")
+    target = HTTPTarget(args.url) if args.url else InProcessTarget(args.bundle)
+    endpoints = set(args.endpoints.split(",")) if args.endpoints else None
+    records = list(read_logs(args.logs, endpoints, args.limit))
+    print(f"🔄 Replaying {len(records)} records at "
+          f"{'full speed' if args.speed <= 0 else f'{args.speed:g}× speed'}, "
+          f"concurrency {args.concurrency}")
+
+    results, wall_s = replay(records, target, args.speed, args.concurrency)
+    worst = report(results, wall_s, {str(r.get("bundle")) for r in records},
+                   target.version, args.top)
+
+    if args.fail_over is not None:
+        if worst * 100 > args.fail_over:
+            sys.exit(f"❌ Largest price change {worst * 100:.3f}% exceeds {args.fail_over}%")
+        if any(r["status_changed"] or r["shape_changed"] for r in results):
+            sys.exit("❌ Some requests changed status or response shape")
+    print("✅ Replay matches the recording" if worst == 0 else "✅ Replay finished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+request_log.py  —  Append-only request/response log for replay
+===============================================================
+Request threads only hand a tuple of raw bytes to a bounded queue; one
+writer thread per process turns them into JSON lines and appends each
+batch (up to batch_size records or flush_s of traffic) with a single
+O_APPEND write, so gunicorn workers can share one file without
+interleaving lines. A full queue drops records instead of blocking a
+request, and counts them.
+
+One record per line:
+
+  {"ts": 1760000000.123, "pid": 4242, "bundle": "a6e45fedafb3",
+   "method": "POST", "path": "/predict?explain=true", "endpoint": "predict",
+   "status": 200, "latency_ms": 1.84, "request": {...}, "response": {...}}
+
+Rotation is by size: once the file passes max_bytes the writer that
+noticed renames it to .1, shifting older files up and deleting past
+`backups`. With compress on, files are gzipped when they shift from .1
+to .2 (logrotate's delaycompress), by which time no worker can still be
+appending to them. Rotation holds an flock on <path>.lock; the other
+workers notice the new inode on their next batch and reopen.
+
+replay.py reads these files (plain or .gz) back.
+"""
+
+import atexit
+import fcntl
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+REPLAY_HEADER = "X-EstateVision-Replay"   # requests sent by replay.py are not logged
+
+
+class RequestLogger:
+    """Batched, rotating JSON-lines writer fed from request threads."""
+
+    def __init__(self, path, max_bytes=64 << 20, backups=5, compress=True,
+                 queue_size=10_000, batch_size=256, flush_s=0.5):
+        self.path       = path
+        self.max_bytes  = max_bytes
+        self.backups    = backups
+        self.compress   = compress
+        self.batch_size = batch_size
+        self.flush_s    = flush_s
+        self.written = self.dropped = self.failed = self.rotations = 0
+        self._queue  = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock   = threading.Lock()
+        self._fd     = None
+
+    def log(self, *record):
+        """Queue one record (see _line for the fields); never blocks."""
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        # Started on first use, so a logger created before a fork works in the child
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True,
+                                                name="request-log")
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _loop(self):
+        while True:
+            records = [self._queue.get()]
+            if records[0] is None:
+                return
+            deadline = time.monotonic() + self.flush_s
+            while len(records) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    record = self._queue.get(timeout=remaining) if remaining > 0 \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._write(records)
+                    return
+                records.append(record)
+            self._write(records)
+
+    def close(self, timeout=5):
+        """Write what is queued and stop the writer (registered with atexit)."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    # ── Writing ───────────────────────────────────────────────
+    @staticmethod
+    def _line(ts, pid, version, method, path, endpoint, status, latency_s, body, payload):
+        def parse(raw):
+            try:
+                return json.loads(raw) if raw else None
+            except ValueError:
+                return None
+        return json.dumps({
+            "ts":         round(ts, 3),
+            "pid":        pid,
+            "bundle":     version,
+            "method":     method,
+            "path":       path,
+            "endpoint":   endpoint,
+            "status":     status,
+            "latency_ms": round(latency_s * 1000, 2),
+            "request":    parse(body),
+            "response":   parse(payload),
+        }, separators=(",", ":")) + "\n"
+
+    def _write(self, records):
+        try:
+            data = "".join(self._line(*r) for r in records).encode()
+            self._open()
+            os.write(self._fd, data)   # one append per batch keeps lines whole
+            self.written += len(records)
+            if self.max_bytes and os.fstat(self._fd).st_size >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            self.failed += len(records)
+            print(f"❌ Request log write failed: {e}")
+            self._close_fd()
+
+    def _open(self):
+        """(Re)open path if this process has no fd or another one rotated it."""
+        if self._fd is not None:
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._fd).st_ino:
+                    return
+            except FileNotFoundError:
+                pass
+            self._close_fd()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _close_fd(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    # ── Rotation ──────────────────────────────────────────────
+    def _rotated(self, n):
+        plain = f"{self.path}.{n}"
+        return plain + ".gz" if os.path.exists(plain + ".gz") else plain
+
+    def _rotate(self):
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            if st.st_ino != os.fstat(self._fd).st_ino or st.st_size < self.max_bytes:
+                return   # another worker rotated first; _open() picks up the new file
+
+            oldest = self._rotated(self.backups)
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for n in range(self.backups - 1, 0, -1):
+                src = self._rotated(n)
+                if not os.path.exists(src):
+                    continue
+                dst = f"{self.path}.{n + 1}" + (".gz" if src.endswith(".gz") else "")
+                if n == 1 and self.compress and not src.endswith(".gz"):
+                    with open(src, "rb") as f_in, gzip.open(dst + ".gz", "wb") as f_out:
+                        shutil.copyfileobj(f_in, f_out)
+                    os.remove(src)
+                else:
+                    os.replace(src, dst)
+            if self.backups > 0:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+            self.rotations += 1
+        self._close_fd()
+
+    def stats(self):
+        return {
+            "path":      self.path,
+            "queued":    self._queue.qsize(),
+            "written":   self.written,
+            "dropped":   self.dropped,
+            "failed":    self.failed,
+            "rotations": self.rotations,
+        }
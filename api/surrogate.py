@@ -0,0 +1,366 @@
+"""
+surrogate.py  —  Distilled fast-tier model for /predict?tier=fast
+==================================================================
+A shallow gradient-boosted model (depth SURROGATE["depth"]) fitted to the
+full model's log-price predictions — not to listing prices — over the
+training rows, jittered copies of them and frontend-like synthetic
+inputs. Packed into the bundle as surrogate.npz and served for price
+previews where the full model plus SHAP is too slow.
+
+Evaluation never walks nodes one by one: the row is compared against
+every distinct split point at once (one gather + compare), then each
+level of the complete, heap-ordered trees is one gather of the split
+index and one of that comparison, and the leaves are summed. At depth 5
+and 300 trees one row takes ~40 µs, range and uncertainty checks included.
+
+Two checks decide whether an answer is served, otherwise the caller
+falls back to the full model:
+
+  range        every encoded feature inside the span the surrogate was
+               fitted on (0.1–99.9th percentile of the distillation set)
+  uncertainty  the estimated |surrogate − full model| in log-price must be
+               at most max_error. The estimate is the mean over trees of
+               each reached leaf's mean absolute residual on a calibration
+               draw, so it rides along with the leaf sum. max_error is set
+               at build time so CONFIG["surrogate_fallback_share"] of the
+               calibration rows fall back; EV_SURROGATE_MAX_ERROR overrides
+
+Run with:  python surrogate.py build|report [clean_properties.csv]   (from the api/ folder)
+
+build distils bundles/CURRENT's model and writes a new bundle (same
+model, plus the surrogate) as CURRENT; report only prints the fit.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from features import FLAG_INPUTS
+
+SURROGATE_FILE = "surrogate.npz"
+
+SURROGATE = {
+    "depth":          5,
+    "trees":          300,
+    "eta":            0.2,
+    "jittered_rows":  120_000,   # training rows with perturbed sizes, rooms and flags
+    "synthetic_rows": 120_000,   # frontend-like inputs over every district
+    "holdout_rows":   40_000,    # residual calibration + report, never fitted
+    "range_quantile": 0.001,
+}
+ROOMS = ("bedrooms", "bathrooms", "storeys")
+SIZES = ("land_size_p", "floor_area_sqft")
+
+
+# ═══════════════════════════════════════════════════════
+# SERVING
+# ═══════════════════════════════════════════════════════
+class Surrogate:
+    """Complete depth-d trees over a shared table of split points.
+
+    Nodes are heap-numbered from 1 (children of n are 2n and 2n + 1), so
+    one level is node = 2 * node + went_right. Split point 0 is a +inf
+    threshold no in-range value reaches: it pads shallow branches, whose
+    leaf value is copied into every heap leaf below them.
+    """
+
+    def __init__(self, cut_feature, cut_threshold, node_cut, leaf_value, leaf_error,
+                 lower, upper, base_score, depth, meta):
+        self.cut_feature   = cut_feature     # (n_cuts,) feature of each split point
+        self.cut_threshold = cut_threshold   # (n_cuts,) go right if x >= threshold
+        self.node_cut      = node_cut        # (n_trees * (2^d - 1),) split point per node
+        self.leaf_value    = leaf_value      # (n_trees * 2^d,)
+        self.leaf_error    = leaf_error      # (n_trees * 2^d,) mean |residual| per leaf
+        self.lower         = lower
+        self.upper         = upper
+        self.base_score    = base_score
+        self.depth         = depth
+        self.meta          = meta
+        self.n_trees       = len(node_cut) // (2 ** depth - 1)
+        self.n_cuts        = len(cut_feature)
+        trees = np.arange(self.n_trees, dtype=np.intp)
+        self._internal = trees * (2 ** depth - 1) - 1      # node n of tree t → node_cut[_internal[t] + n]
+        self._leaves   = trees * 2 ** depth - 2 ** depth   # leaf n of tree t → leaf_value[_leaves[t] + n]
+        self._roots    = np.ones(self.n_trees, dtype=np.intp)
+        # Value + 1j · error / n_trees: one gather and one sum of a flat
+        # complex array give the prediction and the mean leaf error together
+        # (a 2-column float table takes ~4× as long to reduce)
+        self._table = leaf_value + 1j * (leaf_error.astype(np.float64) / self.n_trees)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(
+                cut_feature=f["cut_feature"].astype(np.intp),
+                cut_threshold=f["cut_threshold"].astype(np.float32),
+                node_cut=f["node_cut"].astype(np.intp),
+                leaf_value=f["leaf_value"].astype(np.float32),
+                leaf_error=f["leaf_error"].astype(np.float32),
+                lower=f["lower"].astype(np.float32),
+                upper=f["upper"].astype(np.float32),
+                base_score=float(f["base_score"]),
+                depth=int(f["depth"]),
+                meta=json.loads(str(f["meta"])),
+            )
+
+    def save(self, path):
+        index = np.min_scalar_type(max(self.n_cuts, len(self.lower)))
+        np.savez_compressed(
+            path, cut_feature=self.cut_feature.astype(index),
+            cut_threshold=self.cut_threshold, node_cut=self.node_cut.astype(index),
+            leaf_value=self.leaf_value, leaf_error=self.leaf_error,
+            lower=self.lower, upper=self.upper, base_score=np.float64(self.base_score),
+            depth=np.int64(self.depth), meta=np.array(json.dumps(self.meta)))
+
+    def leaves(self, X):
+        """Flat leaf index reached in every tree, shape (n_rows, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        right = X[:, self.cut_feature] >= self.cut_threshold
+        rows = np.arange(len(X))[:, None]
+        node = np.ones((len(X), self.n_trees), dtype=np.intp)
+        for _ in range(self.depth):
+            node = 2 * node + right[rows, self.node_cut[self._internal + node]]
+        return node + self._leaves
+
+    def predict(self, X):
+        """(log-price, estimated |error|) per row."""
+        leaves = self.leaves(X)
+        return (self.base_score + self.leaf_value[leaves].sum(axis=1, dtype=np.float64),
+                self.leaf_error[leaves].mean(axis=1))
+
+    def in_range(self, X):
+        """Rows whose every feature lies inside the fitted span (NaN never does)."""
+        X = np.asarray(X, dtype=np.float32)
+        return ((X >= self.lower) & (X <= self.upper)).all(axis=1)
+
+    @property
+    def max_error(self):
+        """Uncertainty threshold calibrated when the surrogate was built."""
+        return self.meta["max_error"]
+
+    def answer(self, x, max_error):
+        """(log-price, None) for one encoded row, or (None, reason) when the
+        full model should answer: "out_of_range" or "uncertain"."""
+        if not ((x >= self.lower) & (x <= self.upper)).all():
+            return None, "out_of_range"
+        right = x[self.cut_feature] >= self.cut_threshold
+        node = self._roots
+        for _ in range(self.depth):
+            node = 2 * node + right[self.node_cut[self._internal + node]]
+        total = self._table[node + self._leaves].sum()
+        if total.imag > max_error:
+            return None, "uncertain"
+        return self.base_score + total.real, None
+
+    def stats(self):
+        return {"trees": self.n_trees, "depth": self.depth, "split_points": self.n_cuts,
+                "report": self.meta.get("report")}
+
+
+# ═══════════════════════════════════════════════════════
+# BUILDING
+# ═══════════════════════════════════════════════════════
+def _jittered(X_real, features, n, rng):
+    """Training rows with sizes scaled ±30%, rooms ±1 and 15% of flags flipped."""
+    X = X_real[rng.integers(0, len(X_real), n)].copy()
+    for j, name in enumerate(features):
+        if name in SIZES:
+            X[:, j] = np.round(X[:, j] * rng.lognormal(0, 0.3, n), 1)
+        elif name in ROOMS:
+            X[:, j] = np.maximum(X[:, j] + rng.integers(-1, 2, n), 1)
+        elif name in FLAG_INPUTS:
+            X[:, j] = np.where(rng.random(n) < 0.15, 1 - X[:, j], X[:, j])
+    return X
+
+
+def _synthetic(encoder, districts, n, rng):
+    """Frontend-like inputs (as price_grid.py's error report), every district."""
+    bodies = [{
+        "district":      str(rng.choice(districts)),
+        "property_type": str(rng.choice(["house", "apartment"])),
+        "bedrooms":      int(rng.integers(1, 7)),
+        "bathrooms":     int(rng.integers(1, 6)),
+        "storeys":       int(rng.integers(1, 4)),
+        "land_size_p":   float(np.round(rng.lognormal(np.log(10), 0.7), 1)),
+        "floor_area":    float(np.round(rng.lognormal(np.log(1800), 0.5))),
+        "location":      "Colombo 7" if rng.random() < 0.1 else "",
+        **{key: int(rng.random() < 0.25) for key in FLAG_INPUTS},
+    } for _ in range(n)]
+    X, _, _, _ = encoder.encode_many(bodies)
+    return X
+
+
+def inputs(X_real, features, encoder, districts, jittered, synthetic, rng):
+    """Distillation inputs: the training rows, then jittered and synthetic ones."""
+    X_real = np.asarray(X_real, dtype=np.float32)
+    return np.vstack([X_real, _jittered(X_real, features, jittered, rng),
+                      _synthetic(encoder, districts, synthetic, rng)])
+
+
+def _pack(student, depth, X_fit, calib, calib_err, quantile):
+    """A Surrogate from a trained student booster of at most `depth` levels:
+    trees padded to complete depth, leaf errors from calibration residuals."""
+    model  = json.loads(student.save_raw("json"))["learner"]
+    trees  = model["gradient_booster"]["model"]["trees"]
+    internal, leaves = 2 ** depth - 1, 2 ** depth
+
+    cuts = {(0, np.float32(np.inf)): 0}   # split point 0: padding, always left
+    node_cut, leaf_value = [], []
+    for t in trees:
+        L, R = t["left_children"], t["right_children"]
+        S, C = t["split_indices"], t["split_conditions"]
+        heap_cut = np.zeros(internal, dtype=np.intp)
+        heap_val = np.zeros(leaves, dtype=np.float32)
+
+        def place(n, pos, level):
+            if L[n] == -1:
+                # Every heap leaf below a shallow leaf carries its value
+                span = 2 ** (depth - level)
+                heap_val[pos * span - leaves:(pos + 1) * span - leaves] = C[n]
+                return
+            heap_cut[pos - 1] = cuts.setdefault((S[n], np.float32(C[n])), len(cuts))
+            place(L[n], 2 * pos, level + 1)
+            place(R[n], 2 * pos + 1, level + 1)
+        place(0, 1, 0)
+        node_cut.append(heap_cut)
+        leaf_value.append(heap_val)
+
+    order = list(cuts)
+    lo, hi = np.quantile(X_fit, [quantile, 1 - quantile], axis=0).astype(np.float32)
+    arrays = dict(
+        cut_feature=np.array([f for f, _ in order], dtype=np.intp),
+        cut_threshold=np.array([t for _, t in order], dtype=np.float32),
+        node_cut=np.concatenate(node_cut),
+        leaf_value=np.concatenate(leaf_value),
+        lower=lo, upper=hi,
+        base_score=float(model["learner_model_param"]["base_score"].strip("[]")),
+        depth=depth, meta={},
+    )
+
+    # Mean |residual| of the calibration rows reaching each leaf; leaves no
+    # calibration row reaches get the largest leaf error seen
+    n_leaves = len(arrays["leaf_value"])
+    reached = Surrogate(leaf_error=np.zeros(n_leaves), **arrays).leaves(calib).ravel()
+    err = np.repeat(calib_err, len(trees))
+    total = np.bincount(reached, weights=err, minlength=n_leaves)
+    count = np.bincount(reached, minlength=n_leaves)
+    mean  = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+    return Surrogate(leaf_error=np.where(count > 0, mean, mean.max()).astype(np.float32), **arrays)
+
+
+def report(surrogate, X, teacher_log, max_error):
+    """Surrogate vs full model on held-out rows, with and without the fallback checks."""
+    log_pred, estimate = surrogate.predict(X)
+    err = np.abs(log_pred - teacher_log)
+    pct = np.abs(np.expm1(log_pred - teacher_log)) * 100
+    in_range = surrogate.in_range(X)
+    served = in_range & (estimate <= max_error)
+
+    def summary(mask):
+        return {"mape_pct": round(float(pct[mask].mean()), 3),
+                "p95_pct":  round(float(np.percentile(pct[mask], 95)), 3),
+                "max_pct":  round(float(pct[mask].max()), 3)} if mask.any() else None
+
+    return {
+        "rows":          int(len(X)),
+        "max_error":     max_error,
+        "served":        round(float(served.mean()), 4),
+        "out_of_range":  round(float((~in_range).mean()), 4),
+        "uncertain":     round(float((in_range & ~served).mean()), 4),
+        "all":           summary(np.ones(len(X), dtype=bool)),
+        "served_error":  summary(served),
+        "fallback_error": summary(~served),
+        "mae_log":       round(float(err.mean()), 5),
+    }
+
+
+def distill(booster, X_real, features, encoder, districts, config=None, params=None, seed=0):
+    """(Surrogate, report) for a full-model booster. X_real is the training
+    feature matrix; encoder / districts generate the synthetic inputs."""
+    from config import CONFIG
+    config = config or CONFIG
+    params = {**SURROGATE, **(params or {})}
+    rng = np.random.default_rng(seed)
+
+    def teacher(X):
+        return booster.inplace_predict(X, validate_features=False).astype(np.float64)
+
+    X_fit = inputs(X_real, features, encoder, districts,
+                   params["jittered_rows"], params["synthetic_rows"], rng)
+    half  = params["holdout_rows"] // 2
+    X_hold = np.vstack([_jittered(np.asarray(X_real, dtype=np.float32), features, half, rng),
+                        _synthetic(encoder, districts, half, rng)])
+    X_hold = X_hold[rng.permutation(len(X_hold))]
+    y_fit, y_hold = teacher(X_fit), teacher(X_hold)
+
+    student = xgb.train({"max_depth": params["depth"], "eta": params["eta"],
+                         "tree_method": "hist", "objective": "reg:squarederror",
+                         "base_score": float(y_fit.mean()), "nthread": 0},
+                        xgb.DMatrix(X_fit, y_fit), params["trees"])
+
+    # First half of the holdout calibrates leaf errors, the second is reported on
+    calib, test = slice(0, len(X_hold) // 2), slice(len(X_hold) // 2, None)
+    calib_err = np.abs(student.inplace_predict(X_hold[calib], validate_features=False) - y_hold[calib])
+    surrogate = _pack(student, params["depth"], X_fit, X_hold[calib], calib_err, params["range_quantile"])
+
+    # Uncertainty threshold: the estimate above which surrogate_fallback_share
+    # of the calibration rows would go to the full model
+    _, estimate = surrogate.predict(X_hold[calib])
+    max_error = float(np.quantile(estimate, 1 - config["surrogate_fallback_share"]))
+    surrogate.meta = {
+        "params":    {k: params[k] for k in ("depth", "trees", "eta")},
+        "fit_rows":  int(len(X_fit)),
+        "max_error": round(max_error, 5),
+        "report":    report(surrogate, X_hold[test], y_hold[test], max_error),
+    }
+    return surrogate, surrogate.meta["report"]
+
+
+def print_report(r):
+    print(f"   {r['rows']:,} held-out rows, max estimated error {r['max_error']:.4f} (log-price):")
+    print(f"   served {r['served']:.1%}   out of range {r['out_of_range']:.1%}   "
+          f"uncertain {r['uncertain']:.1%}")
+    for label, key in (("all rows", "all"), ("served", "served_error"),
+                       ("fallen back", "fallback_error")):
+        s = r[key]
+        if s is not None:
+            print(f"   {label:<12} MAPE {s['mape_pct']:.2f}%  p95 {s['p95_pct']:.2f}%  "
+                  f"max {s['max_pct']:.2f}%")
+
+
+def main(argv):
+    from bundle import ModelBundle, current_path, repack_bundle
+    from config import CONFIG
+
+    root = CONFIG["bundle_dir"]
+    path = current_path(root)
+    if path is None:
+        sys.exit(f"No CURRENT bundle under {root} — run python bundle.py build first")
+    bundle = ModelBundle.load(path, CONFIG)
+    source = argv[2] if len(argv) > 2 else CONFIG["clean_file"]
+    X_real = pd.read_csv(source)[bundle.features].to_numpy(np.float32)
+
+    print(f"🔄 Distilling bundle {bundle.version} into a depth-{SURROGATE['depth']} surrogate...")
+    surrogate, r = distill(bundle.booster, X_real, bundle.features, bundle.encoder,
+                           bundle.district_classes)
+    print(f"✅ {surrogate.n_trees} trees, {surrogate.n_cuts} split points")
+    print_report(r)
+    if argv[1] == "report":
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        surrogate.save(os.path.join(tmp, SURROGATE_FILE))
+        manifest = repack_bundle(root, bundle, {"surrogate": os.path.join(tmp, SURROGATE_FILE)},
+                                 extra={"surrogate": surrogate.meta})
+    print(f"✅ Bundle {manifest['version']} written (CURRENT) — reload with SIGHUP or POST /admin/reload")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("build", "report"):
+        sys.exit("Usage: python surrogate.py build|report [clean_properties.csv]")
+    main(sys.argv)
@@ -0,0 +1,58 @@
+"""
+Shared fixtures: the CURRENT bundle's booster and the cleaned listings.
+
+Run with:  python -m pytest -q   (from the api/ folder)
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from bundle import MANIFEST, current_path, load_booster  # noqa: E402
+
+DATA_FILE = os.path.join(API_DIR, "..", "data", "clean_properties.csv")
+
+
+@pytest.fixture(scope="session")
+def bundle_dir():
+    path = current_path(os.path.join(API_DIR, "bundles"))
+    if path is None:
+        pytest.skip("No CURRENT bundle — run python bundle.py build")
+    return path
+
+
+@pytest.fixture(scope="session")
+def features(bundle_dir):
+    with open(os.path.join(bundle_dir, MANIFEST)) as f:
+        return json.load(f)["tables"]["features"]
+
+
+@pytest.fixture(scope="session")
+def booster(bundle_dir):
+    with open(os.path.join(bundle_dir, MANIFEST)) as f:
+        filename = json.load(f)["files"]["model"]
+    booster = load_booster(os.path.join(bundle_dir, filename))
+    booster.set_param({"nthread": 1})
+    return booster
+
+
+@pytest.fixture(scope="session")
+def X(features):
+    """Every cleaned listing as the float32 matrix the API scores."""
+    return pd.read_csv(DATA_FILE)[features].to_numpy(dtype=np.float32)
+
+
+@pytest.fixture(scope="session")
+def X_missing(X):
+    """X with NaNs in two numeric columns, so default branches are taken."""
+    Xnan = X.copy()
+    Xnan[::7, 2] = np.nan
+    Xnan[::5, 3] = np.nan
+    return Xnan
@@ -0,0 +1,48 @@
+"""explain.ContribExplainer must give shap.TreeExplainer's values (exact TreeSHAP)."""
+
+import numpy as np
+import pytest
+
+from explain import ContribExplainer
+
+shap = pytest.importorskip("shap")
+
+TOLERANCE  = 1e-5    # log-price units
+ADDITIVITY = 1e-4    # float32 sum of 20 contributions around log-price ~16
+
+
+@pytest.fixture(scope="module")
+def native(booster):
+    return ContribExplainer(booster)
+
+
+@pytest.fixture(scope="module")
+def reference(booster):
+    return shap.TreeExplainer(booster)
+
+
+def test_values_match_shap(native, reference, X):
+    np.testing.assert_allclose(native.shap_values(X), reference.shap_values(X),
+                               rtol=0, atol=TOLERANCE)
+
+
+def test_values_match_shap_with_missing_inputs(native, reference, X_missing):
+    np.testing.assert_allclose(native.shap_values(X_missing), reference.shap_values(X_missing),
+                               rtol=0, atol=TOLERANCE)
+
+
+def test_expected_value_matches_shap(native, reference):
+    assert native.expected_value == pytest.approx(float(np.ravel(reference.expected_value)[0]),
+                                                  abs=TOLERANCE)
+
+
+def test_contributions_add_up_to_prediction(native, booster, X):
+    total = native.expected_value + native.shap_values(X).sum(axis=1)
+    np.testing.assert_allclose(total, booster.inplace_predict(X, validate_features=False),
+                               rtol=0, atol=ADDITIVITY)
+
+
+def test_interactions_sum_to_values(native, X):
+    rows = X[:50]
+    np.testing.assert_allclose(native.shap_interaction_values(rows).sum(axis=2),
+                               native.shap_values(rows), rtol=0, atol=TOLERANCE)
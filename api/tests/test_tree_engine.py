@@ -0,0 +1,39 @@
+"""tree_engine.TreeEnsemble must score exactly like booster.inplace_predict."""
+
+import os
+import tempfile
+
+import numpy as np
+
+from tree_engine import TreeEnsemble
+
+TOLERANCE = 1e-6     # log-price units; summation order matches XGBoost
+
+
+def reference(booster, X):
+    return booster.inplace_predict(X, validate_features=False)
+
+
+def test_batch_matches_booster(booster, X):
+    got = TreeEnsemble.from_booster(booster).predict(X)
+    np.testing.assert_allclose(got, reference(booster, X), rtol=0, atol=TOLERANCE)
+
+
+def test_single_rows_match_booster(booster, X):
+    ensemble = TreeEnsemble.from_booster(booster)
+    got = np.array([ensemble.predict(X[i])[0] for i in range(len(X))])
+    np.testing.assert_allclose(got, reference(booster, X), rtol=0, atol=TOLERANCE)
+
+
+def test_missing_values_take_default_branch(booster, X_missing):
+    got = TreeEnsemble.from_booster(booster).predict(X_missing)
+    np.testing.assert_allclose(got, reference(booster, X_missing), rtol=0, atol=TOLERANCE)
+
+
+def test_saved_arrays_reload_identically(booster, X):
+    ensemble = TreeEnsemble.from_booster(booster)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model_arrays.npz")
+        ensemble.save(path)
+        again = TreeEnsemble.load(path)
+    np.testing.assert_array_equal(again.predict(X), ensemble.predict(X))
@@ -0,0 +1,181 @@
+"""
+tree_engine.py  —  Array-backed XGBoost tree-ensemble evaluator
+================================================================
+Flattens a trained booster into contiguous NumPy arrays (split feature,
+threshold, children, leaf value) and evaluates every tree at once, one
+depth level per step. Used by the API when CONFIG["engine"] == "arrays"
+to skip the sklearn wrapper and XGBoost's general-purpose predictor.
+
+Only plain numeric gbtree models with an identity link are supported,
+which is what train_model.py produces (reg:squarederror).
+"""
+
+import json
+
+import numpy as np
+
+IDENTITY_OBJECTIVES = {
+    "reg:squarederror", "reg:absoluteerror",
+    "reg:pseudohubererror", "reg:quantileerror",
+}
+
+
+class TreeEnsemble:
+    """All trees of a booster packed into flat node arrays.
+
+    Leaves point back to themselves and carry a +inf threshold, so the
+    traversal can run a fixed max_depth steps with no per-node branching.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left,
+                 value, roots, base_score, max_depth):
+        self.feature      = feature
+        self.threshold    = threshold
+        self.left         = left
+        self.right        = right
+        self.default_left = default_left
+        self.value        = value
+        self.roots        = roots
+        self.base_score   = base_score
+        self.max_depth    = max_depth
+        self.n_trees      = len(roots)
+        # children[node, go_left] — one gather picks the next node
+        self.children     = np.stack([right, left], axis=1)
+
+    @classmethod
+    def from_booster(cls, booster):
+        """Build the packed arrays from an xgboost.Booster's JSON model."""
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        objective = learner["objective"]["name"]
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Unsupported objective for array engine: {objective}")
+        gbm = learner["gradient_booster"]
+        if gbm["name"] != "gbtree":
+            raise ValueError(f"Unsupported booster for array engine: {gbm['name']}")
+        if int(learner["learner_model_param"].get("num_target", "1")) > 1:
+            raise ValueError("Multi-target models are not supported by the array engine")
+
+        trees = gbm["model"]["trees"]
+        sizes = [len(t["left_children"]) for t in trees]
+        roots = np.cumsum([0] + sizes[:-1]).astype(np.int32)
+
+        feature, threshold, left, right, default_left, value = [], [], [], [], [], []
+        max_depth = 0
+        for tree, offset in zip(trees, roots):
+            if tree.get("categories_nodes"):
+                raise ValueError("Categorical splits are not supported by the array engine")
+            l = np.asarray(tree["left_children"], dtype=np.int32)
+            r = np.asarray(tree["right_children"], dtype=np.int32)
+            cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+            is_leaf = l == -1
+            own = np.arange(len(l), dtype=np.int32) + offset
+
+            feature.append(np.where(is_leaf, 0, tree["split_indices"]).astype(np.int32))
+            threshold.append(np.where(is_leaf, np.inf, cond).astype(np.float32))
+            left.append(np.where(is_leaf, own, l + offset))
+            right.append(np.where(is_leaf, own, r + offset))
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+            value.append(np.where(is_leaf, cond, 0.0).astype(np.float32))
+            max_depth = max(max_depth, _tree_depth(l, r))
+
+        base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+        return cls(
+            feature=np.concatenate(feature),
+            threshold=np.concatenate(threshold),
+            left=np.concatenate(left),
+            right=np.concatenate(right),
+            default_left=np.concatenate(default_left),
+            value=np.concatenate(value),
+            roots=roots,
+            base_score=base_score,
+            max_depth=max_depth,
+        )
+
+    # ── Packed file ───────────────────────────────────────────
+    def save(self, path):
+        """Write the arrays to a compressed .npz — thresholds and leaf values
+        as float16 when that is lossless (compress.py quantizes them so it
+        is), node indices in the smallest integer type that holds them."""
+        arrays = {"threshold": self.threshold, "value": self.value}
+        for name, a in arrays.items():
+            half = a.astype(np.float16)
+            if np.array_equal(half.astype(np.float32), a):
+                arrays[name] = half
+        for name in ("feature", "left", "right", "roots"):
+            a = getattr(self, name)
+            arrays[name] = a.astype(np.min_scalar_type(int(a.max(initial=0))))
+        np.savez_compressed(path, default_left=self.default_left,
+                            base_score=np.float64(self.base_score),
+                            max_depth=np.int64(self.max_depth), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """A TreeEnsemble written by save() — no booster or JSON parsing."""
+        with np.load(path) as f:
+            return cls(
+                feature=f["feature"].astype(np.int32),
+                threshold=f["threshold"].astype(np.float32),
+                left=f["left"].astype(np.int32),
+                right=f["right"].astype(np.int32),
+                default_left=f["default_left"],
+                value=f["value"].astype(np.float32),
+                roots=f["roots"].astype(np.int32),
+                base_score=float(f["base_score"]),
+                max_depth=int(f["max_depth"]),
+            )
+
+    def leaf_indices(self, X):
+        """Global leaf node index reached in every tree, shape (n_rows, n_trees)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[0] == 1:
+            return self._leaves_one(X[0])[None, :]
+
+        has_nan = np.isnan(X).any()
+        flat = X.ravel()
+        base = (np.arange(X.shape[0], dtype=np.intp) * X.shape[1])[:, None]
+        idx  = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            x = flat[base + self.feature[idx]]
+            go_left = x < self.threshold[idx]
+            if has_nan:
+                go_left = np.where(np.isnan(x), self.default_left[idx], go_left)
+            idx = self.children[idx, go_left.view(np.uint8)]
+        return idx
+
+    def _leaves_one(self, x):
+        """Single-row traversal — same steps without the row dimension."""
+        has_nan = np.isnan(x).any()
+        idx = self.roots
+        for _ in range(self.max_depth):
+            v = x[self.feature[idx]]
+            go_left = v < self.threshold[idx]
+            if has_nan:
+                go_left = np.where(np.isnan(v), self.default_left[idx], go_left)
+            idx = self.children[idx, go_left.view(np.uint8)]
+        return idx
+
+    def predict(self, X):
+        """Raw (margin) predictions — log-price for this project's model.
+
+        Leaf values are added one tree at a time in float32 on top of
+        base_score, the same order XGBoost uses, so results match it bit
+        for bit rather than to within rounding.
+        """
+        leaves = self.leaf_indices(X)
+        terms  = np.empty((leaves.shape[0], self.n_trees + 1), dtype=np.float32)
+        terms[:, 0]  = self.base_score
+        terms[:, 1:] = self.value[leaves]
+        return np.cumsum(terms, axis=1, dtype=np.float32)[:, -1]
+
+
+def _tree_depth(left, right):
+    """Depth of the deepest leaf in one tree (root has depth 0)."""
+    depth, frontier = 0, [0]
+    while True:
+        children = [c for n in frontier for c in (left[n], right[n]) if c != -1]
+        if not children:
+            return depth
+        frontier = children
+        depth += 1
@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import axios from "axios";
 
@@ -21,12 +21,51 @@ const AMENITIES = [
   { key: "has_solar",     label: "☀️ Solar",      },
 ];
 
+const API_URL = "http://localhost:5000";
+
+interface ShapItem { feature: string; shap_value: number }
+
 interface PredictResult {
   predicted_price_lkr: number;
   predicted_price_mn: number;
-  explanation: { feature: string; shap_value: number }[];
+  explanation?: ShapItem[];
+  explanation_url?: string;
+}
+
+interface Importance { feature: string; mean_abs_shap: number }
+
+// /comparables response: district is the one the API resolved the input to
+interface Comparables {
+  district: string;
+  property_type: string;
+  comparables: Comparable[];
+}
+
+interface Comparable {
+  url: string;
+  title: string | null;
+  location: string | null;
+  price_mn: number;
+  bedrooms: number | null;
+  land_size_p: number | null;
 }
 
+// Deferred explanations: poll /explain/<id> until the worker has finished.
+// Throws if it was dropped (503), expired (404), failed or never arrives
+const fetchExplanation = async (url: string): Promise<ShapItem[]> => {
+  for (let attempt = 0; attempt < 40; attempt++) {
+    const res = await axios.get(`${API_URL}${url}`, { validateStatus: s => s === 200 || s === 202 });
+    if (res.status === 200) {
+      if (res.data.status !== "done" || !Array.isArray(res.data.explanation)) {
+        throw new Error(res.data.error || "Explanation failed");
+      }
+      return res.data.explanation;
+    }
+    await new Promise(r => setTimeout(r, 250));
+  }
+  throw new Error("Explanation timed out");
+};
+
 export default function Predictor() {
   const navigate = useNavigate();
   const [form, setForm] = useState({
@@ -41,8 +80,33 @@ export default function Predictor() {
     has_highway: 0, has_generator: 0, has_solar: 0,
   });
   const [result, setResult] = useState<PredictResult | null>(null);
+  const [comparables, setComparables] = useState<Comparables | null>(null);
+  // The form as it was when the shown result was requested
+  const [submitted, setSubmitted] = useState<typeof form | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
+  const [live, setLive] = useState<number | null>(null);
+  // The result whose explanation could not be fetched (skeleton → notice)
+  const [unexplained, setUnexplained] = useState<PredictResult | null>(null);
+  const [drivers, setDrivers] = useState<Importance[]>([]);
+
+  // Model-wide feature importance, computed at training time
+  useEffect(() => {
+    axios.get(`${API_URL}/explain/global`)
+      .then(r => setDrivers(r.data.importance.slice(0, 6)))
+      .catch(() => setDrivers([]));
+  }, []);
+
+  // Live estimate from the precomputed grid while the form is edited
+  useEffect(() => {
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      axios.post(`${API_URL}/predict/fast`, form)
+        .then(r => { if (!cancelled) setLive(r.data.predicted_price_mn); })
+        .catch(() => { if (!cancelled) setLive(null); });
+    }, 120);
+    return () => { cancelled = true; clearTimeout(timer); };
+  }, [form]);
 
 const handleChange = (e: React.ChangeEvent<HTMLInputElement | HTMLSelectElement>) => {
     const { name, value, type } = e.target;
@@ -60,6 +124,8 @@ const predict = async () => {
     setLoading(true);
     setError("");
     setResult(null);
+    setComparables(null);
+    let shown = false;
     try {
       const payload = {
         ...form,
@@ -68,16 +134,34 @@ const predict = async () => {
         land_size_p:    Number(form.land_size_p),
         floor_area:     Number(form.floor_area),
       };
-      const res = await axios.post("http://localhost:5000/predict", payload);
-      setResult(res.data);
+      // Price first; the SHAP chart fills in once the explanation is ready
+      const res = await axios.post(`${API_URL}/predict?explain=deferred`, payload);
+      const data: PredictResult = res.data;
+      setResult(data);
+      setSubmitted(form);
+      shown = true;
+      setLoading(false);
       setTimeout(() => document.getElementById("result")?.scrollIntoView({ behavior: "smooth" }), 100);
+      axios.post(`${API_URL}/comparables`, payload)
+        .then(r => setComparables(r.data))
+        .catch(() => setComparables(null));
+      if (data.explanation_url) {
+        try {
+          const explanation = await fetchExplanation(data.explanation_url);
+          setResult(prev => (prev === data ? { ...data, explanation } : prev));
+        } catch {
+          setUnexplained(data);
+        }
+      } else if (!data.explanation) {
+        setUnexplained(data);   // dropped under load, or explanations disabled
+      }
     } catch {
-      setError("Could not connect to the prediction API. Make sure Flask is running on port 5000.");
+      if (!shown) setError("Could not connect to the prediction API. Make sure Flask is running on port 5000.");
     }
     setLoading(false);
   };
 
-  const maxShap = result ? Math.max(...result.explanation.map(e => Math.abs(e.shap_value))) : 1;
+  const maxShap = result?.explanation ? Math.max(...result.explanation.map(e => Math.abs(e.shap_value))) : 1;
 
   return (
     <div className="min-h-screen bg-[#faf7f2]" style={{ fontFamily: "DM Sans, sans-serif" }}>
@@ -222,6 +306,12 @@ const predict = async () => {
               )}
             </button>
 
+            {live !== null && (
+              <div className="mt-3 text-center text-xs text-stone-400">
+                Live estimate ≈ <span className="font-semibold text-orange-500">{live} Million LKR</span> — updates as you edit
+              </div>
+            )}
+
             {error && (
               <div className="mt-4 p-4 rounded-xl bg-red-50 border border-red-200 text-red-600 text-sm">
                 ⚠️ {error}
@@ -243,24 +333,26 @@ const predict = async () => {
                   <div className="text-orange-400 font-semibold text-lg">
                     {result.predicted_price_mn} Million LKR
                   </div>
-                  <div className="mt-6 pt-6 border-t border-white/10 flex gap-6 text-sm text-stone-400">
-                    <div>
-                      <div className="text-white font-semibold">{form.district}</div>
-                      <div>District</div>
-                    </div>
-                    <div>
-                      <div className="text-white font-semibold capitalize">{form.property_type}</div>
-                      <div>Type</div>
+                  {submitted && (
+                    <div className="mt-6 pt-6 border-t border-white/10 flex gap-6 text-sm text-stone-400">
+                      <div>
+                        <div className="text-white font-semibold">{submitted.district}</div>
+                        <div>District</div>
+                      </div>
+                      <div>
+                        <div className="text-white font-semibold capitalize">{submitted.property_type}</div>
+                        <div>Type</div>
+                      </div>
+                      <div>
+                        <div className="text-white font-semibold">{submitted.bedrooms} bed / {submitted.bathrooms} bath</div>
+                        <div>Rooms</div>
+                      </div>
+                      <div>
+                        <div className="text-white font-semibold">{submitted.land_size_p}p</div>
+                        <div>Land</div>
+                      </div>
                     </div>
-                    <div>
-                      <div className="text-white font-semibold">{form.bedrooms} bed / {form.bathrooms} bath</div>
-                      <div>Rooms</div>
-                    </div>
-                    <div>
-                      <div className="text-white font-semibold">{form.land_size_p}p</div>
-                      <div>Land</div>
-                    </div>
-                  </div>
+                  )}
                 </div>
 
                 {/* SHAP explanation */}
@@ -271,8 +363,20 @@ const predict = async () => {
                   <p className="text-xs text-stone-400 mb-6">
                     SHAP values show which features push the price up (🟠) or down (⚫)
                   </p>
+                  {!result.explanation && unexplained === result && (
+                    <p className="text-sm text-stone-400 bg-stone-50 rounded-xl px-4 py-3">
+                      Explanation unavailable right now — the price above is unaffected. Try again in a moment.
+                    </p>
+                  )}
+                  {!result.explanation && unexplained !== result && (
+                    <div className="space-y-3 animate-pulse">
+                      {Array.from({ length: 8 }).map((_, i) => (
+                        <div key={i} className="h-6 bg-stone-100 rounded-full" />
+                      ))}
+                    </div>
+                  )}
                   <div className="space-y-3">
-                    {result.explanation.map((e, i) => {
+                    {result.explanation?.map((e, i) => {
                       const pct = Math.abs(e.shap_value) / maxShap * 100;
                       const positive = e.shap_value >= 0;
                       return (
@@ -299,6 +403,39 @@ const predict = async () => {
                     This explanation is generated by SHAP (SHapley Additive exPlanations) — an explainable AI technique that shows the contribution of each feature to the final price prediction.
                   </p>
                 </div>
+
+                {/* Comparable listings */}
+                {comparables && comparables.comparables.length > 0 && (
+                  <div className="bg-white rounded-3xl border border-orange-100 shadow-xl shadow-orange-50 p-8">
+                    <h3 className="text-base font-bold text-stone-900 mb-1" style={{ fontFamily: "Syne, sans-serif" }}>
+                      🏘️ Similar listings
+                    </h3>
+                    <p className="text-xs text-stone-400 mb-6">
+                      Closest real {comparables.property_type} listings in {comparables.district}
+                    </p>
+                    <div className="space-y-3">
+                      {comparables.comparables.map((c, i) => (
+                        <a
+                          key={i}
+                          href={c.url}
+                          target="_blank"
+                          rel="noreferrer"
+                          className="flex justify-between items-center gap-4 p-3 rounded-xl border border-stone-100 hover:border-orange-200 hover:bg-orange-50 transition-colors"
+                        >
+                          <div className="min-w-0">
+                            <div className="text-sm font-medium text-stone-700 truncate">{c.title ?? c.url}</div>
+                            <div className="text-xs text-stone-400">
+                              {c.location ?? comparables.district}
+                              {c.bedrooms != null && ` · ${c.bedrooms} bed`}
+                              {c.land_size_p != null && ` · ${c.land_size_p}p`}
+                            </div>
+                          </div>
+                          <div className="text-sm font-bold text-orange-500 whitespace-nowrap">Rs. {c.price_mn} Mn</div>
+                        </a>
+                      ))}
+                    </div>
+                  </div>
+                )}
               </>
             ) : (
               /* Placeholder when no result yet */
@@ -310,6 +447,25 @@ const predict = async () => {
                 <p className="text-stone-400 text-sm leading-relaxed max-w-xs mx-auto">
                   Fill in your property details on the left and click "Predict Market Value" to get an AI-powered price estimate with full explainability.
                 </p>
+                {drivers.length > 0 && (
+                  <div className="mt-8 text-left">
+                    <p className="text-xs font-semibold text-stone-500 uppercase tracking-wider mb-3">What drives prices overall</p>
+                    <div className="space-y-2">
+                      {drivers.map(d => (
+                        <div key={d.feature}>
+                          <div className="flex justify-between text-xs mb-1">
+                            <span className="font-medium text-stone-700 capitalize">{d.feature.replace(/_/g, " ")}</span>
+                            <span className="text-stone-400">{d.mean_abs_shap.toFixed(3)}</span>
+                          </div>
+                          <div className="h-1.5 bg-stone-100 rounded-full overflow-hidden">
+                            <div className="h-full rounded-full bg-orange-400"
+                                 style={{ width: `${d.mean_abs_shap / drivers[0].mean_abs_shap * 100}%` }} />
+                          </div>
+                        </div>
+                      ))}
+                    </div>
+                  </div>
+                )}
                 <div className="mt-8 grid grid-cols-3 gap-4">
                   {["XGBoost Model", "SHAP Explainability", "Real LK Data"].map((tag, i) => (
                     <div key={i} className="px-3 py-2 rounded-xl bg-orange-50 border border-orange-100 text-xs font-semibold text-orange-600">
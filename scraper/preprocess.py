@@ -7,9 +7,12 @@ Outputs:   clean_properties.csv
            feature_names.pkl
            district_encoder.pkl
            eda_plots.png
+           ../api/market_cube.npz   (/stats cube — new rows added in place)
 """
 
+import os
 import re
+import sys
 import joblib
 import numpy as np
 import pandas as pd
@@ -19,6 +22,10 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.preprocessing import LabelEncoder
 
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+sys.path.insert(0, API_DIR)
+from locations import RESOLVER   # same premium-area rule the API applies
+
 print("=" * 55)
 print("  PREPROCESSING PIPELINE")
 print("=" * 55)
@@ -88,15 +95,8 @@ DISTRICT_TIERS = {
 }
 df["district_tier"] = df["district"].map(DISTRICT_TIERS).fillna(4).astype(int)
 
-# Colombo premium areas (Colombo 1–7)
-PREMIUM = ["colombo 1", "colombo 2", "colombo 3", "colombo 4",
-           "colombo 5", "colombo 6", "colombo 7", "cinnamon",
-           "kollupitiya", "bambalapitiya", "havelock", "borella",
-           "rajagiriya", "battaramulla", "nawala", "nugegoda",
-           "dehiwala", "mount lavinia"]
-df["colombo_premium"] = df["location"].str.lower().apply(
-    lambda x: int(any(p in str(x) for p in PREMIUM))
-)
+# Colombo premium areas (Colombo 1–7 and neighbours, see api/locations.py)
+df["colombo_premium"] = RESOLVER.premium_flags(df["location"])
 
 # ═══════════════════════════════════════════════════════
 # 6. ENCODE DISTRICT
@@ -155,6 +155,10 @@ df_clean = df[FEATURES + [TARGET, "price_lkr"]].dropna()
 print(f"\n✅ Final dataset: {df_clean.shape[0]} rows × {len(FEATURES)} features")
 print(f"   Dropped {len(df) - len(df_clean)} rows with remaining nulls")
 
+# Row identity for the /stats market cube (not model features)
+df_clean["url"]      = df.loc[df_clean.index, "url"]
+df_clean["district"] = df.loc[df_clean.index, "district"].fillna("Other")
+
 df_clean.to_csv("clean_properties.csv", index=False)
 joblib.dump(FEATURES, "feature_names.pkl")
 print(f"✅ Saved → clean_properties.csv")
@@ -208,6 +212,18 @@ plt.tight_layout()
 plt.savefig("eda_plots.png", dpi=150, bbox_inches="tight")
 print(f"✅ Saved → eda_plots.png")
 
+# ═══════════════════════════════════════════════════════
+# 11. UPDATE /stats MARKET CUBE
+# ═══════════════════════════════════════════════════════
+# Only rows whose url the cube hasn't seen are added — no full recompute
+from market_cube import MarketCube
+
+CUBE_FILE = os.path.join(API_DIR, "market_cube.npz")
+cube  = MarketCube.load(CUBE_FILE) if os.path.exists(CUBE_FILE) else MarketCube()
+added = cube.ingest("clean_properties.csv")
+cube.save(CUBE_FILE)
+print(f"✅ Market cube: +{added} rows → {len(cube)} rows (api/market_cube.npz)")
+
 print("\n" + "=" * 55)
 print("  PREPROCESSING COMPLETE!")
 print("  Next: python train_model.py")
@@ -9,7 +9,7 @@ Run with:
     python resume_scraper.py
 """
 
-import time, random, re, logging
+import os, sys, time, random, re, logging
 from datetime import datetime
 
 import pandas as pd
@@ -22,6 +22,9 @@ from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from locations import RESOLVER   # gazetteer shared with preprocess.py and the API
+
 # ── LOGGING ────────────────────────────────────────────────────
 logging.basicConfig(
     level=logging.INFO,
@@ -55,50 +58,6 @@ ATTR_ALIASES = {
     "furnishing": "furnishing",
 }
 
-DISTRICTS = [
-    "Colombo", "Gampaha", "Kalutara", "Kandy", "Matale",
-    "Nuwara Eliya", "Galle", "Matara", "Hambantota",
-    "Jaffna", "Kilinochchi", "Mannar", "Vavuniya", "Mullaitivu",
-    "Batticaloa", "Ampara", "Trincomalee", "Kurunegala",
-    "Puttalam", "Anuradhapura", "Polonnaruwa", "Badulla",
-    "Monaragala", "Ratnapura", "Kegalle", "Negombo",
-]
-
-AREA_TO_DISTRICT = {
-    "piliyandala": "Colombo", "kalubowila": "Colombo", "dematagoda": "Colombo",
-    "dehiwala": "Colombo", "maharagama": "Colombo", "nugegoda": "Colombo",
-    "boralesgamuwa": "Colombo", "kesbewa": "Colombo", "athurugiriya": "Colombo",
-    "malabe": "Colombo", "kottawa": "Colombo", "battaramulla": "Colombo",
-    "rajagiriya": "Colombo", "nawala": "Colombo", "kohuwala": "Colombo",
-    "mount lavinia": "Colombo", "moratuwa": "Colombo", "kaduwela": "Colombo",
-    "mulleriyawa": "Colombo", "thalawathugoda": "Colombo", "hokandara": "Colombo",
-    "padukka": "Colombo", "homagama": "Colombo", "hanwella": "Colombo",
-    "colombo 1": "Colombo", "colombo 2": "Colombo", "colombo 3": "Colombo",
-    "colombo 4": "Colombo", "colombo 5": "Colombo", "colombo 6": "Colombo",
-    "colombo 7": "Colombo", "colombo 8": "Colombo", "colombo 9": "Colombo",
-    "colombo 10": "Colombo", "colombo 11": "Colombo", "colombo 12": "Colombo",
-    "colombo 13": "Colombo", "colombo 14": "Colombo", "colombo 15": "Colombo",
-    "negombo": "Gampaha", "wattala": "Gampaha", "ja-ela": "Gampaha",
-    "seeduwa": "Gampaha", "kandana": "Gampaha", "ragama": "Gampaha",
-    "gampaha": "Gampaha", "veyangoda": "Gampaha", "nittambuwa": "Gampaha",
-    "minuwangoda": "Gampaha", "mirigama": "Gampaha", "divulapitiya": "Gampaha",
-    "kelaniya": "Gampaha", "peliyagoda": "Gampaha",
-    "kalutara": "Kalutara", "panadura": "Kalutara", "beruwala": "Kalutara",
-    "aluthgama": "Kalutara", "bandaragama": "Kalutara", "horana": "Kalutara",
-    "ingiriya": "Kalutara", "matugama": "Kalutara",
-    "kandy": "Kandy", "peradeniya": "Kandy", "katugastota": "Kandy",
-    "kundasale": "Kandy", "ampitiya": "Kandy", "digana": "Kandy",
-    "galle": "Galle", "hikkaduwa": "Galle", "unawatuna": "Galle",
-    "ambalangoda": "Galle", "elpitiya": "Galle", "bentota": "Galle",
-    "matara": "Matara", "weligama": "Matara", "mirissa": "Matara",
-    "dickwella": "Matara", "tangalle": "Matara",
-    "kurunegala": "Kurunegala", "kuliyapitiya": "Kurunegala",
-    "anuradhapura": "Anuradhapura", "trincomalee": "Trincomalee",
-    "jaffna": "Jaffna", "batticaloa": "Batticaloa",
-    "ratnapura": "Ratnapura", "badulla": "Badulla",
-}
-
-
 def build_driver():
     opts = Options()
     opts.add_argument("--headless=new")
@@ -215,18 +174,8 @@ def extract_storeys(raw_storeys, title):
 
 
 def extract_district(location, url=""):
-    loc_lower = location.lower().strip()
-    url_lower = url.lower()
-    for d in DISTRICTS:
-        if loc_lower == d.lower() or loc_lower.startswith(d.lower()):
-            return d
-    for area, district in AREA_TO_DISTRICT.items():
-        if area in loc_lower:
-            return district
-    for d in DISTRICTS:
-        if f"-{d.lower()}" in url_lower or f"/{d.lower()}" in url_lower:
-            return d
-    return "Other"
+    """District from the location string, then the URL slug (api/locations.py)."""
+    return RESOLVER.district(location, url)
 
 
 def get_description(soup):
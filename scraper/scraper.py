@@ -13,7 +13,7 @@ Outputs:
     scraper.log          — full log
 """
 
-import time, random, re, logging
+import os, sys, time, random, re, logging
 from datetime import datetime
 
 import pandas as pd
@@ -26,6 +26,9 @@ from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from locations import RESOLVER   # gazetteer shared with preprocess.py and the API
+
 # ── LOGGING ────────────────────────────────────────────────────────────────────
 logging.basicConfig(
     level=logging.INFO,
@@ -219,80 +222,14 @@ def clean_location(raw):
     return str(raw).strip().rstrip(",").strip() if raw else ""
 
 
-DISTRICTS = [
-    "Colombo", "Gampaha", "Kalutara", "Kandy", "Matale",
-    "Nuwara Eliya", "Galle", "Matara", "Hambantota",
-    "Jaffna", "Kilinochchi", "Mannar", "Vavuniya", "Mullaitivu",
-    "Batticaloa", "Ampara", "Trincomalee", "Kurunegala",
-    "Puttalam", "Anuradhapura", "Polonnaruwa", "Badulla",
-    "Monaragala", "Ratnapura", "Kegalle", "Negombo",
-]
-
-# Sub-areas → their parent district (for accurate district mapping)
-AREA_TO_DISTRICT = {
-    # Colombo district
-    "piliyandala": "Colombo", "kalubowila": "Colombo", "dematagoda": "Colombo",
-    "dehiwala": "Colombo", "maharagama": "Colombo", "nugegoda": "Colombo",
-    "boralesgamuwa": "Colombo", "kesbewa": "Colombo", "athurugiriya": "Colombo",
-    "malabe": "Colombo", "kottawa": "Colombo", "battaramulla": "Colombo",
-    "rajagiriya": "Colombo", "nawala": "Colombo", "kohuwala": "Colombo",
-    "mount lavinia": "Colombo", "moratuwa": "Colombo", "kaduwela": "Colombo",
-    "mulleriyawa": "Colombo", "thalawathugoda": "Colombo", "hokandara": "Colombo",
-    "padukka": "Colombo", "homagama": "Colombo", "hanwella": "Colombo",
-    "colombo 1": "Colombo", "colombo 2": "Colombo", "colombo 3": "Colombo",
-    "colombo 4": "Colombo", "colombo 5": "Colombo", "colombo 6": "Colombo",
-    "colombo 7": "Colombo", "colombo 8": "Colombo", "colombo 9": "Colombo",
-    "colombo 10": "Colombo", "colombo 11": "Colombo", "colombo 12": "Colombo",
-    "colombo 13": "Colombo", "colombo 14": "Colombo", "colombo 15": "Colombo",
-    # Gampaha district
-    "negombo": "Gampaha", "wattala": "Gampaha", "ja-ela": "Gampaha",
-    "seeduwa": "Gampaha", "kandana": "Gampaha", "ragama": "Gampaha",
-    "gampaha": "Gampaha", "veyangoda": "Gampaha", "nittambuwa": "Gampaha",
-    "minuwangoda": "Gampaha", "mirigama": "Gampaha", "divulapitiya": "Gampaha",
-    "katana": "Gampaha", "kelaniya": "Gampaha", "peliyagoda": "Gampaha",
-    # Kalutara district
-    "kalutara": "Kalutara", "panadura": "Kalutara", "beruwala": "Kalutara",
-    "aluthgama": "Kalutara", "bandaragama": "Kalutara", "horana": "Kalutara",
-    "ingiriya": "Kalutara", "matugama": "Kalutara",
-    # Kandy district
-    "kandy": "Kandy", "peradeniya": "Kandy", "katugastota": "Kandy",
-    "kundasale": "Kandy", "ampitiya": "Kandy", "digana": "Kandy",
-    # Galle district
-    "galle": "Galle", "hikkaduwa": "Galle", "unawatuna": "Galle",
-    "ambalangoda": "Galle", "elpitiya": "Galle", "bentota": "Galle",
-    # Matara district
-    "matara": "Matara", "weligama": "Matara", "mirissa": "Matara",
-    "dickwella": "Matara", "tangalle": "Matara",
-}
-
 def extract_district_from_location(location, url=""):
     """
-    Extract district using location string and URL — much more reliable
-    than breadcrumbs since ikman puts district in the URL slug.
-
-    URL example: .../houses-for-sale-colombo  → district = Colombo
-    Location: 'Piliyandala' → area_to_district → Colombo
+    District from the location string, falling back to the URL slug
+    (ikman puts the district there: .../houses-for-sale-colombo).
+    See api/locations.py for the matching rules.
+    'Piliyandala' → Colombo
     """
-    loc_lower = location.lower().strip()
-    url_lower = url.lower()
-
-    # 1. Check location directly against district names
-    for d in DISTRICTS:
-        if loc_lower == d.lower() or loc_lower.startswith(d.lower()):
-            return d, location
-
-    # 2. Check location against known sub-area map
-    for area, district in AREA_TO_DISTRICT.items():
-        if area in loc_lower:
-            return district, location
-
-    # 3. Extract from URL slug (most reliable)
-    # URL ends with: -for-sale-colombo or -for-sale-gampaha etc.
-    for d in DISTRICTS:
-        if f"-{d.lower()}" in url_lower or f"/{d.lower()}" in url_lower:
-            return d, location
-
-    return "Other", location
+    return RESOLVER.district(location, url), location
 
 
 def get_description(soup):
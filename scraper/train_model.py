@@ -4,6 +4,18 @@ train_model.py  —  Train XGBoost + Generate SHAP Plots
 Run with:  python train_model.py
 Input:     clean_properties.csv, feature_names.pkl
 Outputs:   xgb_model.pkl
+           xgb_model.ubj          (native booster)
+           xgb_model_compressed.ubj, model_arrays.npz
+                                  (compressed model — bundled instead
+                                   when inside the accuracy budget)
+           surrogate.npz          (distilled model for /predict?tier=fast)
+           global_explanation.json      (/explain/global data)
+           drift_reference.json         (/drift training histograms)
+           listings.csv                 (raw_properties.csv trimmed to the
+                                         columns /comparables serves)
+           price_grid*.npy, price_grid.json   (/predict/fast lattice)
+           ../api/bundles/<version>/   (versioned bundle — what the API loads;
+                                        CURRENT is pointed at it)
            actual_vs_predicted.png
            shap_summary.png
            shap_bar.png
@@ -12,6 +24,10 @@ Outputs:   xgb_model.pkl
            model_results.txt
 """
 
+import json
+import os
+import sys
+
 import joblib
 import numpy as np
 import pandas as pd
@@ -176,8 +192,12 @@ print("✅ Saved → feature_importance.png")
 # 7. SHAP EXPLAINABILITY
 # ═══════════════════════════════════════════════════════
 print("\n🔍 Generating SHAP explanations...")
-explainer   = shap.TreeExplainer(best_model)
-shap_values = explainer.shap_values(X_test)
+# XGBoost's built-in TreeSHAP gives the same values as shap.TreeExplainer
+# without a second copy of the model; the last column is the base value.
+explainer   = shap.TreeExplainer(best_model)   # still saved for the API's "shap" backend
+contribs    = best_model.get_booster().predict(xgb.DMatrix(X_test), pred_contribs=True)
+shap_values = contribs[:, :-1]
+base_value  = float(contribs[0, -1])
 
 # SHAP Summary Plot (beeswarm)
 plt.figure()
@@ -201,7 +221,7 @@ print("✅ Saved → shap_bar.png")
 most_exp_idx = ya_test.values.argmax()
 exp = shap.Explanation(
     values=shap_values[most_exp_idx],
-    base_values=explainer.expected_value,
+    base_values=base_value,
     data=X_test.iloc[most_exp_idx],
     feature_names=FEATURES,
 )
@@ -219,9 +239,93 @@ print("✅ Saved → shap_waterfall.png")
 joblib.dump(best_model, "xgb_model.pkl")
 joblib.dump(explainer,  "shap_explainer.pkl")
 joblib.dump(FEATURES,   "feature_names.pkl")
+best_model.get_booster().save_model("xgb_model.ubj")   # loads without sklearn/pickle
 print("\n✅ Saved → xgb_model.pkl")
+print("✅ Saved → xgb_model.ubj")
 print("✅ Saved → shap_explainer.pkl")
 
+# ═══════════════════════════════════════════════════════
+# 9. COMPRESS (fewer trees, merged flag splits, float16)
+# ═══════════════════════════════════════════════════════
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+sys.path.insert(0, API_DIR)
+from bundle import write_bundle, make_tables
+from comparables import pack_listings
+from features import FeatureEncoder
+import compress
+import surrogate
+import drift
+import global_explain
+import price_grid
+
+print("\n🔄 Compressing model (budget: api/config.py compress_*)...")
+compression = compress.compress(best_model.get_booster(), FEATURES,
+                                (X_val, y_val, ya_val), (X_test, y_test, ya_test))
+compress.print_report(compression, best_model.get_booster(), X_test)
+_, c_mae, c_rmse, c_r2 = evaluate(compress.BoosterModel(compression["booster"]),
+                                  X_test, y_test, ya_test, "Test (compressed)")
+
+packed_booster, model_file, extra_files = best_model.get_booster(), "xgb_model.ubj", {}
+bundle_extra = {"test_r2": round(test_r2, 4), "test_mae": round(test_mae)}
+if compression["accepted"]:
+    compress.write(compression, "xgb_model_compressed.ubj", compress.ARRAYS_FILE)
+    packed_booster, model_file = compression["booster"], "xgb_model_compressed.ubj"
+    extra_files["ensemble"] = compress.ARRAYS_FILE
+    bundle_extra = {"test_r2": round(c_r2, 4), "test_mae": round(c_mae),
+                    "compression": compress.summary(compression)}
+    print(f"✅ Saved → xgb_model_compressed.ubj, {compress.ARRAYS_FILE}  (packed into the bundle)")
+else:
+    print("⚠️  Compressed model outside the accuracy budget — bundling the uncompressed model")
+
+# ═══════════════════════════════════════════════════════
+# 10. DISTIL FAST-TIER SURROGATE (/predict?tier=fast)
+# ═══════════════════════════════════════════════════════
+tables = make_tables(FEATURES, joblib.load("district_encoder.pkl").classes_)
+encoder = FeatureEncoder(FEATURES, tables["district_classes"],
+                         district_tiers=tables["district_tiers"],
+                         premium_areas=tables["premium_areas"],
+                         property_types=tables["property_types"])
+
+print("\n🔄 Distilling the bundled model into the fast-tier surrogate...")
+fast_model, fast_report = surrogate.distill(packed_booster, X.to_numpy(np.float32), FEATURES,
+                                            encoder, tables["district_classes"])
+surrogate.print_report(fast_report)
+fast_model.save(surrogate.SURROGATE_FILE)
+extra_files["surrogate"] = surrogate.SURROGATE_FILE
+bundle_extra["surrogate"] = fast_model.meta
+print(f"✅ Saved → {surrogate.SURROGATE_FILE}")
+
+# ═══════════════════════════════════════════════════════
+# 11. PACK VERSIONED BUNDLE FOR THE API
+# ═══════════════════════════════════════════════════════
+if os.path.exists("raw_properties.csv"):
+    # Only the columns /comparables serves — no scraped description text
+    extra_files["listings"] = pack_listings("raw_properties.csv", ".")
+
+# Global SHAP summary over the whole dataset, served by /explain/global
+global_explain.write(global_explain.compute(packed_booster, X, FEATURES,
+                                            tables["district_classes"]),
+                     global_explain.GLOBAL_FILE)
+extra_files["global_explanation"] = global_explain.GLOBAL_FILE
+print(f"✅ Saved → {global_explain.GLOBAL_FILE}")
+
+# Training-time feature histograms for the API's /drift monitor
+with open(drift.REFERENCE_FILE, "w") as f:
+    json.dump(drift.build_reference(X, FEATURES), f, indent=1)
+extra_files["drift_reference"] = drift.REFERENCE_FILE
+print(f"✅ Saved → {drift.REFERENCE_FILE}")
+
+# Price lattice /predict/fast answers from, scored by the bundled model
+print("\n🔄 Scoring the price grid for /predict/fast...")
+grid_files, bundle_extra["grid_report"] = price_grid.write(
+    encoder, lambda X: packed_booster.inplace_predict(X, validate_features=False), ".")
+extra_files.update(grid_files)
+print(f"✅ Saved → {price_grid.GRID_FILE}, {price_grid.FLAGS_FILE}, {price_grid.AXES_FILE}")
+
+manifest = write_bundle(os.path.join(API_DIR, "bundles"), model_file, tables, extra_files,
+                        extra=bundle_extra)
+print(f"✅ Saved → api/bundles/{manifest['version']}  (CURRENT; reload with SIGHUP or POST /admin/reload)")
+
 print("\n" + "=" * 55)
 print("  TRAINING COMPLETE!")
 print(f"  Test R² = {test_r2:.4f}")